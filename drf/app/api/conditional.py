@@ -0,0 +1,121 @@
+"""
+Conditional GET (ETag / Last-Modified) for DRF viewsets.
+
+``ConditionalGetMixin`` answers ``list`` and ``retrieve`` with a weak ETag
+and ``Last-Modified``, and returns ``304 Not Modified`` when the client's
+``If-None-Match`` still matches, without serializing anything.
+
+The list ETag is derived from one aggregate over the filtered queryset,
+``(count, max(updated_at))``, plus the query parameters, the serializer
+class (role-specific serializers expose different fields), the user and
+the date (position assignments take effect by date). Any insert, update or delete of a visible row changes it. Rows from other
+tables that appear in the payload can be folded in with
+``etag_related_models`` or ``get_etag_dependencies()``.
+
+Reference data (``reference_data = True``) is also marked cacheable for
+``REFERENCE_DATA_MAX_AGE`` seconds for non-admin users; everything else
+must be revalidated on every use (``Cache-Control: private, no-cache``).
+"""
+import hashlib
+from datetime import date
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+
+DEFAULT_REFERENCE_MAX_AGE = 60
+
+
+def queryset_version(queryset):
+    """``(count, max(updated_at))`` of ``queryset`` from a single aggregate"""
+    stats = queryset.order_by().aggregate(total=Count('pk'), last_modified=Max('updated_at'))
+    return stats['total'], stats['last_modified']
+
+
+class ConditionalGetMixin:
+    """ETag / Last-Modified / 304 support for ``list`` and ``retrieve``"""
+    reference_data = False
+    etag_related_models = ()
+
+    def get_etag_dependencies(self):
+        """Querysets (besides the main one) whose changes must change the ETag"""
+        return [model._default_manager.all() for model in self.etag_related_models]
+
+    def get_conditional_validators(self, versions):
+        """Return ``(etag, last_modified)`` for the given ``(count, updated_at)`` versions"""
+        versions = list(versions) + [queryset_version(qs) for qs in self.get_etag_dependencies()]
+        request = self.request
+        parts = [
+            self.get_serializer_class().__name__,
+            getattr(request.user, 'pk', None),
+            sorted(request.query_params.lists()),
+            date.today().isoformat(),
+            [(total, last_modified.isoformat() if last_modified else None) for total, last_modified in versions],
+        ]
+        etag = 'W/"%s"' % hashlib.sha1(repr(parts).encode()).hexdigest()
+        timestamps = [last_modified for _, last_modified in versions if last_modified]
+        return etag, max(timestamps) if timestamps else None
+
+    def is_not_modified(self, request, etag, last_modified, use_last_modified=False):
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            # Weak comparison: W/"x" matches "x"
+            tags = {tag[2:] if tag.startswith('W/') else tag for tag in parse_etags(if_none_match)}
+            return '*' in tags or etag[2:] in tags
+        if use_last_modified and last_modified:
+            since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+            return since is not None and int(last_modified.timestamp()) <= since
+        return False
+
+    def conditional_response(self, request, etag, last_modified, build_response, use_last_modified=False):
+        """
+        Return 304 if the client's copy is current, else ``build_response()``,
+        with the validators and Cache-Control attached either way.
+
+        ``If-Modified-Since`` is only honoured when ``use_last_modified`` is
+        set (single objects): for lists a delete does not move max(updated_at).
+        """
+        if self.is_not_modified(request, etag, last_modified, use_last_modified):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = build_response()
+            if response.status_code != status.HTTP_200_OK:
+                return response
+
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        if self.reference_data and not request.principal.is_admin:
+            # Admins edit reference data and must see their own changes at once
+            patch_cache_control(
+                response, private=True,
+                max_age=getattr(settings, 'REFERENCE_DATA_MAX_AGE', DEFAULT_REFERENCE_MAX_AGE),
+            )
+        else:
+            patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ('Authorization', 'Cookie'))
+        return response
+
+    def object_validators(self, instance):
+        return self.get_conditional_validators([(instance.pk, getattr(instance, 'updated_at', None))])
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        etag, last_modified = self.get_conditional_validators([queryset_version(queryset)])
+        build_list = super().list
+        return self.conditional_response(
+            request, etag, last_modified, lambda: build_list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag, last_modified = self.object_validators(instance)
+        return self.conditional_response(
+            request, etag, last_modified,
+            lambda: Response(self.get_serializer(instance).data),
+            use_last_modified=not self.get_etag_dependencies(),
+        )
@@ -1,4 +1,15 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+from collections import OrderedDict
+from datetime import date
+from decimal import Decimal
+
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class DefaultPagination(PageNumberPagination):
@@ -7,3 +18,210 @@ class DefaultPagination(PageNumberPagination):
     max_page_size = 100
 
 
+class KeysetPagination(BasePagination):
+    """
+    Opt-in keyset (seek) pagination.
+
+    Without ``?cursor=`` the request is handled by ``fallback_class`` (or
+    left unpaginated when that is None), so existing clients see no
+    change. ``?cursor=`` (empty) starts at the first page; every page
+    returns opaque ``next``/``previous`` cursors that encode the last/first
+    row's key. Each page is one ``WHERE key < last_key ORDER BY key LIMIT n``
+    query, so the cost does not grow with depth and no ``COUNT(*)`` is run.
+
+    The key is the view's ``keyset_ordering`` (e.g. ``('-date_local', '-id')``)
+    and must end with a unique field. ``?ordering=`` is ignored in cursor mode.
+    ``?include_total=true`` adds an approximate ``total`` (see approximate_count).
+    """
+    cursor_query_param = 'cursor'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    total_query_param = 'include_total'
+    default_keyset_ordering = ('-created_at', '-id')
+    fallback_class = None
+    invalid_cursor_message = 'Cursor tidak valid'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.fallback = None
+        if self.cursor_query_param not in request.query_params:
+            if self.fallback_class is None:
+                return None
+            self.fallback = self.fallback_class()
+            return self.fallback.paginate_queryset(queryset, request, view)
+
+        self.ordering = tuple(getattr(view, 'keyset_ordering', self.default_keyset_ordering))
+        self.page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        base_queryset = queryset
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(_flip(field) for field in ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._seek_filter(ordering, position))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        # Going backwards, "more" lies before the page; we came from a page after it
+        if reverse:
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.has_previous, self.has_next = position is not None, has_more
+        self.page = rows
+
+        self.total = None
+        if request.query_params.get(self.total_query_param, '').lower() in ('1', 'true'):
+            self.total = approximate_count(base_queryset)
+        return rows
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+        payload = OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+        ])
+        if self.total is not None:
+            payload['total'], payload['total_is_approximate'] = self.total
+        payload['results'] = data
+        return Response(payload)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        """Return ``(position, reverse)``; position is None for the first page"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+            position = data['p']
+            reverse = bool(data.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, row, reverse):
+        position = [_cursor_value(_field_value(row, field)) for field in self.ordering]
+        data = json.dumps({'p': position, 'r': int(reverse)}, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii').rstrip('=')
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            # Ran off the end; the first page is always reachable
+            return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, '')
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    @staticmethod
+    def _seek_filter(ordering, position):
+        """
+        Rows strictly after ``position`` in ``ordering``:
+        (a > x) OR (a = x AND b > y) OR ... with < for descending fields.
+        """
+        condition = Q()
+        equal_so_far = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal_so_far & Q(**{f'{name}__{lookup}': value})
+            equal_so_far &= Q(**{name: value})
+        return condition
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Keyset cursor; pass an empty value for the first page',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.total_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Include an approximate total in cursor mode',
+                'schema': {'type': 'boolean'},
+            },
+        ]
+
+
+class KeysetOrPageNumberPagination(KeysetPagination):
+    """Keyset pagination with ``?cursor=``, page-number pagination otherwise"""
+    fallback_class = DefaultPagination
+
+
+APPROXIMATE_COUNT_CAP = 10000
+
+
+def approximate_count(queryset, cap=APPROXIMATE_COUNT_CAP):
+    """
+    Return ``(total, is_approximate)`` without an unbounded ``COUNT(*)``.
+
+    An unfiltered queryset on MySQL uses the table statistics in
+    information_schema (free, but only an estimate). Anything else counts
+    at most ``cap`` rows; beyond that the cap is reported as approximate.
+    """
+    query = queryset.query
+    connection = connections[queryset.db]
+    if connection.vendor == 'mysql' and not query.where and not query.distinct:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT TABLE_ROWS FROM information_schema.TABLES '
+                'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s',
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row and row[0] is not None:
+            return int(row[0]), True
+
+    total = queryset.order_by()[:cap + 1].count()
+    if total > cap:
+        return cap, True
+    return total, False
+
+
+def _flip(field):
+    return field[1:] if field.startswith('-') else f'-{field}'
+
+
+def _field_value(row, field):
+    value = row
+    for part in field.lstrip('-').split('__'):
+        value = value.get(part) if isinstance(value, dict) else getattr(value, part)
+    return value
+
+
+def _cursor_value(value):
+    # Full-precision ISO strings; Django parses them back for date/datetime lookups
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
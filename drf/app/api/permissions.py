@@ -41,7 +41,7 @@ class IsAdmin(permissions.BasePermission):
         user = request.user
         if not user or not user.is_authenticated:
             return False
-        return bool(user.is_superuser or user.groups.filter(name='admin').exists())
+        return bool(user.is_superuser or request.principal.has_role('admin'))
 
 
 class IsSupervisor(permissions.BasePermission):
@@ -68,8 +68,7 @@ class IsSupervisor(permissions.BasePermission):
             return True
         
         # Use position-based approval checking
-        from .utils import ApprovalChecker
-        approval_level = ApprovalChecker.get_user_approval_level(user)
+        approval_level = request.principal.approval_level
         
         # Only level 1 and 2 have supervisor capabilities
         return approval_level >= 1
@@ -92,7 +91,7 @@ class IsEmployee(permissions.BasePermission):
         user = request.user
         if not user or not user.is_authenticated:
             return False
-        return bool(user.is_superuser or user.groups.filter(name='pegawai').exists())
+        return bool(user.is_superuser or request.principal.has_role('pegawai'))
 
 
 # ============================================================================
@@ -119,12 +118,11 @@ class IsAdminOrSupervisor(permissions.BasePermission):
             return False
         
         # Admin: full access
-        if user.is_superuser or user.groups.filter(name='admin').exists():
+        if user.is_superuser or request.principal.has_role('admin'):
             return True
         
         # Use position-based approval checking for supervisor capabilities
-        from .utils import ApprovalChecker
-        approval_level = ApprovalChecker.get_user_approval_level(user)
+        approval_level = request.principal.approval_level
         
         # Position approval level >= 1: read-only access
         if approval_level >= 1:
@@ -152,12 +150,11 @@ class IsAdminOrSupervisorWithApproval(permissions.BasePermission):
             return False
         
         # Admin: full access
-        if user.is_superuser or user.groups.filter(name='admin').exists():
+        if user.is_superuser or request.principal.has_role('admin'):
             return True
         
         # Use position-based approval checking
-        from .utils import ApprovalChecker
-        approval_level = ApprovalChecker.get_user_approval_level(user)
+        approval_level = request.principal.approval_level
         
         # Allow GET, HEAD, OPTIONS for read access if has supervisor capabilities
         if request.method in ("GET", "HEAD", "OPTIONS"):
@@ -192,12 +189,11 @@ class IsAdminOrSupervisorOvertimeApproval(permissions.BasePermission):
             return False
         
         # Admin: full access
-        if user.is_superuser or user.groups.filter(name='admin').exists():
+        if user.is_superuser or request.principal.has_role('admin'):
             return True
         
         # Use position-based approval checking
-        from .utils import ApprovalChecker
-        approval_level = ApprovalChecker.get_user_approval_level(user)
+        approval_level = request.principal.approval_level
         
         # Only level 1 and 2 have overtime approval permission
         return approval_level >= 1
@@ -222,12 +218,11 @@ class IsAdminOrSupervisorReadOnly(permissions.BasePermission):
             return False
         
         # Admin: full access
-        if user.is_superuser or user.groups.filter(name='admin').exists():
+        if user.is_superuser or request.principal.has_role('admin'):
             return True
         
         # Use position-based approval checking for supervisor capabilities
-        from .utils import ApprovalChecker
-        approval_level = ApprovalChecker.get_user_approval_level(user)
+        approval_level = request.principal.approval_level
         
         # Position approval level >= 1: read-only access
         if approval_level >= 1:
@@ -252,7 +247,7 @@ class IsAdminOrReadOnly(permissions.BasePermission):
         if request.method in ("GET", "HEAD", "OPTIONS"):
             return bool(request.user and request.user.is_authenticated)
         return bool(request.user and request.user.is_authenticated and 
-                   (request.user.is_superuser or request.user.groups.filter(name='admin').exists()))
+                   (request.user.is_superuser or request.principal.has_role('admin')))
 
 
 # ============================================================================
@@ -277,7 +272,7 @@ class IsOwnerOrAdmin(permissions.BasePermission):
     
     def has_object_permission(self, request, view, obj):
         # Admin bisa akses semua
-        if request.user.is_superuser or request.user.groups.filter(name='admin').exists():
+        if request.user.is_superuser or request.principal.has_role('admin'):
             return True
         
         # User hanya bisa akses data milik sendiri
@@ -308,13 +303,13 @@ class IsDivisionMemberOrAdmin(permissions.BasePermission):
     
     def has_object_permission(self, request, view, obj):
         # Admin bisa akses semua
-        if request.user.is_superuser or request.user.groups.filter(name='admin').exists():
+        if request.user.is_superuser or request.principal.has_role('admin'):
             return True
         
         # Supervisor bisa akses data se-divisi
-        if request.user.groups.filter(name='supervisor').exists():
+        if request.principal.has_role('supervisor'):
             try:
-                supervisor_division = request.user.employee.division
+                supervisor_division = request.principal.division
                 if hasattr(obj, 'user') and hasattr(obj.user, 'employee'):
                     return obj.user.employee.division == supervisor_division
                 elif hasattr(obj, 'division'):
@@ -354,12 +349,11 @@ class IsSupervisorOrAdmin(permissions.BasePermission):
             return False
         
         # Admin/Superuser access
-        if user.is_superuser or user.groups.filter(name='admin').exists():
+        if user.is_superuser or request.principal.has_role('admin'):
             return True
         
         # Use position-based approval checking for supervisor capabilities
-        from .utils import ApprovalChecker
-        approval_level = ApprovalChecker.get_user_approval_level(user)
+        approval_level = request.principal.approval_level
         
         return approval_level >= 1
 
@@ -443,15 +437,15 @@ class IsOvertimeRequestOwnerOrSupervisor(permissions.BasePermission):
             return False
         
         # Admin has full access
-        if request.user.is_superuser or request.user.groups.filter(name='admin').exists():
+        if request.user.is_superuser or request.principal.has_role('admin'):
             return True
         
         # Supervisor has access
-        if request.user.groups.filter(name='supervisor').exists():
+        if request.principal.has_role('supervisor'):
             return True
         
         # Employee has access
-        if request.user.groups.filter(name='pegawai').exists():
+        if request.principal.has_role('pegawai'):
             return True
         
         return False
@@ -461,13 +455,13 @@ class IsOvertimeRequestOwnerOrSupervisor(permissions.BasePermission):
         user = request.user
         
         # Admin has full access
-        if user.is_superuser or user.groups.filter(name='admin').exists():
+        if user.is_superuser or request.principal.has_role('admin'):
             return True
         
         # Supervisor can access overtime requests from their division or org-wide
-        if user.groups.filter(name='supervisor').exists():
+        if request.principal.has_role('supervisor'):
             try:
-                supervisor_employee = user.employee
+                supervisor_employee = request.principal.employee
                 
                 # Check if supervisor has org-wide approval permission
                 if (supervisor_employee.position and 
@@ -482,7 +476,7 @@ class IsOvertimeRequestOwnerOrSupervisor(permissions.BasePermission):
             return False
         
         # Employee can only access their own overtime requests
-        if user.groups.filter(name='pegawai').exists():
+        if request.principal.has_role('pegawai'):
             return obj.user == user
         
         return False
@@ -509,12 +503,11 @@ class IsOvertimeRequestApprover(permissions.BasePermission):
             return False
         
         # Admin/Superuser can approve
-        if request.user.is_superuser or request.user.groups.filter(name='admin').exists():
+        if request.user.is_superuser or request.principal.has_role('admin'):
             return True
         
         # Use position-based approval checking
-        from .utils import ApprovalChecker
-        approval_level = ApprovalChecker.get_user_approval_level(request.user)
+        approval_level = request.principal.approval_level
         
         # Only level 1 and 2 have approval permission
         return approval_level >= 1
@@ -524,7 +517,7 @@ class IsOvertimeRequestApprover(permissions.BasePermission):
         user = request.user
         
         # Admin/Superuser can approve any request
-        if user.is_superuser or user.groups.filter(name='admin').exists():
+        if user.is_superuser or request.principal.has_role('admin'):
             return True
         
         # Use position-based approval checking
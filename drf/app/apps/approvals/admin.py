@@ -0,0 +1,24 @@
+from django.contrib import admin
+from .models import ApprovalWorkItem
+
+
+@admin.register(ApprovalWorkItem)
+class ApprovalWorkItemAdmin(admin.ModelAdmin):
+    """Read-only view of the approver inbox (maintained from the source requests)"""
+    list_display = [
+        'id', 'kind', 'object_id', 'approval_level', 'division', 'status',
+        'employee_name', 'date', 'submitted_at'
+    ]
+    list_filter = ['kind', 'approval_level', 'status', 'division']
+    search_fields = ['employee_name', 'summary', 'requester__username']
+    readonly_fields = [
+        'kind', 'object_id', 'approval_level', 'division', 'status', 'requester',
+        'employee', 'employee_name', 'date', 'summary', 'submitted_at',
+        'created_at', 'updated_at'
+    ]
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class ApprovalsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.approvals'
+    verbose_name = 'Approval Inbox'
+
+    def ready(self):
+        from . import signals  # noqa: F401
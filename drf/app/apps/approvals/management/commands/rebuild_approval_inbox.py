@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.approvals.services import SOURCES, rebuild_work_items
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the approver inbox work items from the overtime, monthly summary '
+        'and correction requests awaiting approval'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind',
+            action='append',
+            default=[],
+            choices=list(SOURCES),
+            help='Only rebuild this kind; may be repeated',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Number of requests synced per batch (default: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+
+        for kind in options['kind'] or list(SOURCES):
+            with transaction.atomic():
+                total = rebuild_work_items(kind, chunk_size=options['chunk_size'])
+            self.stdout.write(
+                self.style.SUCCESS(f'{kind}: {total} open request(s)')
+            )
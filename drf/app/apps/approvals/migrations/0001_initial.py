@@ -0,0 +1,47 @@
+# Generated by Django 5.0.2 on 2026-10-17 04:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('employees', '0004_add_active_position_switching'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApprovalWorkItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('kind', models.CharField(choices=[('overtime', 'Overtime Request'), ('monthly_summary', 'Monthly Summary Request'), ('correction', 'Attendance Correction')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('approval_level', models.PositiveSmallIntegerField(choices=[(1, 'Level 1 (division)'), (2, 'Final')], help_text='Approval level the request is waiting for')),
+                ('status', models.CharField(help_text='Status of the source request', max_length=20)),
+                ('employee_name', models.CharField(blank=True, max_length=255)),
+                ('date', models.DateField(blank=True, null=True)),
+                ('summary', models.CharField(blank=True, max_length=255)),
+                ('submitted_at', models.DateTimeField(help_text='When the source request was created')),
+                ('division', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='approval_work_items', to='employees.division')),
+                ('employee', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='approval_work_items', to='employees.employee')),
+                ('requester', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='approval_work_items', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Approval Work Item',
+                'verbose_name_plural': 'Approval Work Items',
+                'ordering': ['-submitted_at', '-id'],
+                'indexes': [models.Index(fields=['approval_level', 'division', 'status', 'submitted_at', 'id'], name='approval_inbox_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='approvalworkitem',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='approval_work_item_source_uniq'),
+        ),
+    ]
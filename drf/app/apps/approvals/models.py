@@ -0,0 +1,78 @@
+from django.db import models
+from django.conf import settings
+from apps.core.models import TimeStampedModel
+
+
+class ApprovalWorkItem(TimeStampedModel):
+    """
+    One request awaiting an approver's action (denormalized inbox row).
+
+    Rows exist only while their source request (overtime request, monthly
+    summary request or attendance correction) waits for approval; they
+    are kept in sync by apps.approvals.services.sync_work_items.
+    """
+    KIND_OVERTIME = 'overtime'
+    KIND_MONTHLY_SUMMARY = 'monthly_summary'
+    KIND_CORRECTION = 'correction'
+    KIND_CHOICES = [
+        (KIND_OVERTIME, 'Overtime Request'),
+        (KIND_MONTHLY_SUMMARY, 'Monthly Summary Request'),
+        (KIND_CORRECTION, 'Attendance Correction'),
+    ]
+
+    LEVEL_DIVISION = 1
+    LEVEL_FINAL = 2
+    LEVEL_CHOICES = [
+        (LEVEL_DIVISION, 'Level 1 (division)'),
+        (LEVEL_FINAL, 'Final'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    approval_level = models.PositiveSmallIntegerField(
+        choices=LEVEL_CHOICES,
+        help_text="Approval level the request is waiting for",
+    )
+    division = models.ForeignKey(
+        'employees.Division',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="approval_work_items",
+    )
+    status = models.CharField(max_length=20, help_text="Status of the source request")
+
+    # Denormalized display fields, so the inbox needs no joins
+    requester = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="approval_work_items",
+    )
+    employee = models.ForeignKey(
+        'employees.Employee',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="approval_work_items",
+    )
+    employee_name = models.CharField(max_length=255, blank=True)
+    date = models.DateField(null=True, blank=True)
+    summary = models.CharField(max_length=255, blank=True)
+    submitted_at = models.DateTimeField(help_text="When the source request was created")
+
+    class Meta:
+        ordering = ['-submitted_at', '-id']
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='approval_work_item_source_uniq'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['approval_level', 'division', 'status', 'submitted_at', 'id'],
+                name='approval_inbox_idx',
+            ),
+        ]
+        verbose_name = "Approval Work Item"
+        verbose_name_plural = "Approval Work Items"
+
+    def __str__(self) -> str:
+        return f"{self.get_kind_display()} #{self.object_id} ({self.status})"
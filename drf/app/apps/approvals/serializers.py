@@ -0,0 +1,16 @@
+from rest_framework import serializers
+from .models import ApprovalWorkItem
+
+
+class ApprovalWorkItemSerializer(serializers.ModelSerializer):
+    """Inbox row; ``kind`` + ``object_id`` identify the request to open or act on"""
+    kind_display = serializers.CharField(source='get_kind_display', read_only=True)
+    
+    class Meta:
+        model = ApprovalWorkItem
+        fields = [
+            'id', 'kind', 'kind_display', 'object_id', 'approval_level', 'status',
+            'division', 'requester', 'employee', 'employee_name', 'date', 'summary',
+            'submitted_at',
+        ]
+        read_only_fields = fields
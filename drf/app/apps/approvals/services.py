@@ -0,0 +1,234 @@
+"""
+Approver inbox.
+
+Approvers used to poll three ``pending`` endpoints (overtime requests,
+monthly summary requests, attendance corrections), each re-deriving the
+caller's rights and filtering a large table by status plus an
+``employee__division`` join. Every request awaiting approval now also has
+an ``ApprovalWorkItem`` row carrying the approval level it waits for, the
+requester's division and a display summary. The row is written when the
+request is created or changes state and deleted once it is decided. The
+inbox is then one indexed query on (approval_level, division, status)
+over a table that only holds open work.
+
+Who sees what (mirrors the existing approval endpoints):
+
+- admins: everything
+- level 1 items: supervisors / approvers of the item's division
+- final (level 2) items: org-wide overtime approvers everywhere, other
+  approvers with approval level 2 in their own division
+"""
+from dataclasses import dataclass
+from datetime import date
+
+from django.apps import apps
+from django.db import connection
+from django.db.models import Count, Q
+
+from .models import ApprovalWorkItem
+
+
+@dataclass(frozen=True)
+class WorkItemSource:
+    """A request model whose open requests appear in the inbox"""
+    kind: str
+    model_label: str
+    # Source status -> approval level the request is waiting for
+    levels: dict
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+
+SOURCES = {
+    source.kind: source
+    for source in [
+        WorkItemSource(
+            ApprovalWorkItem.KIND_OVERTIME, 'overtime.OvertimeRequest',
+            {'pending': ApprovalWorkItem.LEVEL_DIVISION, 'level1_approved': ApprovalWorkItem.LEVEL_FINAL},
+        ),
+        WorkItemSource(
+            ApprovalWorkItem.KIND_MONTHLY_SUMMARY, 'overtime.MonthlySummaryRequest',
+            {'pending': ApprovalWorkItem.LEVEL_DIVISION, 'level1_approved': ApprovalWorkItem.LEVEL_FINAL},
+        ),
+        WorkItemSource(
+            ApprovalWorkItem.KIND_CORRECTION, 'corrections.AttendanceCorrection',
+            {'pending': ApprovalWorkItem.LEVEL_DIVISION},
+        ),
+    ]
+}
+
+SYNC_UPDATE_FIELDS = [
+    'approval_level', 'division', 'status', 'requester', 'employee',
+    'employee_name', 'date', 'summary', 'submitted_at', 'updated_at',
+]
+
+
+def sync_work_items(kind, instances):
+    """
+    Bring the work items of ``instances`` (source requests of ``kind``) in
+    line with their status: upsert the open ones, delete the decided ones.
+    """
+    source = SOURCES[kind]
+    instances = [instance for instance in instances if instance.pk]
+    open_requests = [instance for instance in instances if instance.status in source.levels]
+    closed_ids = [instance.pk for instance in instances if instance.status not in source.levels]
+
+    if closed_ids:
+        ApprovalWorkItem.objects.filter(kind=kind, object_id__in=closed_ids).delete()
+    if not open_requests:
+        return
+
+    employees = _employees_for(open_requests)
+    describe = DESCRIBERS[kind](open_requests)
+    items = []
+    for instance in open_requests:
+        employee = employees.get(('id', instance.employee_id)) or employees.get(('user', instance.user_id)) or {}
+        item_date, summary = describe(instance)
+        items.append(ApprovalWorkItem(
+            kind=kind,
+            object_id=instance.pk,
+            approval_level=source.levels[instance.status],
+            division_id=employee.get('division_id'),
+            status=instance.status,
+            requester_id=instance.user_id,
+            employee_id=employee.get('id'),
+            employee_name=(employee.get('fullname') or '')[:255],
+            date=item_date,
+            summary=summary[:255],
+            submitted_at=instance.created_at,
+        ))
+
+    # MySQL upserts on any unique key and does not accept an explicit target
+    unique_fields = ['kind', 'object_id'] if connection.features.supports_update_conflicts_with_target else None
+    ApprovalWorkItem.objects.bulk_create(
+        items,
+        update_conflicts=True,
+        unique_fields=unique_fields,
+        update_fields=SYNC_UPDATE_FIELDS,
+    )
+
+
+def sync_work_items_by_id(kind, object_ids):
+    """Re-sync requests changed by a queryset ``update()``, which sends no signals"""
+    object_ids = list(object_ids)
+    instances = list(SOURCES[kind].model.objects.filter(id__in=object_ids))
+    sync_work_items(kind, instances)
+    delete_work_items(kind, set(object_ids) - {instance.pk for instance in instances})
+
+
+def delete_work_items(kind, object_ids):
+    ApprovalWorkItem.objects.filter(kind=kind, object_id__in=list(object_ids)).delete()
+
+
+def refresh_employee_work_items(employee):
+    """An employee moved division or was renamed: update their open items"""
+    ApprovalWorkItem.objects.filter(employee_id=employee.pk).exclude(
+        division_id=employee.division_id, employee_name=(employee.fullname or '')[:255],
+    ).update(division_id=employee.division_id, employee_name=(employee.fullname or '')[:255])
+
+
+def rebuild_work_items(kind, chunk_size=1000):
+    """Recreate every work item of ``kind`` from its source table. Returns the number of open requests."""
+    source = SOURCES[kind]
+    ApprovalWorkItem.objects.filter(kind=kind).delete()
+    total = 0
+    chunk = []
+    for instance in source.model.objects.filter(status__in=list(source.levels)).order_by('id').iterator(chunk_size):
+        chunk.append(instance)
+        if len(chunk) >= chunk_size:
+            sync_work_items(kind, chunk)
+            total += len(chunk)
+            chunk = []
+    if chunk:
+        sync_work_items(kind, chunk)
+        total += len(chunk)
+    return total
+
+
+def _employees_for(instances):
+    """Employee id / division / name keyed by ('id', employee_id) and ('user', user_id)"""
+    from apps.employees.models import Employee
+
+    employee_ids = {instance.employee_id for instance in instances if getattr(instance, 'employee_id', None)}
+    user_ids = {instance.user_id for instance in instances if not getattr(instance, 'employee_id', None)}
+    employees = {}
+    for row in Employee.objects.filter(Q(id__in=employee_ids) | Q(user_id__in=user_ids)).values(
+        'id', 'user_id', 'division_id', 'fullname'
+    ):
+        employees[('id', row['id'])] = row
+        if row['user_id'] in user_ids:
+            employees[('user', row['user_id'])] = row
+    return employees
+
+
+def _describe_overtime(instances):
+    def describe(overtime):
+        summary = f"Lembur {overtime.start_time:%H:%M}-{overtime.end_time:%H:%M}"
+        if overtime.total_hours:
+            summary += f" ({overtime.total_hours} jam)"
+        if overtime.request_type == 'holiday':
+            summary += " - hari libur"
+        return overtime.date, summary
+    return describe
+
+
+def _describe_monthly_summary(instances):
+    def describe(summary_request):
+        return (
+            date(summary_request.year, summary_request.month, 1),
+            f"Rekap lembur {summary_request.month:02d}/{summary_request.year}",
+        )
+    return describe
+
+
+def _describe_correction(instances):
+    from apps.attendance.models import Attendance
+
+    # Corrections of an existing record take their date from it; one query for all
+    attendance_dates = dict(
+        Attendance.objects.filter(
+            id__in={c.attendance_id for c in instances if c.attendance_id and not c.date_local}
+        ).values_list('id', 'date_local')
+    )
+
+    def describe(correction):
+        return (
+            correction.date_local or attendance_dates.get(correction.attendance_id),
+            f"Koreksi absensi: {correction.get_correction_type_display()}",
+        )
+    return describe
+
+
+DESCRIBERS = {
+    ApprovalWorkItem.KIND_OVERTIME: _describe_overtime,
+    ApprovalWorkItem.KIND_MONTHLY_SUMMARY: _describe_monthly_summary,
+    ApprovalWorkItem.KIND_CORRECTION: _describe_correction,
+}
+
+
+def inbox_queryset(principal):
+    """Work items awaiting ``principal``'s action"""
+    items = ApprovalWorkItem.objects.all()
+    if principal.is_admin:
+        return items
+
+    scope = Q(pk__in=[])
+    division_id = principal.division_id
+    if division_id and (principal.is_supervisor or principal.approval_level >= 1):
+        scope |= Q(approval_level=ApprovalWorkItem.LEVEL_DIVISION, division_id=division_id)
+    if principal.can_approve_overtime_org_wide:
+        scope |= Q(approval_level=ApprovalWorkItem.LEVEL_FINAL)
+    elif principal.approval_level >= 2 and division_id:
+        scope |= Q(approval_level=ApprovalWorkItem.LEVEL_FINAL, division_id=division_id)
+    return items.filter(scope)
+
+
+def inbox_counts(queryset):
+    """Number of items per kind (every kind present, zero if none) and the total"""
+    counts = {kind: 0 for kind in SOURCES}
+    for row in queryset.order_by().values('kind').annotate(total=Count('id')):
+        counts[row['kind']] = row['total']
+    counts['total'] = sum(counts.values())
+    return counts
@@ -0,0 +1,39 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.corrections.models import AttendanceCorrection
+from apps.employees.models import Employee
+from apps.overtime.models import MonthlySummaryRequest, OvertimeRequest
+from .models import ApprovalWorkItem
+from .services import delete_work_items, refresh_employee_work_items, sync_work_items
+
+
+SOURCE_KINDS = {
+    OvertimeRequest: ApprovalWorkItem.KIND_OVERTIME,
+    MonthlySummaryRequest: ApprovalWorkItem.KIND_MONTHLY_SUMMARY,
+    AttendanceCorrection: ApprovalWorkItem.KIND_CORRECTION,
+}
+
+
+@receiver(post_save, sender=OvertimeRequest)
+@receiver(post_save, sender=MonthlySummaryRequest)
+@receiver(post_save, sender=AttendanceCorrection)
+def sync_work_item_on_save(sender, instance, raw=False, **kwargs):
+    """Creating a request opens its inbox item; every state change updates or closes it"""
+    if raw:
+        return
+    sync_work_items(SOURCE_KINDS[sender], [instance])
+
+
+@receiver(post_delete, sender=OvertimeRequest)
+@receiver(post_delete, sender=MonthlySummaryRequest)
+@receiver(post_delete, sender=AttendanceCorrection)
+def delete_work_item(sender, instance, **kwargs):
+    delete_work_items(SOURCE_KINDS[sender], [instance.pk])
+
+
+@receiver(post_save, sender=Employee)
+def refresh_work_items_on_employee_save(sender, instance, raw=False, **kwargs):
+    """Inbox items follow their employee to a new division"""
+    if raw:
+        return
+    refresh_employee_work_items(instance)
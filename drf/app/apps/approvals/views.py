@@ -0,0 +1,52 @@
+from rest_framework import viewsets, mixins
+from rest_framework.exceptions import ValidationError
+from api.pagination import KeysetOrPageNumberPagination
+from apps.core.permissions import IsSupervisor
+from .models import ApprovalWorkItem
+from .serializers import ApprovalWorkItemSerializer
+from .services import inbox_counts, inbox_queryset
+
+
+class ApprovalInboxViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    Everything awaiting the caller's approval (overtime requests, monthly
+    summary requests, attendance corrections) in one list, newest first,
+    with per-kind ``counts`` of the whole inbox.
+    
+    Filters: ``?kind=overtime|monthly_summary|correction`` and
+    ``?approval_level=1|2``. Approve/reject through the endpoint of each kind.
+    """
+    serializer_class = ApprovalWorkItemSerializer
+    pagination_class = KeysetOrPageNumberPagination
+    keyset_ordering = ('-submitted_at', '-id')
+    
+    def get_permissions(self):
+        if self.request.principal.is_admin:
+            return []
+        return [IsSupervisor()]
+    
+    def get_inbox(self):
+        return inbox_queryset(self.request.principal)
+    
+    def get_queryset(self):
+        queryset = self.get_inbox()
+        kind = self.request.query_params.get('kind')
+        if kind:
+            if kind not in dict(ApprovalWorkItem.KIND_CHOICES):
+                raise ValidationError({'kind': f'Jenis tidak valid: {kind}'})
+            queryset = queryset.filter(kind=kind)
+        level = self.request.query_params.get('approval_level')
+        if level:
+            if level not in ('1', '2'):
+                raise ValidationError({'approval_level': 'approval_level harus 1 atau 2'})
+            queryset = queryset.filter(approval_level=int(level))
+        return queryset.order_by(*self.keyset_ordering)
+    
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        counts = inbox_counts(self.get_inbox())
+        if isinstance(response.data, dict):
+            response.data['counts'] = counts
+        else:
+            response.data = {'counts': counts, 'results': response.data}
+        return response
@@ -0,0 +1,174 @@
+"""
+Absence detection without placeholder rows.
+
+An employee is absent on a working day (per WorkSettings and holidays)
+that has already ended and has no check-in; a day is incomplete when it
+has a check-in but no check-out. Rather than storing an empty Attendance
+row for every missed day, ``AbsenceEngine`` builds the sorted list of
+expected working days for the range once (from the WorkCalendar) and
+subtracts each employee's sorted attended dates with a linear merge, so
+a team over a year costs one pass over their attendance rows.
+"""
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import List
+from zoneinfo import ZoneInfo
+
+from apps.settings.calendars import get_work_calendar
+from apps.settings.snapshot import get_work_settings
+
+from .models import Attendance
+
+
+ABSENCE_ROW_FIELDS = ('date_local', 'check_in_at_utc', 'check_out_at_utc')
+
+
+def local_today(work_settings=None):
+    """Today's date in the configured work timezone"""
+    work_settings = work_settings or get_work_settings()
+    if work_settings and work_settings.timezone:
+        try:
+            return datetime.now(ZoneInfo(work_settings.timezone)).date()
+        except Exception:
+            pass
+    return date.today()
+
+
+def sorted_difference(expected, attended):
+    """Items of sorted ``expected`` that are not in sorted ``attended`` (linear merge)"""
+    missing = []
+    j = 0
+    attended_len = len(attended)
+    for value in expected:
+        while j < attended_len and attended[j] < value:
+            j += 1
+        if j < attended_len and attended[j] == value:
+            continue
+        missing.append(value)
+    return missing
+
+
+@dataclass
+class AbsenceReport:
+    """Absence figures for one employee over a range"""
+    expected_days: int = 0
+    absent_dates: List[date] = field(default_factory=list)
+    incomplete_dates: List[date] = field(default_factory=list)
+
+    @property
+    def absent_days(self):
+        return len(self.absent_dates)
+
+    @property
+    def incomplete_days(self):
+        return len(self.incomplete_dates)
+
+    @property
+    def attended_days(self):
+        """Expected working days that have a check-in"""
+        return self.expected_days - self.absent_days
+
+    @property
+    def attendance_rate(self):
+        return (self.attended_days / self.expected_days * 100) if self.expected_days else 0
+
+    def as_dict(self, include_dates=False):
+        data = {
+            'expected_work_days': self.expected_days,
+            'absent_days': self.absent_days,
+            'incomplete_days': self.incomplete_days,
+        }
+        if include_dates:
+            data['absent_dates'] = [d.isoformat() for d in self.absent_dates]
+            data['incomplete_dates'] = [d.isoformat() for d in self.incomplete_dates]
+        return data
+
+
+class AbsenceEngine:
+    """
+    Absent / incomplete days over ``start``..``end``.
+
+    Only days before ``today`` are judged (today is not over yet), and an
+    employee's days before their ``tmt_kerja`` (start of employment) are
+    not expected.
+    """
+
+    def __init__(self, start, end, today=None, work_calendar=None):
+        self.start = start
+        self.end = end
+        today = today or local_today()
+        self.cutoff = min(end, today - timedelta(days=1))
+        if self.cutoff < start:
+            self.expected = array('l')
+        else:
+            work_calendar = work_calendar or get_work_calendar(start, self.cutoff)
+            self.expected = array('l', (d.toordinal() for d in work_calendar.working_dates(start, self.cutoff)))
+
+    def report(self, rows, first_day=None):
+        """
+        Build an AbsenceReport from ``rows`` of
+        ``(date_local, check_in_at_utc, check_out_at_utc)`` sorted by date.
+        """
+        cutoff = self.cutoff.toordinal()
+        attended = []
+        incomplete = []
+        for day, check_in_at, check_out_at in rows:
+            ordinal = day.toordinal()
+            if ordinal > cutoff or not check_in_at:
+                continue
+            attended.append(ordinal)
+            if not check_out_at:
+                incomplete.append(day)
+
+        expected = self.expected
+        if first_day is not None:
+            expected = expected[bisect_left(expected, first_day.toordinal()):]
+        absent = sorted_difference(expected, attended)
+        return AbsenceReport(
+            expected_days=len(expected),
+            absent_dates=[date.fromordinal(o) for o in absent],
+            incomplete_dates=incomplete,
+        )
+
+    def for_attendances(self, attendances, first_day=None):
+        """Report for a single person's Attendance queryset"""
+        rows = (
+            attendances.filter(date_local__range=[self.start, self.cutoff])
+            .order_by('date_local')
+            .values_list(*ABSENCE_ROW_FIELDS)
+        )
+        return self.report(rows, first_day=first_day)
+
+    def for_employees(self, employee_ids, first_days=None):
+        """
+        ``{employee_id: AbsenceReport}`` for every id, from one attendance query.
+
+        ``first_days`` maps employee id to the first expected day (defaults to
+        each employee's tmt_kerja, read with one extra query).
+        """
+        from apps.employees.models import Employee
+
+        employee_ids = list(employee_ids)
+        if first_days is None:
+            first_days = dict(
+                Employee.objects.filter(id__in=employee_ids).values_list('id', 'tmt_kerja')
+            )
+        rows_by_employee = {employee_id: [] for employee_id in employee_ids}
+        if employee_ids and self.cutoff >= self.start:
+            rows = (
+                Attendance.objects.filter(
+                    employee_id__in=employee_ids,
+                    date_local__range=[self.start, self.cutoff],
+                )
+                .order_by('employee_id', 'date_local')
+                .values_list('employee_id', *ABSENCE_ROW_FIELDS)
+                .iterator(chunk_size=5000)
+            )
+            for employee_id, *row in rows:
+                rows_by_employee[employee_id].append(row)
+        return {
+            employee_id: self.report(rows, first_day=first_days.get(employee_id))
+            for employee_id, rows in rows_by_employee.items()
+        }
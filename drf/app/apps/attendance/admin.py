@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Attendance
+from .models import Attendance, AttendancePunch, AttendanceMonthlyStat, AttendanceRecomputeJob
 
 
 @admin.register(Attendance)
@@ -42,7 +42,7 @@ class AttendanceAdmin(admin.ModelAdmin):
         }),
         ('Status & Calculations', {
             'fields': (
-                'is_holiday', 'within_geofence', 'minutes_late', 
+                'is_holiday', 'within_geofence', 'check_in_office', 'minutes_late', 
                 'total_work_minutes', 'status'
             )
         }),
@@ -86,3 +86,46 @@ class AttendanceAdmin(admin.ModelAdmin):
     def has_delete_permission(self, request, obj=None):
         """Allow deleting attendance records"""
         return True
+
+
+@admin.register(AttendancePunch)
+class AttendancePunchAdmin(admin.ModelAdmin):
+    """Read-only view of punches received through the batch API"""
+    list_display = ['user', 'kind', 'punched_at_utc', 'status', 'attendance', 'submitted_by', 'created_at']
+    list_filter = ['kind', 'status', 'created_at']
+    search_fields = ['user__username', 'idempotency_key']
+    readonly_fields = [
+        'user', 'idempotency_key', 'kind', 'punched_at_utc', 'attendance',
+        'status', 'error', 'submitted_by', 'created_at'
+    ]
+    ordering = ['-created_at']
+
+
+@admin.register(AttendanceMonthlyStat)
+class AttendanceMonthlyStatAdmin(admin.ModelAdmin):
+    """Read-only view of the monthly attendance rollup"""
+    list_display = [
+        'employee', 'year', 'month', 'record_days', 'present_days', 'late_days',
+        'holiday_days', 'total_work_minutes', 'total_overtime_minutes', 'updated_at'
+    ]
+    list_filter = ['year', 'month']
+    search_fields = ['employee__nip', 'employee__fullname']
+    ordering = ['-year', '-month']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(AttendanceRecomputeJob)
+class AttendanceRecomputeJobAdmin(admin.ModelAdmin):
+    """Queued recomputes of derived attendance fields (run by manage.py recompute_attendance)"""
+    list_display = [
+        'id', 'kind', 'status', 'scanned_rows', 'changed_rows',
+        'requested_by', 'created_at', 'completed_at'
+    ]
+    list_filter = ['kind', 'status']
+    readonly_fields = ['scanned_rows', 'changed_rows', 'error_message', 'started_at', 'completed_at']
+    ordering = ['-created_at']
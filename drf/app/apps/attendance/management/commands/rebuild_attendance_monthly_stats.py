@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.attendance.models import AttendanceMonthlyStat
+from apps.attendance.rollups import rebuild_monthly_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the AttendanceMonthlyStat rollup table from Attendance rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--year',
+            type=int,
+            help='Only rebuild buckets of this year',
+        )
+        parser.add_argument(
+            '--employee-id',
+            type=int,
+            action='append',
+            dest='employee_ids',
+            help='Only rebuild buckets of this employee (can be repeated)',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        before = AttendanceMonthlyStat.objects.count()
+        try:
+            with transaction.atomic():
+                written = rebuild_monthly_stats(
+                    employee_ids=options['employee_ids'],
+                    year=options['year'],
+                )
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'Error: {str(e)}')
+            )
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Rebuilt {written} monthly buckets ({before} existed before) '
+                f'in {time.monotonic() - started:.1f}s'
+            )
+        )
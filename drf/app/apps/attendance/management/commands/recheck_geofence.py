@@ -0,0 +1,150 @@
+import time
+from datetime import date
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from apps.attendance.models import Attendance
+from apps.attendance.my_day import invalidate_my_day
+from apps.settings.geofence import get_office_sites, match_offices_bulk
+
+
+class Command(BaseCommand):
+    help = 'Re-evaluate Attendance.within_geofence / check_in_office against the current office geofences'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show which rows would change without writing anything',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Number of rows read and updated per batch (default: 5000)',
+        )
+        parser.add_argument(
+            '--start-date',
+            help='Only re-check attendance on or after this date (YYYY-MM-DD)',
+        )
+        parser.add_argument(
+            '--end-date',
+            help='Only re-check attendance on or before this date (YYYY-MM-DD)',
+        )
+        parser.add_argument(
+            '--show-diff',
+            type=int,
+            default=20,
+            help='Maximum number of changed rows to print in dry-run mode (default: 20)',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        chunk_size = max(1, options['chunk_size'])
+        show_diff = options['show_diff']
+
+        try:
+            start = date.fromisoformat(options['start_date']) if options['start_date'] else None
+            end = date.fromisoformat(options['end_date']) if options['end_date'] else None
+        except ValueError as e:
+            raise CommandError(f'Invalid date: {e}')
+
+        if dry_run:
+            self.stdout.write(
+                self.style.WARNING('DRY RUN MODE - No changes will be made')
+            )
+
+        sites = get_office_sites()
+        if not sites:
+            self.stdout.write(
+                self.style.ERROR('No office geofence configured; nothing to evaluate against')
+            )
+            return
+        self.stdout.write(f'Evaluating against {len(sites)} office geofence(s)')
+
+        queryset = Attendance.objects.filter(
+            check_in_lat__isnull=False,
+            check_in_lng__isnull=False,
+        )
+        if start:
+            queryset = queryset.filter(date_local__gte=start)
+        if end:
+            queryset = queryset.filter(date_local__lte=end)
+
+        total = queryset.count()
+        scanned = 0
+        changed = 0
+        printed = 0
+        last_pk = 0
+        started = time.monotonic()
+
+        while True:
+            rows = list(
+                queryset.filter(pk__gt=last_pk)
+                .order_by('pk')
+                .values_list(
+                    'pk', 'user_id', 'check_in_lat', 'check_in_lng', 'within_geofence', 'check_in_office_id'
+                )[:chunk_size]
+            )
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+            scanned += len(rows)
+
+            pks, user_ids, lats, lngs, old_within, old_office = zip(*rows)
+            within, site_index = match_offices_bulk(
+                np.asarray(lats, dtype=np.float64),
+                np.asarray(lngs, dtype=np.float64),
+                sites,
+            )
+
+            now = timezone.now()
+            updates = []
+            changed_user_ids = set()
+            for i, pk in enumerate(pks):
+                new_within = bool(within[i])
+                new_office = sites[site_index[i]].id if new_within else None
+                if new_within == old_within[i] and new_office == old_office[i]:
+                    continue
+                changed += 1
+                if dry_run:
+                    if printed < show_diff:
+                        self.stdout.write(
+                            f'  #{pk}: within_geofence {old_within[i]} -> {new_within}, '
+                            f'office {old_office[i]} -> {new_office}'
+                        )
+                        printed += 1
+                    continue
+                updates.append(Attendance(
+                    pk=pk,
+                    within_geofence=new_within,
+                    check_in_office_id=new_office,
+                    updated_at=now,
+                ))
+                changed_user_ids.add(user_ids[i])
+
+            if updates:
+                with transaction.atomic():
+                    Attendance.objects.bulk_update(
+                        updates, ['within_geofence', 'check_in_office', 'updated_at'], batch_size=chunk_size
+                    )
+                    # bulk_update bypasses the my-day signal
+                    invalidate_my_day(changed_user_ids)
+
+            elapsed = time.monotonic() - started
+            rate = scanned / elapsed if elapsed > 0 else 0
+            self.stdout.write(
+                f'{scanned}/{total} rows scanned, {changed} changed ({rate:,.0f} rows/sec)'
+            )
+
+        elapsed = time.monotonic() - started
+        rate = scanned / elapsed if elapsed > 0 else 0
+        verb = 'would change' if dry_run else 'updated'
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Done: {scanned} rows scanned, {changed} {verb} in {elapsed:.1f}s ({rate:,.0f} rows/sec)'
+            )
+        )
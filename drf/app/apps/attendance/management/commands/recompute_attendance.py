@@ -0,0 +1,132 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from apps.attendance.recompute import (
+    DEFAULT_CHUNK_SIZE, AttendanceRecomputer, claim_recompute_job, dates_scope, range_scope,
+    run_recompute_job,
+)
+from apps.settings.snapshot import mark_caches_stale
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute derived attendance fields (holiday flag, lateness, work and overtime minutes, '
+        'overtime amount). Without selection options, runs the queued recompute jobs.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            action='append',
+            default=[],
+            help='Recompute attendance on this date (YYYY-MM-DD); may be repeated',
+        )
+        parser.add_argument(
+            '--start',
+            help='Recompute attendance on or after this date (YYYY-MM-DD)',
+        )
+        parser.add_argument(
+            '--end',
+            help='Recompute attendance on or before this date (YYYY-MM-DD)',
+        )
+        parser.add_argument(
+            '--employee-id',
+            action='append',
+            type=int,
+            default=[],
+            help='Only recompute this employee; may be repeated',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show how many rows would change without writing anything',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f'Number of rows read and updated per batch (default: {DEFAULT_CHUNK_SIZE})',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for queued jobs instead of exiting when the queue is empty',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=5.0,
+            help='Seconds to wait between polls in --loop mode (default: 5)',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = max(1, options['chunk_size'])
+        if options['date'] or options['start'] or options['end'] or options['employee_id']:
+            self._recompute_selection(options, chunk_size)
+        else:
+            self._run_jobs(options, chunk_size)
+
+    def _recompute_selection(self, options, chunk_size):
+        dry_run = options['dry_run']
+        if dry_run:
+            self.stdout.write(
+                self.style.WARNING('DRY RUN MODE - No changes will be made')
+            )
+
+        try:
+            dates = [date.fromisoformat(value) for value in options['date']]
+            start = date.fromisoformat(options['start']) if options['start'] else None
+            end = date.fromisoformat(options['end']) if options['end'] else None
+        except ValueError as e:
+            raise CommandError(f'Invalid date: {e}')
+
+        scope = range_scope(start, end, options['employee_id'])
+        if dates:
+            scope &= dates_scope(dates)
+
+        mark_caches_stale()
+        result = AttendanceRecomputer(chunk_size=chunk_size).recompute(scope, dry_run=dry_run)
+        self._report(result, dry_run)
+
+    def _run_jobs(self, options, chunk_size):
+        if options['dry_run']:
+            raise CommandError('--dry-run needs --date, --start, --end or --employee-id')
+
+        processed = failed = 0
+        try:
+            while True:
+                close_old_connections()
+                job = claim_recompute_job()
+                if job is None:
+                    if not options['loop']:
+                        break
+                    time.sleep(max(0.1, options['poll_interval']))
+                    continue
+
+                self.stdout.write(f'Job {job.id} ({job.kind}): {job.parameters}')
+                result = run_recompute_job(job, chunk_size=chunk_size)
+                if result is None:
+                    failed += 1
+                    job.refresh_from_db(fields=['error_message'])
+                    self.stdout.write(self.style.ERROR(f'Error: {job.error_message}'))
+                else:
+                    processed += 1
+                    self._report(result, dry_run=False)
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('Stopping'))
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Recompute jobs: {processed} completed, {failed} failed')
+        )
+
+    def _report(self, result, dry_run):
+        verb = 'Would update' if dry_run else 'Updated'
+        self.stdout.write(
+            self.style.SUCCESS(f'{verb} {result.changed} of {result.scanned} attendance records')
+        )
+        for name, count in result.field_changes.items():
+            if count:
+                self.stdout.write(f'  {name}: {count}')
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.2 on 2026-10-17 04:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0002_fix_employee_cascade_deletion'),
+        ('settings', '0007_office'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='check_in_office',
+            field=models.ForeignKey(blank=True, help_text='Office whose geofence contained the check-in location', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='attendances', to='settings.office', verbose_name='Check-in Office'),
+        ),
+    ]
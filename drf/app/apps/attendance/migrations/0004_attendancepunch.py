@@ -0,0 +1,40 @@
+# Generated by Django 5.0.2 on 2026-10-17 04:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0003_attendance_check_in_office'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendancePunch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('idempotency_key', models.CharField(max_length=64)),
+                ('kind', models.CharField(choices=[('check_in', 'Check-in'), ('check_out', 'Check-out')], max_length=16)),
+                ('punched_at_utc', models.DateTimeField()),
+                ('status', models.CharField(choices=[('applied', 'Applied'), ('skipped', 'Skipped'), ('rejected', 'Rejected')], max_length=16)),
+                ('error', models.CharField(blank=True, max_length=255, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('attendance', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='punches', to='attendance.attendance')),
+                ('submitted_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='submitted_attendance_punches', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_punches', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Attendance Punch',
+                'verbose_name_plural': 'Attendance Punches',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='attendancepunch',
+            constraint=models.UniqueConstraint(fields=('user', 'idempotency_key'), name='uniq_attendance_punch_key'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.0.2 on 2026-10-17 04:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0004_attendancepunch'),
+        ('employees', '0004_add_active_position_switching'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceMonthlyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('record_days', models.PositiveIntegerField(default=0, help_text='Attendance rows in the month')),
+                ('present_days', models.PositiveIntegerField(default=0, help_text='Days with a check-in')),
+                ('check_out_days', models.PositiveIntegerField(default=0, help_text='Days with a check-out')),
+                ('late_days', models.PositiveIntegerField(default=0)),
+                ('holiday_days', models.PositiveIntegerField(default=0)),
+                ('total_work_minutes', models.PositiveIntegerField(default=0)),
+                ('total_overtime_minutes', models.PositiveIntegerField(default=0)),
+                ('total_overtime_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_late_minutes', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_monthly_stats', to='employees.employee')),
+            ],
+            options={
+                'verbose_name': 'Attendance Monthly Stat',
+                'verbose_name_plural': 'Attendance Monthly Stats',
+                'ordering': ['-year', '-month', 'employee_id'],
+                'indexes': [models.Index(fields=['year', 'month'], name='attendance__year_4b10f0_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='attendancemonthlystat',
+            constraint=models.UniqueConstraint(fields=('employee', 'year', 'month'), name='uniq_attendance_monthly_stat'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.2 on 2026-10-17 04:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0005_attendancemonthlystat'),
+        ('employees', '0004_add_active_position_switching'),
+        ('settings', '0007_office'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['date_local', 'id'], name='attendance__date_lo_f86707_idx'),
+        ),
+    ]
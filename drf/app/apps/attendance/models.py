@@ -2,7 +2,9 @@ from django.db import models
 from django.conf import settings
 from apps.core.models import TimeStampedModel
 from apps.employees.models import Employee
-from apps.settings.models import WorkSettings, Holiday
+from apps.settings.calendars import get_holiday_calendar
+from apps.settings.models import Office
+from apps.settings.snapshot import get_work_settings
 
 
 class Attendance(TimeStampedModel):
@@ -39,6 +41,15 @@ class Attendance(TimeStampedModel):
     # Status fields
     is_holiday = models.BooleanField(default=False)
     within_geofence = models.BooleanField(default=False)
+    check_in_office = models.ForeignKey(
+        Office,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="attendances",
+        verbose_name="Check-in Office",
+        help_text="Office whose geofence contained the check-in location"
+    )
     minutes_late = models.IntegerField(default=0)
     total_work_minutes = models.IntegerField(default=0)
     note = models.CharField(max_length=200, null=True, blank=True)
@@ -79,17 +90,40 @@ class Attendance(TimeStampedModel):
     class Meta:
         ordering = ["-date_local", "-created_at"]
         unique_together = ("user", "date_local")
+        indexes = [
+            # Keyset pagination key for the attendance lists
+            models.Index(fields=["date_local", "id"]),
+        ]
         verbose_name = "Attendance"
         verbose_name_plural = "Attendances"
 
     def __str__(self) -> str:
         return f"Attendance {self.user_id} {self.date_local}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the rollup bucket (and what the row adds to it) as loaded,
+        # so a save can apply just the difference / refresh the bucket it left
+        if 'employee_id' in field_names and 'date_local' in field_names:
+            instance._loaded_rollup_key = instance.rollup_key
+            from .rollups import CONTRIBUTION_SOURCE_FIELDS, rollup_state
+            if all(name in field_names for name in CONTRIBUTION_SOURCE_FIELDS):
+                instance._loaded_rollup = rollup_state(instance)
+        return instance
+    
+    @property
+    def rollup_key(self):
+        """(employee_id, year, month) bucket of AttendanceMonthlyStat this row counts towards"""
+        if not self.employee_id or not self.date_local:
+            return None
+        return (self.employee_id, self.date_local.year, self.date_local.month)
+    
     def save(self, *args, **kwargs):
         """Auto-calculate fields before saving"""
         # Check if it's a holiday
         if not self.is_holiday:
-            self.is_holiday = Holiday.is_holiday_date(self.date_local)
+            self.is_holiday = get_holiday_calendar().is_holiday(self.date_local)
         
         # Calculate work minutes if both check-in and check-out exist
         if self.check_in_at_utc and self.check_out_at_utc:
@@ -102,11 +136,16 @@ class Attendance(TimeStampedModel):
     @property
     def status(self):
         """Get attendance status"""
-        if not self.check_in_at_utc:
+        return self.status_for(self.check_in_at_utc, self.check_out_at_utc, self.minutes_late)
+    
+    @staticmethod
+    def status_for(check_in_at_utc, check_out_at_utc, minutes_late):
+        """Attendance status from raw column values (usable on ``.values()`` rows)"""
+        if not check_in_at_utc:
             return "no_check_in"
-        elif not self.check_out_at_utc:
+        elif not check_out_at_utc:
             return "no_check_out"
-        elif self.minutes_late > 0:
+        elif minutes_late > 0:
             return "late"
         else:
             return "on_time"
@@ -122,48 +161,186 @@ class Attendance(TimeStampedModel):
         employee = self.employee or getattr(self.user, 'employee_profile', None)
         if not self.total_work_minutes or not employee or not getattr(employee, 'gaji_pokok', None):
             return 0, 0
+        return self.overtime_for(
+            self.total_work_minutes, self.date_local, self.is_holiday,
+            employee.gaji_pokok, get_work_settings()
+        )
+    
+    @staticmethod
+    def overtime_for(total_work_minutes, date_local, is_holiday, gaji_pokok, work_settings):
+        """Overtime ``(minutes, amount)`` from plain values (usable without loading the employee)"""
+        from apps.overtime.payroll import OvertimePolicy, compute_attendance_overtime, from_cents, to_cents
+
+        if not total_work_minutes or not gaji_pokok or not work_settings:
+            return 0, 0
         
         try:
-            work_settings = WorkSettings.objects.first()
-            if not work_settings:
-                return 0, 0
-            
-            # Get required minutes for this date
-            work_hours = work_settings.get_work_hours_for_date(self.date_local)
-            required_minutes = work_hours['required_minutes']
-            
-            # Get overtime threshold
-            overtime_threshold = int(work_settings.overtime_threshold_minutes or 60)
-            
-            # Calculate overtime with threshold buffer (same logic as v1)
-            if self.total_work_minutes > (required_minutes + overtime_threshold):
-                overtime_minutes = self.total_work_minutes - required_minutes - overtime_threshold
-                
-                # Calculate overtime amount with payment threshold policy
-                monthly_hours = 22 * 8  # 22 workdays * 8 hours per day
-                hourly_wage = float(employee.gaji_pokok) / monthly_hours
-                
-                # Determine rate
-                if self.is_holiday:
-                    rate = float(work_settings.overtime_rate_holiday or 0.75)
-                else:
-                    rate = float(work_settings.overtime_rate_workday or 0.50)
-                
-                # Apply payment threshold policy
-                payment_threshold_minutes = int(work_settings.overtime_payment_threshold_minutes or 60)
-                
-                if overtime_minutes > payment_threshold_minutes:
-                    # Only pay for minutes above the threshold
-                    payable_minutes = overtime_minutes - payment_threshold_minutes
-                    payable_hours = payable_minutes / 60
-                    overtime_amount = payable_hours * hourly_wage * rate
-                else:
-                    # No payment if overtime is less than or equal to threshold
-                    overtime_amount = 0
-                
-                return overtime_minutes, round(overtime_amount, 2)
-            
-            return 0, 0
-            
+            required_minutes = work_settings.get_work_hours_for_date(date_local)['required_minutes']
+            result = compute_attendance_overtime(
+                OvertimePolicy.from_work_settings(work_settings),
+                [total_work_minutes], [required_minutes], [to_cents(gaji_pokok)], [is_holiday],
+            )
         except Exception:
             return 0, 0
+        
+        overtime_minutes = int(result.overtime_minutes[0])
+        if not overtime_minutes:
+            return 0, 0
+        return overtime_minutes, from_cents(result.amount_cents[0])
+
+
+class AttendancePunch(models.Model):
+    """Receipt of a punch ingested through the batch API, keyed by the client's idempotency key"""
+    KIND_CHECK_IN = 'check_in'
+    KIND_CHECK_OUT = 'check_out'
+    KIND_CHOICES = [
+        (KIND_CHECK_IN, 'Check-in'),
+        (KIND_CHECK_OUT, 'Check-out'),
+    ]
+
+    STATUS_APPLIED = 'applied'
+    STATUS_SKIPPED = 'skipped'
+    STATUS_REJECTED = 'rejected'
+    STATUS_CHOICES = [
+        (STATUS_APPLIED, 'Applied'),
+        (STATUS_SKIPPED, 'Skipped'),
+        (STATUS_REJECTED, 'Rejected'),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="attendance_punches"
+    )
+    idempotency_key = models.CharField(max_length=64)
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    punched_at_utc = models.DateTimeField()
+    attendance = models.ForeignKey(
+        Attendance,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="punches"
+    )
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES)
+    error = models.CharField(max_length=255, null=True, blank=True)
+    submitted_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="submitted_attendance_punches"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Attendance Punch"
+        verbose_name_plural = "Attendance Punches"
+        ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(fields=["user", "idempotency_key"], name="uniq_attendance_punch_key"),
+        ]
+
+    def __str__(self) -> str:
+        return f"Punch {self.kind} {self.user_id} {self.punched_at_utc}"
+
+    def as_result(self):
+        """Per-punch result dict as returned by the batch API"""
+        return {
+            'idempotency_key': self.idempotency_key,
+            'status': self.status,
+            'attendance_id': self.attendance_id,
+            'error': self.error,
+        }
+
+
+class AttendanceMonthlyStat(models.Model):
+    """
+    Per-employee monthly rollup of Attendance, kept in sync by
+    apps.attendance.rollups (signals + bulk write paths) and rebuilt with
+    ``rebuild_attendance_monthly_stats``.
+    """
+    employee = models.ForeignKey(
+        Employee,
+        on_delete=models.CASCADE,
+        related_name="attendance_monthly_stats"
+    )
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    record_days = models.PositiveIntegerField(default=0, help_text="Attendance rows in the month")
+    present_days = models.PositiveIntegerField(default=0, help_text="Days with a check-in")
+    check_out_days = models.PositiveIntegerField(default=0, help_text="Days with a check-out")
+    late_days = models.PositiveIntegerField(default=0)
+    holiday_days = models.PositiveIntegerField(default=0)
+    total_work_minutes = models.PositiveIntegerField(default=0)
+    total_overtime_minutes = models.PositiveIntegerField(default=0)
+    total_overtime_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_late_minutes = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Attendance Monthly Stat"
+        verbose_name_plural = "Attendance Monthly Stats"
+        ordering = ["-year", "-month", "employee_id"]
+        constraints = [
+            models.UniqueConstraint(fields=["employee", "year", "month"], name="uniq_attendance_monthly_stat"),
+        ]
+        indexes = [
+            models.Index(fields=["year", "month"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"AttendanceMonthlyStat {self.employee_id} {self.year}-{self.month:02d}"
+
+
+class AttendanceRecomputeJob(TimeStampedModel):
+    """
+    Queued recomputation of derived Attendance fields (apps.attendance.recompute),
+    enqueued when holidays or work settings change and run by
+    ``manage.py recompute_attendance``.
+    """
+    KIND_HOLIDAY = 'holiday'
+    KIND_WORK_SETTINGS = 'work_settings'
+    KIND_MANUAL = 'manual'
+    KIND_CHOICES = [
+        (KIND_HOLIDAY, 'Holiday change'),
+        (KIND_WORK_SETTINGS, 'Work settings change'),
+        (KIND_MANUAL, 'Manual'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    parameters = models.JSONField(
+        default=dict,
+        help_text="Scope: dates, start/end/employee_ids or changed work settings fields"
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    scanned_rows = models.PositiveIntegerField(default=0)
+    changed_rows = models.PositiveIntegerField(default=0)
+    error_message = models.TextField(blank=True)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="attendance_recompute_jobs"
+    )
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Attendance Recompute Job"
+        verbose_name_plural = "Attendance Recompute Jobs"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"AttendanceRecomputeJob {self.id} {self.kind} ({self.status})"
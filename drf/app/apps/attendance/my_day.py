@@ -0,0 +1,131 @@
+"""
+Cached "my day" state for the attendance dashboard.
+
+The dashboard used to call ``today`` and ``precheck`` on every load. The
+``my-day`` endpoint returns the same information (today's attendance,
+work hours, check-in/out restrictions, workday and holiday flags) from
+one per-user cache entry, with an ETag so unchanged state costs a 304.
+
+Entries are keyed by user and fingerprinted with the local date, the
+WorkSettings version and the holiday calendar version, so a new day or
+an admin settings/holiday change rebuilds them without explicit
+invalidation. Changes to the user's own attendance (check-in, check-out,
+punch batches, approved corrections) bump a per-user generation token
+after the transaction commits; an entry built under an older token is
+ignored, even if it was written while the change was in flight.
+
+The cache alias (``MY_DAY_CACHE_ALIAS``) must be shared by every web
+worker and by the background workers that change attendance (recompute,
+exports), otherwise an invalidation in one process is invisible to the
+others. The default "shared" alias is a database cache.
+"""
+import hashlib
+import json
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from apps.settings.calendars import get_holiday_calendar, holiday_calendar_version
+from apps.settings.snapshot import get_work_settings
+
+from .absence import local_today
+from .models import Attendance
+
+
+DEFAULT_CACHE_ALIAS = 'shared'
+DEFAULT_CACHE_SECONDS = 10 * 60
+
+MY_DAY_ATTENDANCE_FIELDS = (
+    'id', 'date_local', 'timezone', 'check_in_at_utc', 'check_out_at_utc',
+    'total_work_minutes', 'minutes_late', 'is_holiday', 'within_geofence',
+)
+
+
+def _cache():
+    return caches[getattr(settings, 'MY_DAY_CACHE_ALIAS', DEFAULT_CACHE_ALIAS)]
+
+
+def _entry_key(user_id):
+    return f'attendance:my-day:{user_id}'
+
+
+def _generation_key(user_id):
+    return f'attendance:my-day-gen:{user_id}'
+
+
+def invalidate_my_day(user_ids):
+    """Expire the cached state of ``user_ids`` once the current transaction commits"""
+    user_ids = {user_id for user_id in user_ids if user_id}
+    if not user_ids:
+        return
+
+    def bump():
+        _cache().set_many(
+            {_generation_key(user_id): uuid.uuid4().hex for user_id in user_ids},
+            timeout=None,
+        )
+
+    transaction.on_commit(bump)
+
+
+def build_my_day(user, today, work_settings):
+    """The user's state for ``today`` (no writes)"""
+    from .services import AttendanceService
+
+    attendance = (
+        Attendance.objects.filter(user=user, date_local=today)
+        .order_by('-check_in_at_utc', '-id')
+        .values(*MY_DAY_ATTENDANCE_FIELDS)
+        .first()
+    )
+    check_in_at = attendance['check_in_at_utc'] if attendance else None
+    check_out_at = attendance['check_out_at_utc'] if attendance else None
+    minutes_late = attendance['minutes_late'] if attendance else 0
+    day_status = Attendance.status_for(check_in_at, check_out_at, minutes_late)
+    if attendance:
+        attendance['status'] = day_status
+
+    return {
+        'date': today.isoformat(),
+        'timezone': work_settings.timezone if work_settings else None,
+        'is_workday': work_settings.is_workday(today) if work_settings else True,
+        'is_holiday': get_holiday_calendar().is_holiday(today),
+        'work_hours': work_settings.get_work_hours_for_date(today) if work_settings else None,
+        'time_restrictions': AttendanceService().time_restrictions(),
+        'attendance': attendance,
+        'has_check_in': bool(check_in_at),
+        'has_check_out': bool(check_out_at),
+        'status': day_status,
+    }
+
+
+def get_my_day(user):
+    """Return ``(data, etag)`` for ``user``, from the cache when still valid"""
+    work_settings = get_work_settings()
+    today = local_today(work_settings)
+    fingerprint = (
+        today.isoformat(),
+        work_settings.version if work_settings else None,
+        str(holiday_calendar_version()),
+    )
+
+    cache = _cache()
+    entry_key, generation_key = _entry_key(user.pk), _generation_key(user.pk)
+    cached = cache.get_many([entry_key, generation_key])
+    generation = cached.get(generation_key)
+    entry = cached.get(entry_key)
+    if entry and entry['fingerprint'] == fingerprint and entry['generation'] == generation:
+        return entry['data'], entry['etag']
+
+    data = build_my_day(user, today, work_settings)
+    payload = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True)
+    etag = '"%s"' % hashlib.sha1(payload.encode()).hexdigest()
+    cache.set(
+        entry_key,
+        {'fingerprint': fingerprint, 'generation': generation, 'data': data, 'etag': etag},
+        timeout=getattr(settings, 'MY_DAY_CACHE_SECONDS', DEFAULT_CACHE_SECONDS),
+    )
+    return data, etag
@@ -0,0 +1,102 @@
+"""
+Streaming PDF helpers for attendance exports.
+
+``build_pdf_response`` feeds reportlab's platypus engine from an iterator
+instead of a pre-built list, so flowables are created just before they are
+laid out and dropped right after. Long tables are emitted as a sequence of
+fixed-width chunks (each with its own header row) rather than one huge
+Table, which reportlab would otherwise have to measure and split as a
+whole. The document is spooled to a temporary file and streamed back with
+FileResponse, so worker memory stays roughly flat regardless of row count.
+"""
+import os
+import tempfile
+from itertools import islice
+
+from django.http import FileResponse
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
+
+
+PDF_TABLE_CHUNK_ROWS = 40
+
+SUMMARY_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+DETAIL_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 11),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('FONTSIZE', (0, 1), (-1, -1), 9),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('WORDWRAP', (0, 0), (-1, -1), 'CJK'),  # Enable text wrapping
+    ('LEFTPADDING', (0, 0), (-1, -1), 6),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+    ('TOPPADDING', (0, 0), (-1, -1), 6),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+])
+
+
+class LazyFlowables(list):
+    """
+    List facade over a flowable iterator for ``doc.build``.
+
+    platypus consumes its flowable list from the front and only ever asks
+    for the length / first element, so refilling one item at a time from the
+    source iterator keeps just the current flowable (and any split
+    remainder) alive.
+    """
+
+    def __init__(self, iterable):
+        super().__init__()
+        self._source = iter(iterable)
+
+    def __len__(self):
+        if not super().__len__():
+            for flowable in self._source:
+                self.append(flowable)
+                break
+        return super().__len__()
+
+
+def chunked_tables(header, rows, style, col_widths, chunk_rows=PDF_TABLE_CHUNK_ROWS):
+    """Yield Tables of at most ``chunk_rows`` rows each, repeating ``header`` on every chunk"""
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_rows))
+        if not chunk:
+            return
+        table = Table([header] + chunk, colWidths=col_widths, repeatRows=1)
+        table.setStyle(style)
+        yield table
+
+
+def build_pdf_response(flowables, filename, pagesize=landscape(A4)):
+    """Lay out ``flowables`` (any iterable) into a spooled temp file and return it as a FileResponse"""
+    spool = tempfile.NamedTemporaryFile(prefix='absensi-', suffix='.pdf', delete=False)
+    try:
+        doc = SimpleDocTemplate(spool, pagesize=pagesize, pageCompression=1)
+        doc.build(LazyFlowables(flowables))
+        spool.flush()
+        spool.seek(0)
+    except Exception:
+        spool.close()
+        os.unlink(spool.name)
+        raise
+    # The open handle keeps the data readable; the directory entry is not needed any more
+    os.unlink(spool.name)
+    return FileResponse(spool, as_attachment=True, filename=filename, content_type='application/pdf')
@@ -0,0 +1,302 @@
+"""
+Recompute derived Attendance fields after holidays or work settings change.
+
+``is_holiday``, ``minutes_late``, ``total_work_minutes``, ``overtime_minutes``
+and ``overtime_amount`` are computed when a row is written. A holiday added
+retroactively or a new overtime rate / threshold / Friday schedule leaves
+historical rows stale. ``AttendanceRecomputer`` fixes exactly the rows a
+change can affect:
+
+- a holiday change: the rows on its date(s)
+- a work settings change: the rows whose derived fields depend on the
+  changed settings (see ``settings_change_scope``)
+- a manual range: ``start``..``end``, optionally for some employees
+
+Rows are read in id-ordered chunks with only the columns needed, the new
+values are computed in memory (salaries are read once per chunk and
+overtime pay goes through the payroll engine a chunk at a time), and
+only rows that actually changed are written with one ``bulk_update`` per
+chunk. Monthly rollups and my-day caches of the touched rows are refreshed
+afterwards, since bulk writes bypass the model signals.
+
+Changes are queued as ``AttendanceRecomputeJob`` rows (see signals) and
+run by ``manage.py recompute_attendance``.
+"""
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.core.utils import evaluate_lateness_as_dict
+from apps.overtime.payroll import OvertimePolicy, compute_attendance_overtime, to_cents
+from apps.settings.calendars import get_holiday_calendar
+from apps.settings.snapshot import get_work_settings, mark_caches_stale
+
+from .models import Attendance, AttendanceRecomputeJob
+from .my_day import invalidate_my_day
+from .rollups import refresh_monthly_stats
+
+
+DEFAULT_CHUNK_SIZE = 1000
+ZERO_AMOUNT = Decimal('0.00')
+
+DERIVED_FIELDS = ('is_holiday', 'minutes_late', 'total_work_minutes', 'overtime_minutes', 'overtime_amount')
+LOAD_FIELDS = (
+    'id', 'user_id', 'employee_id', 'date_local', 'timezone',
+    'check_in_at_utc', 'check_out_at_utc',
+) + DERIVED_FIELDS
+
+# Django's week_day lookup: 1 = Sunday ... 6 = Friday
+FRIDAY = 6
+CHECKED_IN = Q(check_in_at_utc__isnull=False)
+WORKED = Q(total_work_minutes__gt=0)
+HAS_OVERTIME = Q(overtime_minutes__gt=0)
+IS_FRIDAY = Q(date_local__week_day=FRIDAY)
+
+# WorkSettings field -> rows whose derived fields depend on it
+SETTINGS_FIELD_SCOPES = {
+    'start_time': CHECKED_IN & ~IS_FRIDAY,
+    'grace_minutes': CHECKED_IN & ~IS_FRIDAY,
+    'friday_start_time': CHECKED_IN & IS_FRIDAY,
+    'friday_grace_minutes': CHECKED_IN & IS_FRIDAY,
+    'required_minutes': WORKED & ~IS_FRIDAY,
+    'friday_required_minutes': WORKED & IS_FRIDAY,
+    'overtime_threshold_minutes': WORKED,
+    'overtime_payment_threshold_minutes': HAS_OVERTIME,
+    'overtime_rate_workday': HAS_OVERTIME & Q(is_holiday=False),
+    'overtime_rate_holiday': HAS_OVERTIME & Q(is_holiday=True),
+}
+RECOMPUTE_SETTINGS_FIELDS = tuple(SETTINGS_FIELD_SCOPES)
+
+
+def dates_scope(dates):
+    return Q(date_local__in=sorted(set(dates)))
+
+
+def range_scope(start=None, end=None, employee_ids=None):
+    scope = Q()
+    if start:
+        scope &= Q(date_local__gte=start)
+    if end:
+        scope &= Q(date_local__lte=end)
+    if employee_ids:
+        scope &= Q(employee_id__in=employee_ids)
+    return scope
+
+
+def settings_change_scope(changed_fields):
+    """Rows affected by a change of the given WorkSettings fields (None if none are)"""
+    scope = None
+    for name in changed_fields:
+        field_scope = SETTINGS_FIELD_SCOPES.get(name)
+        if field_scope is not None:
+            scope = field_scope if scope is None else scope | field_scope
+    return scope
+
+
+def job_scope(job):
+    """The row filter described by an AttendanceRecomputeJob"""
+    params = job.parameters or {}
+    if job.kind == AttendanceRecomputeJob.KIND_HOLIDAY:
+        return dates_scope(date.fromisoformat(d) for d in params.get('dates', []))
+    if job.kind == AttendanceRecomputeJob.KIND_WORK_SETTINGS:
+        return settings_change_scope(params.get('fields', []))
+    return range_scope(
+        date.fromisoformat(params['start']) if params.get('start') else None,
+        date.fromisoformat(params['end']) if params.get('end') else None,
+        params.get('employee_ids'),
+    )
+
+
+@dataclass
+class RecomputeResult:
+    scanned: int = 0
+    changed: int = 0
+    field_changes: dict = field(default_factory=lambda: dict.fromkeys(DERIVED_FIELDS, 0))
+
+
+class AttendanceRecomputer:
+    """Recalculate derived fields for the rows matching a scope"""
+
+    def __init__(self, work_settings=None, holiday_calendar=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.work_settings = work_settings or get_work_settings()
+        self.holiday_calendar = holiday_calendar or get_holiday_calendar()
+        self.chunk_size = chunk_size
+        self.policy = OvertimePolicy.from_work_settings(self.work_settings) if self.work_settings else None
+
+    def recompute(self, scope, dry_run=False, progress=None):
+        """
+        Recompute every row matching ``scope`` (a Q). Returns a RecomputeResult;
+        with ``dry_run`` nothing is written. ``progress(result)`` is called
+        after each chunk.
+        """
+        result = RecomputeResult()
+        if scope is None:
+            return result
+        queryset = Attendance.objects.filter(scope).only(*LOAD_FIELDS).order_by('id')
+        last_id = 0
+        while True:
+            rows = list(queryset.filter(id__gt=last_id)[:self.chunk_size])
+            if not rows:
+                break
+            last_id = rows[-1].id
+            changed = self._recompute_chunk(rows, result)
+            if changed and not dry_run:
+                self._write(changed)
+            if progress:
+                progress(result)
+        return result
+
+    def _recompute_chunk(self, rows, result):
+        salaries = self._salaries(rows)
+        values = [self.derived_values(row) for row in rows]
+        self._add_overtime(rows, values, salaries)
+
+        changed = []
+        for row, row_values in zip(rows, values):
+            result.scanned += 1
+            dirty = False
+            for name, value in row_values.items():
+                if getattr(row, name) != value:
+                    result.field_changes[name] += 1
+                    setattr(row, name, value)
+                    dirty = True
+            if dirty:
+                result.changed += 1
+                changed.append(row)
+        return changed
+
+    def derived_values(self, row):
+        """Holiday flag, lateness and work minutes of ``row`` under the current settings and holidays"""
+        work_settings = self.work_settings
+        minutes_late = row.minutes_late
+        if row.check_in_at_utc and work_settings:
+            try:
+                tz = ZoneInfo(row.timezone or work_settings.timezone)
+            except Exception:
+                tz = ZoneInfo('UTC')
+            work_hours = work_settings.get_work_hours_for_date(row.date_local)
+            minutes_late = evaluate_lateness_as_dict(
+                row.check_in_at_utc.astimezone(tz).time(),
+                work_hours['start_time'],
+                work_hours['grace_minutes']
+            )['minutes_late']
+
+        total_work_minutes = row.total_work_minutes
+        if row.check_in_at_utc and row.check_out_at_utc:
+            duration = row.check_out_at_utc - row.check_in_at_utc
+            total_work_minutes = int(duration.total_seconds() / 60)
+
+        return {
+            'is_holiday': self.holiday_calendar.is_holiday(row.date_local),
+            'minutes_late': minutes_late,
+            'total_work_minutes': total_work_minutes,
+        }
+
+    def _add_overtime(self, rows, values, salaries):
+        """Overtime minutes and amount of the whole chunk in one payroll engine call"""
+        if not self.work_settings:
+            for row_values in values:
+                row_values.update(overtime_minutes=0, overtime_amount=ZERO_AMOUNT)
+            return
+        result = compute_attendance_overtime(
+            self.policy,
+            [row_values['total_work_minutes'] or 0 for row_values in values],
+            [
+                self.work_settings.get_work_hours_for_date(row.date_local)['required_minutes']
+                for row in rows
+            ],
+            [to_cents(salaries.get(row.employee_id or ('user', row.user_id))) for row in rows],
+            [row_values['is_holiday'] for row_values in values],
+        )
+        for row_values, minutes, amount in zip(values, result.overtime_minutes.tolist(), result.amounts()):
+            row_values.update(overtime_minutes=minutes, overtime_amount=amount)
+
+    def _salaries(self, rows):
+        """gaji_pokok keyed by employee id, or ('user', user_id) for rows without an employee"""
+        from apps.employees.models import Employee
+
+        employee_ids = {row.employee_id for row in rows if row.employee_id}
+        orphan_user_ids = {row.user_id for row in rows if not row.employee_id}
+        salaries = {}
+        if not employee_ids and not orphan_user_ids:
+            return salaries
+        employees = Employee.objects.filter(
+            Q(id__in=employee_ids) | Q(user_id__in=orphan_user_ids)
+        ).values_list('id', 'user_id', 'gaji_pokok')
+        for employee_id, user_id, gaji_pokok in employees:
+            salaries[employee_id] = gaji_pokok
+            if user_id in orphan_user_ids:
+                salaries[('user', user_id)] = gaji_pokok
+        return salaries
+
+    def _write(self, rows):
+        now = timezone.now()
+        for row in rows:
+            row.updated_at = now
+        with transaction.atomic():
+            Attendance.objects.bulk_update(rows, DERIVED_FIELDS + ('updated_at',))
+            # bulk_update bypasses the post_save rollup and my-day signals
+            refresh_monthly_stats(row.rollup_key for row in rows)
+            invalidate_my_day({row.user_id for row in rows})
+
+
+def enqueue_recompute(kind, parameters, requested_by=None):
+    """Queue a recompute job once the current transaction commits"""
+    def create():
+        AttendanceRecomputeJob.objects.create(
+            kind=kind,
+            parameters=parameters,
+            requested_by=requested_by,
+        )
+
+    transaction.on_commit(create)
+
+
+def claim_recompute_job():
+    """Move the oldest pending job to processing; returns it or None"""
+    for job_id in (
+        AttendanceRecomputeJob.objects.filter(status='pending')
+        .order_by('created_at', 'id')
+        .values_list('id', flat=True)[:5]
+    ):
+        now = timezone.now()
+        claimed = AttendanceRecomputeJob.objects.filter(id=job_id, status='pending').update(
+            status='processing', started_at=now, updated_at=now,
+        )
+        if claimed:
+            return AttendanceRecomputeJob.objects.get(id=job_id)
+    return None
+
+
+def run_recompute_job(job, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """Run a claimed job and record its outcome. Returns the RecomputeResult (None on failure)."""
+    # Pick up the settings/holidays the job was queued for
+    mark_caches_stale()
+
+    def record(result):
+        AttendanceRecomputeJob.objects.filter(id=job.id).update(
+            scanned_rows=result.scanned, changed_rows=result.changed,
+        )
+        if progress:
+            progress(result)
+
+    try:
+        result = AttendanceRecomputer(chunk_size=chunk_size).recompute(job_scope(job), progress=record)
+    except Exception as e:
+        job.status = 'failed'
+        job.error_message = str(e)
+        job.completed_at = timezone.now()
+        job.save(update_fields=['status', 'error_message', 'completed_at', 'updated_at'])
+        return None
+
+    job.status = 'completed'
+    job.scanned_rows = result.scanned
+    job.changed_rows = result.changed
+    job.completed_at = timezone.now()
+    job.save(update_fields=['status', 'scanned_rows', 'changed_rows', 'completed_at', 'updated_at'])
+    return result
@@ -0,0 +1,382 @@
+"""
+Attendance PDF reports.
+
+Each report is a function of the requesting user's Principal and the query
+parameters. The ``export_pdf`` / ``team_attendance_pdf`` actions call it
+with ``request.principal`` and ``request.query_params``; the export worker
+(apps.reporting.exports) calls the same function with the job's user and
+stored parameters. Validation errors come back as 400 Responses.
+"""
+from calendar import monthrange
+from datetime import date, datetime, timedelta
+
+import pytz
+from django.db import models
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.platypus import Paragraph, Spacer, Table
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.response import Response
+
+from apps.settings.snapshot import get_work_settings
+from .absence import AbsenceEngine, AbsenceReport, local_today
+from .models import Attendance
+from .pdf import DETAIL_TABLE_STYLE, SUMMARY_TABLE_STYLE, build_pdf_response, chunked_tables
+from .rollups import stat_aggregates
+from .services import TeamAttendanceService
+
+
+def format_work_hours(minutes, use_indonesian=True):
+    """Format work hours from minutes to readable format"""
+    if not minutes or minutes <= 0:
+        return "0m"
+    
+    hours = minutes // 60
+    mins = minutes % 60
+    
+    if use_indonesian:
+        if hours > 0 and mins > 0:
+            return f"{hours}j {mins}m"
+        elif hours > 0:
+            return f"{hours}j"
+        else:
+            return f"{mins}m"
+    else:
+        if hours > 0 and mins > 0:
+            return f"{hours}h {mins}m"
+        elif hours > 0:
+            return f"{hours}h"
+        else:
+            return f"{mins}m"
+
+
+def attendance_report_pdf(principal, params, object_id=None):
+    """PDF report of the user's own attendance (``start_date``/``end_date`` or ``month``)"""
+    user = principal.user
+
+    # Get query parameters
+    start_date = params.get('start_date')
+    end_date = params.get('end_date')
+    month = params.get('month')
+
+    # Get work settings for timezone
+    work_settings = get_work_settings()
+    if work_settings and work_settings.timezone:
+        try:
+            work_tz = pytz.timezone(work_settings.timezone)
+        except pytz.exceptions.UnknownTimeZoneError:
+            work_tz = pytz.UTC
+    else:
+        work_tz = pytz.UTC
+
+    # Validate date formats
+    if start_date:
+        try:
+            start_dt = datetime.strptime(start_date, '%Y-%m-%d')
+        except ValueError:
+            return Response({"detail": "Format tanggal mulai tidak valid. Gunakan YYYY-MM-DD"}, status=400)
+
+    if end_date:
+        try:
+            end_dt = datetime.strptime(end_date, '%Y-%m-%d')
+        except ValueError:
+            return Response({"detail": "Format tanggal akhir tidak valid. Gunakan YYYY-MM-DD"}, status=400)
+
+    # Validate that end_date is not before start_date
+    if start_date and end_date:
+        if end_dt < start_dt:
+            return Response({"detail": "tanggal_akhir tidak boleh sebelum tanggal_mulai"}, status=400)
+
+    # Build attendance queryset
+    attendance_qs = Attendance.objects.filter(user=user)
+
+    # Apply date filters
+    # Priority: month filter overrides date range filters
+    if month:
+        try:
+            year, month_num = (int(part) for part in month.split('-'))
+            period_start = date(year, month_num, 1)
+            period_end = date(year, month_num, monthrange(year, month_num)[1])
+        except ValueError:
+            return Response({"detail": "format_bulan_tidak_valid_gunakan_yyyy_mm"}, status=400)
+        attendance_qs = attendance_qs.filter(date_local__range=[period_start, period_end])
+    else:
+        # Apply date range filters (can be partial - just start or just end)
+        if start_date:
+            attendance_qs = attendance_qs.filter(date_local__gte=start_date)
+        if end_date:
+            attendance_qs = attendance_qs.filter(date_local__lte=end_date)
+
+    # Calculate statistics in one aggregate query
+    stats = attendance_qs.aggregate(first_day=models.Min('date_local'), **stat_aggregates())
+    total_days = stats['record_days']
+    present_days = stats['present_days']
+    late_days = stats['late_days']
+    total_late_minutes = stats['total_late_minutes']
+    total_work_minutes = stats['total_work_minutes']
+
+    # Absent days come from the work calendar, so days without any row count too
+    if not month:
+        period_start = start_dt.date() if start_date else stats['first_day']
+        period_end = end_dt.date() if end_date else local_today(work_settings)
+    employee_profile = getattr(user, 'employee_profile', None)
+    if period_start and period_start <= period_end:
+        absence = AbsenceEngine(period_start, period_end).for_attendances(
+            attendance_qs, first_day=employee_profile.tmt_kerja if employee_profile else None
+        )
+    else:
+        absence = AbsenceReport()
+    absent_days = absence.absent_days
+
+    # Get styles
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=18,
+        spaceAfter=30,
+        alignment=1  # Center alignment
+    )
+
+    # Employee Info
+    try:
+        employee = user.employee_profile
+        # Get full name from user
+        full_name = f"{user.first_name} {user.last_name}".strip()
+        if not full_name:
+            full_name = user.username
+        if not full_name:
+            full_name = user.email
+
+        employee_info = f"""
+        <b>Nama:</b> {full_name}<br/>
+        <b>Username:</b> {user.username}<br/>
+        <b>NIP:</b> {employee.nip if employee else 'N/A'}<br/>
+        <b>Divisi:</b> {employee.division.name if employee and employee.division else 'N/A'}<br/>
+        <b>Jabatan:</b> {employee.position.name if employee and employee.position else 'N/A'}<br/>
+        <b>Periode:</b> {start_date or 'Semua'} - {end_date or 'Semua'}
+        """
+        if month:
+            employee_info += f"<br/><b>Bulan:</b> {month}"
+    except:
+        # Fallback with username
+        employee_info = f"<b>Nama:</b> {user.username}<br/><b>Periode:</b> {start_date or 'Semua'} - {end_date or 'Semua'}"
+
+    def record_rows():
+        """Detail rows streamed from the database, newest first"""
+        rows = attendance_qs.order_by('-date_local').values_list(
+            'date_local', 'check_in_at_utc', 'check_out_at_utc', 'minutes_late',
+            'total_work_minutes', 'is_holiday'
+        ).iterator(chunk_size=2000)
+        for date_local, check_in_at, check_out_at, minutes_late, work_minutes, is_holiday in rows:
+            # Determine status
+            if is_holiday:
+                status_label = 'Hari Libur'
+            elif minutes_late > 0:
+                status_label = f'Terlambat {minutes_late}m'
+            elif check_in_at and check_out_at:
+                status_label = 'Hadir Lengkap'
+            elif check_in_at:
+                status_label = 'Hanya Check-in'
+            else:
+                status_label = 'Tidak Hadir'
+
+            yield [
+                date_local.strftime('%d/%m/%Y'),
+                status_label,
+                # Format times with timezone conversion
+                check_in_at.replace(tzinfo=pytz.UTC).astimezone(work_tz).strftime('%H:%M') if check_in_at else '-',
+                check_out_at.replace(tzinfo=pytz.UTC).astimezone(work_tz).strftime('%H:%M') if check_out_at else '-',
+                f"{minutes_late}m" if minutes_late > 0 else '-',
+                format_work_hours(work_minutes)
+            ]
+
+    current_time = datetime.now(work_tz)
+
+    def flowables():
+        # Title
+        yield Paragraph("Laporan Absensi Pegawai", title_style)
+        yield Paragraph(employee_info, styles['Normal'])
+        yield Spacer(1, 20)
+
+        # Summary Statistics
+        yield Paragraph("Ringkasan Statistik", styles['Heading2'])
+        yield Spacer(1, 10)
+        summary_table = Table([
+            ['Total Hari', 'Hadir', 'Terlambat', 'Tidak Hadir', 'Tingkat Kehadiran'],
+            [
+                str(total_days),
+                str(present_days),
+                str(late_days),
+                str(absent_days),
+                f"{round(absence.attendance_rate, 2)}%"
+            ]
+        ])
+        summary_table.setStyle(SUMMARY_TABLE_STYLE)
+        yield summary_table
+        yield Spacer(1, 20)
+
+        # Work Hours Summary
+        yield Paragraph("Ringkasan Jam Kerja", styles['Heading2'])
+        yield Spacer(1, 10)
+        work_hours_table = Table([
+            ['Total Jam Kerja', 'Total Keterlambatan', 'Rata-rata Jam Kerja/Hari'],
+            [
+                format_work_hours(total_work_minutes),
+                format_work_hours(total_late_minutes),
+                format_work_hours(total_work_minutes / present_days) if present_days > 0 else '0m'
+            ]
+        ])
+        work_hours_table.setStyle(SUMMARY_TABLE_STYLE)
+        yield work_hours_table
+        yield Spacer(1, 20)
+
+        # Detailed Records (all of them, streamed in chunks)
+        if total_days:
+            yield Paragraph("Detail Absensi", styles['Heading2'])
+            yield Spacer(1, 10)
+            yield from chunked_tables(
+                ['Tanggal', 'Status', 'Check-in', 'Check-out', 'Terlambat', 'Jam Kerja'],
+                record_rows(),
+                DETAIL_TABLE_STYLE,
+                col_widths=[100, 170, 90, 90, 90, 100],
+            )
+
+        # Footer - Use work timezone
+        yield Spacer(1, 30)
+        yield Paragraph(f"<i>Dibuat pada: {current_time.strftime('%d/%m/%Y %H:%M:%S')}</i>", styles['Normal'])
+
+    return build_pdf_response(
+        flowables(),
+        f'attendance-report-{current_time.strftime("%Y%m%d-%H%M%S")}.pdf'
+    )
+
+
+def team_attendance_report_pdf(principal, params, object_id=None):
+    """PDF report of the supervisor's division (``start_date``, ``end_date``, ``employee_id``)"""
+    # Same rule as IsSupervisor, for callers that did not go through the view
+    if not (principal.is_supervisor or principal.capabilities.get('approval_level', 0) > 0):
+        raise PermissionDenied("Akses ditolak. Hanya supervisor yang dapat membuat laporan tim.")
+
+    # Get query parameters
+    start_date = params.get('start_date')
+    end_date = params.get('end_date')
+    employee_id = params.get('employee_id')
+
+    # Set default date range if not provided
+    if not end_date:
+        end_date = date.today()
+    else:
+        end_date = date.fromisoformat(end_date)
+
+    if not start_date:
+        start_date = end_date - timedelta(days=30)
+    else:
+        start_date = date.fromisoformat(start_date)
+
+    # Get supervisor's division
+    if not principal.division:
+        return Response({"error": "Supervisor harus memiliki divisi yang ditugaskan"}, status=400)
+
+    division = principal.division
+
+    # Same engine as team_attendance; the PDF does not need the recent rows
+    team = TeamAttendanceService().get_team_attendance(
+        division, start_date, end_date, employee_id=employee_id, recent_limit=0
+    )
+
+    # Get work settings for timezone
+    work_settings = get_work_settings()
+    if work_settings and work_settings.timezone:
+        try:
+            work_tz = pytz.timezone(work_settings.timezone)
+        except pytz.exceptions.UnknownTimeZoneError:
+            work_tz = pytz.UTC
+    else:
+        work_tz = pytz.UTC
+
+    # Get styles
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=18,
+        spaceAfter=30,
+        alignment=1  # Center alignment
+    )
+
+    # Supervisor Info - Use employee profile fullname if available
+    supervisor = principal.employee
+    supervisor_name = supervisor.fullname if supervisor and supervisor.fullname else f"{principal.user.first_name} {principal.user.last_name}".strip()
+    if not supervisor_name:
+        supervisor_name = principal.user.username
+
+    supervisor_info = f"""
+    <b>Supervisor:</b> {supervisor_name}<br/>
+    <b>Divisi:</b> {division.name}<br/>
+    <b>Periode:</b> {start_date.strftime('%d/%m/%Y')} - {end_date.strftime('%d/%m/%Y')}<br/>
+    <b>Total Anggota Tim:</b> {len(team)}
+    """
+
+    # Team Summary Statistics
+    total_team_days = sum(item['summary']['total_days'] for item in team)
+    total_team_present = sum(item['summary']['present_days'] for item in team)
+    total_team_late = sum(item['summary']['late_days'] for item in team)
+    total_team_expected = sum(item['summary']['expected_work_days'] for item in team)
+    total_team_absent = sum(item['summary']['absent_days'] for item in team)
+
+    def member_rows():
+        for item in team:
+            summary = item['summary']
+            yield [
+                item['employee'].fullname,
+                str(summary['total_days']),
+                str(summary['present_days']),
+                str(summary['late_days']),
+                str(summary['absent_days']),
+                f"{round(summary['attendance_rate'], 2)}%"
+            ]
+
+    current_time = datetime.now(work_tz)
+
+    def flowables():
+        # Title
+        yield Paragraph("Laporan Absensi Tim", title_style)
+        yield Paragraph(supervisor_info, styles['Normal'])
+        yield Spacer(1, 20)
+
+        # Team Summary
+        yield Paragraph("Ringkasan Tim", styles['Heading2'])
+        yield Spacer(1, 10)
+        team_summary_table = Table([
+            ['Total Hari', 'Total Hadir', 'Total Terlambat', 'Total Tidak Hadir', 'Rata-rata Kehadiran (%)'],
+            [
+                str(total_team_days),
+                str(total_team_present),
+                str(total_team_late),
+                str(total_team_absent),
+                f"{round(((total_team_expected - total_team_absent) / total_team_expected * 100) if total_team_expected > 0 else 0, 2)}%"
+            ]
+        ])
+        team_summary_table.setStyle(SUMMARY_TABLE_STYLE)
+        yield team_summary_table
+        yield Spacer(1, 20)
+
+        # Individual Employee Details
+        if team:
+            yield Paragraph("Detail Per Anggota Tim", styles['Heading2'])
+            yield Spacer(1, 10)
+            yield from chunked_tables(
+                ['Nama', 'Total Hari', 'Hadir', 'Terlambat', 'Tidak Hadir', 'Rate (%)'],
+                member_rows(),
+                DETAIL_TABLE_STYLE,
+                col_widths=[240, 80, 80, 90, 90, 80],
+            )
+
+        # Footer - Use work timezone
+        yield Spacer(1, 30)
+        yield Paragraph(f"<i>Dibuat pada: {current_time.strftime('%d/%m/%Y %H:%M:%S')}</i>", styles['Normal'])
+
+    return build_pdf_response(
+        flowables(),
+        f'supervisor-team-attendance-{current_time.strftime("%Y%m%d-%H%M%S")}.pdf'
+    )
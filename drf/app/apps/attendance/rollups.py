@@ -0,0 +1,239 @@
+"""
+Monthly attendance rollups (AttendanceMonthlyStat).
+
+A bucket is keyed by (employee, year, month). When a single Attendance
+row is saved or deleted, the difference between its contribution as
+loaded and as saved is added to its bucket with one ``UPDATE ... SET
+field = field + delta`` (``apply_row_change``). A bucket is recomputed
+from the month's rows (at most ~31) instead when it does not exist yet or
+when the row's loaded values are unknown (deferred fields, an unsaved
+instance reusing a pk). Bulk write paths refresh their buckets with
+``refresh_monthly_stats``, and ``rebuild_attendance_monthly_stats``
+rebuilds the table from scratch.
+
+Readers combine whole months from the rollup with a grouped aggregate
+over the partial months at the edges of the requested range.
+"""
+from calendar import monthrange
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce, ExtractMonth, ExtractYear
+from django.utils import timezone
+
+from .models import Attendance, AttendanceMonthlyStat
+
+
+STAT_FIELDS = (
+    'record_days', 'present_days', 'check_out_days', 'late_days', 'holiday_days',
+    'total_work_minutes', 'total_overtime_minutes', 'total_overtime_amount', 'total_late_minutes',
+)
+
+# Attendance columns a row's contribution to its bucket is computed from
+CONTRIBUTION_SOURCE_FIELDS = (
+    'employee_id', 'date_local', 'check_in_at_utc', 'check_out_at_utc', 'minutes_late',
+    'is_holiday', 'total_work_minutes', 'overtime_minutes', 'overtime_amount',
+)
+
+
+def stat_aggregates():
+    """Aggregate expressions producing every rollup field from Attendance rows"""
+    return {
+        'record_days': Count('id'),
+        'present_days': Count('id', filter=Q(check_in_at_utc__isnull=False)),
+        'check_out_days': Count('id', filter=Q(check_out_at_utc__isnull=False)),
+        'late_days': Count('id', filter=Q(minutes_late__gt=0)),
+        'holiday_days': Count('id', filter=Q(is_holiday=True)),
+        'total_work_minutes': Coalesce(Sum('total_work_minutes'), 0),
+        'total_overtime_minutes': Coalesce(Sum('overtime_minutes'), 0),
+        'total_overtime_amount': Coalesce(Sum('overtime_amount'), Decimal('0')),
+        'total_late_minutes': Coalesce(Sum('minutes_late', filter=Q(minutes_late__gt=0)), 0),
+    }
+
+
+def empty_totals():
+    totals = dict.fromkeys(STAT_FIELDS, 0)
+    totals['total_overtime_amount'] = Decimal('0')
+    return totals
+
+
+def refresh_monthly_stat(employee_id, year, month):
+    """Recompute one (employee, year, month) bucket from its Attendance rows"""
+    values = Attendance.objects.filter(
+        employee_id=employee_id,
+        date_local__year=year,
+        date_local__month=month,
+    ).aggregate(**stat_aggregates())
+    if not values['record_days']:
+        AttendanceMonthlyStat.objects.filter(employee_id=employee_id, year=year, month=month).delete()
+        return None
+    stat, _ = AttendanceMonthlyStat.objects.update_or_create(
+        employee_id=employee_id, year=year, month=month, defaults=values
+    )
+    return stat
+
+
+def row_contribution(attendance):
+    """What one Attendance row adds to its bucket (the per-row form of stat_aggregates)"""
+    minutes_late = attendance.minutes_late or 0
+    return {
+        'record_days': 1,
+        'present_days': int(attendance.check_in_at_utc is not None),
+        'check_out_days': int(attendance.check_out_at_utc is not None),
+        'late_days': int(minutes_late > 0),
+        'holiday_days': int(bool(attendance.is_holiday)),
+        'total_work_minutes': attendance.total_work_minutes or 0,
+        'total_overtime_minutes': attendance.overtime_minutes or 0,
+        'total_overtime_amount': Decimal(str(attendance.overtime_amount or 0)),
+        'total_late_minutes': max(minutes_late, 0),
+    }
+
+
+def rollup_state(attendance):
+    """(bucket key, contribution) of ``attendance`` as it is now"""
+    return attendance.rollup_key, row_contribution(attendance)
+
+
+def apply_stat_delta(key, delta):
+    """Add ``delta`` ({field: change}) to bucket ``key``; recompute it if it does not exist"""
+    if key is None:
+        return
+    changes = {field: F(field) + value for field, value in delta.items() if value}
+    if not changes:
+        return
+    employee_id, year, month = key
+    buckets = AttendanceMonthlyStat.objects.filter(employee_id=employee_id, year=year, month=month)
+    if not buckets.update(updated_at=timezone.now(), **changes):
+        # First row of the month (or a bucket lost to a rebuild): build it from the rows
+        refresh_monthly_stat(*key)
+    elif delta.get('record_days', 0) < 0:
+        buckets.filter(record_days__lte=0).delete()
+
+
+def apply_row_change(previous, current):
+    """
+    Move one row's contribution from ``previous`` to ``current`` (both
+    ``(key, contribution)`` from rollup_state, or None for "not counted").
+    """
+    if previous and current and previous[0] == current[0]:
+        apply_stat_delta(current[0], {
+            field: current[1][field] - previous[1][field] for field in STAT_FIELDS
+        })
+        return
+    if previous:
+        apply_stat_delta(previous[0], {field: -value for field, value in previous[1].items()})
+    if current:
+        apply_stat_delta(current[0], current[1])
+
+
+def refresh_monthly_stats(keys):
+    """Refresh several buckets; ``keys`` is an iterable of (employee_id, year, month) or None"""
+    for key in {k for k in keys if k}:
+        refresh_monthly_stat(*key)
+
+
+def rebuild_monthly_stats(employee_ids=None, year=None):
+    """
+    Rebuild the rollup from scratch with one grouped query.
+    Returns the number of buckets written.
+    """
+    attendances = Attendance.objects.filter(employee__isnull=False)
+    stats = AttendanceMonthlyStat.objects.all()
+    if employee_ids is not None:
+        attendances = attendances.filter(employee_id__in=employee_ids)
+        stats = stats.filter(employee_id__in=employee_ids)
+    if year is not None:
+        attendances = attendances.filter(date_local__year=year)
+        stats = stats.filter(year=year)
+
+    rows = (
+        attendances
+        .annotate(stat_year=ExtractYear('date_local'), stat_month=ExtractMonth('date_local'))
+        .values('employee_id', 'stat_year', 'stat_month')
+        .annotate(**stat_aggregates())
+        .order_by()
+    )
+    buckets = [
+        AttendanceMonthlyStat(
+            employee_id=row['employee_id'],
+            year=row['stat_year'],
+            month=row['stat_month'],
+            **{field: row[field] for field in STAT_FIELDS}
+        )
+        for row in rows
+    ]
+    stats.delete()
+    AttendanceMonthlyStat.objects.bulk_create(buckets, batch_size=1000)
+    return len(buckets)
+
+
+def _split_range(start, end):
+    """
+    Split [start, end] into whole (year, month) pairs and the partial
+    date ranges left at either edge.
+    """
+    months = []
+    partial = []
+    cursor = start
+    while cursor <= end:
+        month_end = date(cursor.year, cursor.month, monthrange(cursor.year, cursor.month)[1])
+        if cursor.day == 1 and month_end <= end:
+            months.append((cursor.year, cursor.month))
+        else:
+            partial.append((cursor, min(month_end, end)))
+        cursor = month_end + timedelta(days=1)
+    return months, partial
+
+
+def monthly_totals(employee_ids, start, end):
+    """
+    Attendance totals per employee for [start, end].
+
+    Whole months are summed from AttendanceMonthlyStat; partial months at the
+    edges are aggregated from Attendance in one grouped query. Returns
+    ``{employee_id: totals}`` with every id in ``employee_ids`` present.
+    """
+    employee_ids = list(employee_ids)
+    result = {employee_id: empty_totals() for employee_id in employee_ids}
+    if not employee_ids or end < start:
+        return result
+
+    months, partial = _split_range(start, end)
+
+    if months:
+        month_filter = Q()
+        years = {}
+        for year, month in months:
+            years.setdefault(year, []).append(month)
+        for year, month_list in years.items():
+            month_filter |= Q(year=year, month__in=month_list)
+        stat_rows = (
+            AttendanceMonthlyStat.objects
+            .filter(month_filter, employee_id__in=employee_ids)
+            .values('employee_id')
+            .annotate(**{field: Sum(field) for field in STAT_FIELDS})
+            .order_by()
+        )
+        for row in stat_rows:
+            totals = result[row['employee_id']]
+            for field in STAT_FIELDS:
+                totals[field] += row[field] or 0
+
+    if partial:
+        range_filter = Q()
+        for range_start, range_end in partial:
+            range_filter |= Q(date_local__range=[range_start, range_end])
+        raw_rows = (
+            Attendance.objects
+            .filter(range_filter, employee_id__in=employee_ids)
+            .values('employee_id')
+            .annotate(**stat_aggregates())
+            .order_by()
+        )
+        for row in raw_rows:
+            totals = result[row['employee_id']]
+            for field in STAT_FIELDS:
+                totals[field] += row[field] or 0
+
+    return result
@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from .models import Attendance
+from .models import Attendance, AttendancePunch
 from apps.employees.serializers import EmployeeSerializer, DivisionSerializer
 from apps.settings.serializers import WorkSettingsSerializer
 
@@ -32,7 +32,7 @@ class AttendanceAdminSerializer(AttendanceSerializer):
     """Admin attendance serializer with full access"""
     class Meta(AttendanceSerializer.Meta):
         fields = AttendanceSerializer.Meta.fields + [
-            "check_in_lat", "check_in_lng", "check_in_accuracy_m", "check_in_ip",
+            "check_in_lat", "check_in_lng", "check_in_accuracy_m", "check_in_ip", "check_in_office",
             "check_out_lat", "check_out_lng", "check_out_accuracy_m", "check_out_ip",
             "overtime_minutes", "overtime_amount", "overtime_approved", 
             "overtime_approved_by", "overtime_approved_at", "note", "employee_note",
@@ -44,7 +44,7 @@ class AttendanceSupervisorSerializer(AttendanceSerializer):
     """Supervisor attendance serializer with limited access"""
     class Meta(AttendanceSerializer.Meta):
         fields = AttendanceSerializer.Meta.fields + [
-            "check_in_lat", "check_in_lng", "check_in_accuracy_m", "check_in_ip",
+            "check_in_lat", "check_in_lng", "check_in_accuracy_m", "check_in_ip", "check_in_office",
             "check_out_lat", "check_out_lng", "check_out_accuracy_m", "check_out_ip",
             "overtime_minutes", "overtime_amount", "overtime_approved", 
             "overtime_approved_by", "overtime_approved_at", "note", "employee_note"
@@ -111,6 +111,54 @@ class AttendanceCheckOutSerializer(serializers.Serializer):
     note = serializers.CharField(max_length=200, required=False)
 
 
+class PunchSerializer(serializers.Serializer):
+    """
+    One timestamped punch inside a batch.
+    
+    ``timezone`` is accepted for older clients only; the work day and
+    lateness are evaluated in the WorkSettings timezone. How far back a
+    punch may go depends on the submitter (see PunchBatchService).
+    """
+    idempotency_key = serializers.CharField(max_length=64)
+    kind = serializers.ChoiceField(choices=AttendancePunch.KIND_CHOICES)
+    timestamp = serializers.DateTimeField()
+    user_id = serializers.IntegerField(required=False)
+    latitude = serializers.DecimalField(max_digits=10, decimal_places=7, required=False, allow_null=True)
+    longitude = serializers.DecimalField(max_digits=10, decimal_places=7, required=False, allow_null=True)
+    accuracy = serializers.IntegerField(required=False, allow_null=True)
+    timezone = serializers.CharField(max_length=64, default="Asia/Dubai")
+
+    def validate_timestamp(self, value):
+        """Reject punches from the future (allowing for small clock drift)"""
+        from django.utils import timezone as dj_timezone
+        from datetime import timedelta
+        if value > dj_timezone.now() + timedelta(minutes=5):
+            raise serializers.ValidationError("Timestamp cannot be in the future")
+        return value
+
+    def validate_timezone(self, value):
+        """Validate timezone name"""
+        from zoneinfo import ZoneInfo
+        try:
+            ZoneInfo(value)
+        except Exception:
+            raise serializers.ValidationError("Unknown timezone")
+        return value
+
+
+class PunchBatchSerializer(serializers.Serializer):
+    """Serializer for batch punch ingestion"""
+    MAX_PUNCHES = 500
+
+    punches = PunchSerializer(many=True, allow_empty=False)
+
+    def validate_punches(self, value):
+        """Validate batch size"""
+        if len(value) > self.MAX_PUNCHES:
+            raise serializers.ValidationError(f"A batch can contain at most {self.MAX_PUNCHES} punches")
+        return value
+
+
 class AttendancePrecheckSerializer(serializers.Serializer):
     """Serializer for attendance precheck"""
     date = serializers.DateField(required=False)
@@ -131,6 +179,7 @@ class AttendanceReportSerializer(serializers.Serializer):
     employee_id = serializers.IntegerField(required=False)
     division_id = serializers.IntegerField(required=False)
     include_overtime = serializers.BooleanField(default=True)
+    include_details = serializers.BooleanField(default=True)
     format = serializers.ChoiceField(choices=['json', 'pdf'], default='json')
     
     def validate(self, data):
@@ -1,19 +1,37 @@
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from zoneinfo import ZoneInfo
-from datetime import date, datetime, timedelta
-from .models import Attendance
-from apps.settings.models import WorkSettings
-from apps.core.utils import haversine_meters, evaluate_lateness_as_dict
+from calendar import monthrange
+from datetime import date, timedelta
+from .absence import AbsenceEngine
+from .models import Attendance, AttendancePunch
+from .my_day import invalidate_my_day
+from .rollups import monthly_totals, refresh_monthly_stats, stat_aggregates
+from apps.settings.calendars import get_holiday_calendar, get_work_calendar
+from apps.settings.snapshot import get_work_settings
+from apps.settings.geofence import locate_office
+from apps.core.utils import evaluate_lateness_as_dict
 
 User = get_user_model()
 
+# InnoDB error raised when two transactions' gap locks deadlock
+MYSQL_DEADLOCK = 1213
+
+
+def is_deadlock(error):
+    """Whether a database error is an InnoDB deadlock (the transaction was rolled back)"""
+    return isinstance(error, OperationalError) and bool(error.args) and error.args[0] == MYSQL_DEADLOCK
+
 
 class AttendanceService:
     """Service class for attendance business logic"""
     
     def __init__(self):
-        self.work_settings = WorkSettings.objects.first()
+        self.work_settings = get_work_settings()
     
     def process_check_in(self, user, data):
         """Process employee check-in"""
@@ -37,63 +55,40 @@ class AttendanceService:
                         'error': f'Check-in tidak diizinkan sebelum jam {self.work_settings.earliest_check_in_time.strftime("%H:%M")}. Silakan coba lagi setelah jam tersebut.'
                     }
             
-            # Check if attendance already exists for today
-            attendance, created = Attendance.objects.get_or_create(
-                user=user,
-                date_local=current_date,
-                defaults={
-                    'timezone': timezone_name,
-                    'check_in_at_utc': timezone.now(),
-                    'check_in_lat': lat,
-                    'check_in_lng': lng,
-                    'check_in_accuracy_m': accuracy,
-                    'check_in_ip': ip_address,
-                }
-            )
-            
-            if not created:
-                # Update existing attendance
-                attendance.check_in_at_utc = timezone.now()
-                attendance.check_in_lat = lat
-                attendance.check_in_lng = lng
-                attendance.check_in_accuracy_m = accuracy
-                attendance.check_in_ip = ip_address
-                attendance.save()
-            
-            # Ensure attendance is linked to employee profile for salary-based calculations
-            try:
-                if not attendance.employee and hasattr(user, 'employee_profile') and user.employee_profile:
-                    attendance.employee = user.employee_profile
-                    attendance.save()
-            except Exception:
-                # If employee profile is missing or cannot be set, proceed without failing
-                pass
-
-            # Check geofence
-            within_geofence = self._check_geofence(lat, lng)
-            attendance.within_geofence = within_geofence
-            
-            # Calculate lateness
+            # Compute every derived field up front so the punch is a single write
+            now_utc = timezone.now()
+            geofence = self._check_geofence(lat, lng)
+            within_geofence = geofence.within_geofence
+            minutes_late = None
             if self.work_settings:
                 work_hours = self.work_settings.get_work_hours_for_date(current_date)
-                start_time = work_hours['start_time']
-                grace_minutes = work_hours['grace_minutes']
-                
                 lateness_info = evaluate_lateness_as_dict(
                     current_time.time(), 
-                    start_time, 
-                    grace_minutes
+                    work_hours['start_time'], 
+                    work_hours['grace_minutes']
                 )
-                
-                attendance.minutes_late = lateness_info['minutes_late']
+                minutes_late = lateness_info['minutes_late']
+            
+            fields = {
+                'check_in_at_utc': now_utc,
+                'check_in_lat': lat,
+                'check_in_lng': lng,
+                'check_in_accuracy_m': accuracy,
+                'check_in_ip': ip_address,
+                'within_geofence': within_geofence,
+                'check_in_office_id': geofence.office_id,
+            }
+            if minutes_late is not None:
+                fields['minutes_late'] = minutes_late
             
-            attendance.save()
+            attendance = self._upsert_attendance(user, current_date, timezone_name, fields)
             
             return {
                 'success': True,
                 'attendance_id': attendance.id,
                 'check_in_time': current_time.isoformat(),
                 'within_geofence': within_geofence,
+                'office': geofence.office.name if geofence.office else None,
                 'minutes_late': attendance.minutes_late,
                 'status': attendance.status
             }
@@ -126,46 +121,54 @@ class AttendanceService:
                         'error': f'Check-out tidak diizinkan setelah jam {self.work_settings.latest_check_out_time.strftime("%H:%M")}. Silakan hubungi admin untuk bantuan.'
                     }
             
-            # Get today's attendance
-            try:
-                attendance = Attendance.objects.get(
-                    user=user,
-                    date_local=current_date
-                )
-            except Attendance.DoesNotExist:
-                return {
-                    'success': False,
-                    'error': 'No check-in record found for today'
-                }
-            
-            # Ensure attendance is linked to employee profile for salary-based calculations
-            try:
-                if not attendance.employee and hasattr(user, 'employee_profile') and user.employee_profile:
-                    attendance.employee = user.employee_profile
-                    attendance.save()
-            except Exception:
-                # If employee profile is missing or cannot be set, proceed without failing
-                pass
+            employee = self._resolve_employee(user)
             
-            # Update check-out
-            attendance.check_out_at_utc = timezone.now()
-            attendance.check_out_lat = lat
-            attendance.check_out_lng = lng
-            attendance.check_out_accuracy_m = accuracy
-            attendance.check_out_ip = ip_address
-            
-            # Calculate work minutes
-            if attendance.check_in_at_utc:
-                duration = attendance.check_out_at_utc - attendance.check_in_at_utc
-                attendance.total_work_minutes = int(duration.total_seconds() / 60)
-            
-            # Calculate overtime
-            if self.work_settings and attendance.total_work_minutes:
-                overtime_minutes, overtime_amount = attendance.calculate_overtime()
-                attendance.overtime_minutes = overtime_minutes
-                attendance.overtime_amount = overtime_amount
-            
-            attendance.save()
+            with transaction.atomic():
+                # Lock today's row so concurrent punches for the same user serialize
+                attendance = (
+                    Attendance.objects.select_for_update()
+                    .select_related('employee')
+                    .filter(user=user, date_local=current_date)
+                    .first()
+                )
+                if attendance is None:
+                    return {
+                        'success': False,
+                        'error': 'No check-in record found for today'
+                    }
+                
+                update_fields = [
+                    'check_out_at_utc', 'check_out_lat', 'check_out_lng',
+                    'check_out_accuracy_m', 'check_out_ip', 'total_work_minutes',
+                    'is_holiday', 'updated_at'
+                ]
+                
+                # Ensure attendance is linked to employee profile for salary-based calculations
+                if not attendance.employee_id and employee:
+                    attendance.employee = employee
+                    update_fields.append('employee')
+                
+                attendance.check_out_at_utc = timezone.now()
+                attendance.check_out_lat = lat
+                attendance.check_out_lng = lng
+                attendance.check_out_accuracy_m = accuracy
+                attendance.check_out_ip = ip_address
+                
+                # Calculate work minutes
+                if attendance.check_in_at_utc:
+                    duration = attendance.check_out_at_utc - attendance.check_in_at_utc
+                    attendance.total_work_minutes = int(duration.total_seconds() / 60)
+                if not attendance.is_holiday:
+                    attendance.is_holiday = get_holiday_calendar().is_holiday(current_date)
+                
+                # Calculate overtime
+                if self.work_settings and attendance.total_work_minutes:
+                    overtime_minutes, overtime_amount = attendance.calculate_overtime()
+                    attendance.overtime_minutes = overtime_minutes
+                    attendance.overtime_amount = overtime_amount
+                    update_fields += ['overtime_minutes', 'overtime_amount']
+                
+                attendance.save(update_fields=update_fields)
             
             return {
                 'success': True,
@@ -182,20 +185,85 @@ class AttendanceService:
                 'error': str(e)
             }
     
+    def _resolve_employee(self, user):
+        """Return the user's employee profile, or None when there is no profile"""
+        try:
+            return user.employee_profile
+        except Exception:
+            return None
+    
+    def _upsert_attendance(self, user, date_local, timezone_name, fields, max_attempts=3):
+        """
+        Insert or update the (user, date_local) attendance row in one write.
+        
+        The existing row is locked with SELECT ... FOR UPDATE and updated with
+        an explicit ``update_fields`` list; when it does not exist yet it is
+        inserted. A concurrent insert of the same row surfaces as an
+        IntegrityError on the unique key, in which case the punch is retried
+        as an update. On InnoDB, two first punches locking the same missing
+        row take gap locks and one of them is chosen as a deadlock victim
+        (error 1213) instead; that transaction was rolled back and is
+        retried the same way.
+        """
+        employee = self._resolve_employee(user)
+        is_holiday = get_holiday_calendar().is_holiday(date_local)
+        
+        for attempt in range(max_attempts):
+            try:
+                with transaction.atomic():
+                    attendance = (
+                        Attendance.objects.select_for_update()
+                        .filter(user=user, date_local=date_local)
+                        .first()
+                    )
+                    if attendance is None:
+                        attendance = Attendance(
+                            user=user,
+                            date_local=date_local,
+                            timezone=timezone_name,
+                            employee=employee,
+                            is_holiday=is_holiday,
+                            **fields
+                        )
+                        attendance.save(force_insert=True)
+                        return attendance
+                    
+                    update_fields = list(fields) + ['updated_at']
+                    for name, value in fields.items():
+                        setattr(attendance, name, value)
+                    if not attendance.employee_id and employee:
+                        attendance.employee = employee
+                        update_fields.append('employee')
+                    if is_holiday and not attendance.is_holiday:
+                        attendance.is_holiday = True
+                        update_fields.append('is_holiday')
+                    if attendance.check_out_at_utc:
+                        # Re-punching check-in after check-out changes the worked time
+                        update_fields.append('total_work_minutes')
+                    attendance.save(update_fields=update_fields)
+                    return attendance
+            except (IntegrityError, OperationalError) as e:
+                # Another request inserted the same (user, date_local) row first,
+                # or won the deadlock over the gap lock of the missing row
+                if isinstance(e, OperationalError) and not is_deadlock(e):
+                    raise
+                if attempt == max_attempts - 1:
+                    raise
+    
     def precheck_attendance(self, user, data):
         """Precheck attendance status for a date"""
         try:
-            timezone_name = data.get('timezone', 'Asia/Dubai')
             check_date = data.get('date', date.today())
             
-            # Get or create attendance for the date
-            attendance, created = Attendance.objects.get_or_create(
-                user=user,
-                date_local=check_date,
-                defaults={
-                    'timezone': timezone_name,
-                }
+            # Read-only: a missing row simply means nothing has been recorded yet
+            attendance = (
+                Attendance.objects.filter(user=user, date_local=check_date)
+                .only('check_in_at_utc', 'check_out_at_utc', 'minutes_late')
+                .first()
             )
+            check_in_at = attendance.check_in_at_utc if attendance else None
+            check_out_at = attendance.check_out_at_utc if attendance else None
+            minutes_late = attendance.minutes_late if attendance else 0
             
             # Get work settings
             if self.work_settings:
@@ -206,29 +274,18 @@ class AttendanceService:
                 is_workday = True
             
             # Check if it's a holiday
-            from apps.settings.models import Holiday
-            is_holiday = Holiday.is_holiday_date(check_date)
-            
-            # Get time restrictions info
-            time_restrictions = {}
-            if self.work_settings:
-                time_restrictions = {
-                    'earliest_check_in_enabled': self.work_settings.earliest_check_in_enabled,
-                    'earliest_check_in_time': self.work_settings.earliest_check_in_time.strftime('%H:%M') if self.work_settings.earliest_check_in_time else None,
-                    'latest_check_out_enabled': self.work_settings.latest_check_out_enabled,
-                    'latest_check_out_time': self.work_settings.latest_check_out_time.strftime('%H:%M') if self.work_settings.latest_check_out_time else None,
-                }
+            is_holiday = get_holiday_calendar().is_holiday(check_date)
             
             return {
                 'success': True,
                 'date': check_date.isoformat(),
                 'is_workday': is_workday,
                 'is_holiday': is_holiday,
-                'has_check_in': bool(attendance.check_in_at_utc),
-                'has_check_out': bool(attendance.check_out_at_utc),
+                'has_check_in': bool(check_in_at),
+                'has_check_out': bool(check_out_at),
                 'work_hours': work_hours,
-                'time_restrictions': time_restrictions,
-                'status': attendance.status
+                'time_restrictions': self.time_restrictions(),
+                'status': Attendance.status_for(check_in_at, check_out_at, minutes_late)
             }
             
         except Exception as e:
@@ -237,100 +294,128 @@ class AttendanceService:
                 'error': str(e)
             }
     
+    def time_restrictions(self):
+        """Configured check-in/check-out window, as exposed to the frontend"""
+        if not self.work_settings:
+            return {}
+        return {
+            'earliest_check_in_enabled': self.work_settings.earliest_check_in_enabled,
+            'earliest_check_in_time': self.work_settings.earliest_check_in_time.strftime('%H:%M') if self.work_settings.earliest_check_in_time else None,
+            'latest_check_out_enabled': self.work_settings.latest_check_out_enabled,
+            'latest_check_out_time': self.work_settings.latest_check_out_time.strftime('%H:%M') if self.work_settings.latest_check_out_time else None,
+        }
+    
     def _check_geofence(self, lat, lng):
-        """Check if coordinates are within office geofence"""
-        if not all([lat, lng, self.work_settings]):
-            return False
-        
-        if not (self.work_settings.office_latitude and self.work_settings.office_longitude):
-            return False
-        
-        distance = haversine_meters(
-            lat, lng,
-            self.work_settings.office_latitude,
-            self.work_settings.office_longitude
-        )
-        
-        return distance <= self.work_settings.office_radius_meters
+        """Match coordinates against the office geofence index"""
+        return locate_office(lat, lng, self.work_settings)
+    
+    SUMMARY_DETAIL_FIELDS = (
+        'date_local', 'check_in_at_utc', 'check_out_at_utc', 'total_work_minutes',
+        'overtime_minutes', 'overtime_amount', 'is_holiday', 'minutes_late'
+    )
     
-    def get_attendance_summary(self, user, start_date, end_date, month=None):
-        """Get attendance summary for a user"""
+    def get_attendance_summary(self, user, start_date, end_date, month=None,
+                               include_details=True, page=None, page_size=None):
+        """
+        Get attendance summary for a user.
+        
+        Totals come from a single conditional-aggregate query. Detail rows are
+        read with ``.values()``; pass ``include_details=False`` to skip them, or
+        ``page``/``page_size`` to return one page of them.
+        """
         try:
-            # Build queryset with date filtering
-            attendances = Attendance.objects.filter(user=user)
-            
             # Apply month filter if provided (overrides date range)
+            whole_month = False
             if month:
                 try:
-                    year, month_num = month.split('-')
-                    attendances = attendances.filter(
-                        date_local__year=year,
-                        date_local__month=month_num
-                    )
-                    # Calculate date range for summary
-                    from datetime import datetime
-                    month_start = datetime.strptime(f"{year}-{month_num}-01", "%Y-%m-%d").date()
-                    if month_num == '12':
-                        month_end = datetime.strptime(f"{int(year)+1}-01-01", "%Y-%m-%d").date() - timedelta(days=1)
-                    else:
-                        month_end = datetime.strptime(f"{year}-{int(month_num)+1}-01", "%Y-%m-%d").date() - timedelta(days=1)
-                    start_date = month_start
-                    end_date = month_end
+                    year, month_num = (int(part) for part in month.split('-'))
+                    start_date = date(year, month_num, 1)
+                    end_date = date(year, month_num, monthrange(year, month_num)[1])
+                    whole_month = True
                 except ValueError:
                     # Invalid month format, use date range instead
                     pass
             
-            # Apply date range filter if no month filter
-            if not month:
-                attendances = attendances.filter(
-                    date_local__range=[start_date, end_date]
-                )
+            attendances = Attendance.objects.filter(
+                user=user,
+                date_local__range=[start_date, end_date]
+            )
             
-            attendances = attendances.order_by('date_local')
+            employee = self._resolve_employee(user)
+            if (
+                whole_month and employee is not None
+                and not attendances.exclude(employee_id=employee.pk).exists()
+            ):
+                # Monthly views read the maintained rollup instead of rescanning rows.
+                # The rollup is keyed by employee; rows of the user without that
+                # employee (e.g. employee=None) are only in the live aggregate.
+                stats = monthly_totals([employee.pk], start_date, end_date)[employee.pk]
+            else:
+                stats = attendances.aggregate(**stat_aggregates())
+            totals = {
+                'records': stats['record_days'],
+                'holidays': stats['holiday_days'],
+                'check_ins': stats['present_days'],
+                'check_outs': stats['check_out_days'],
+                'late_days': stats['late_days'],
+                'total_late_minutes': stats['total_late_minutes'],
+                'total_work_minutes': stats['total_work_minutes'],
+                'total_overtime_minutes': stats['total_overtime_minutes'],
+                'total_overtime_amount': stats['total_overtime_amount'],
+            }
             
+            work_calendar = get_work_calendar(start_date, end_date)
             summary = {
                 'total_days': (end_date - start_date).days + 1,
-                'work_days': 0,
-                'holidays': 0,
-                'check_ins': 0,
-                'check_outs': 0,
-                'late_days': 0,
-                'total_work_minutes': 0,
-                'total_overtime_minutes': 0,
-                'total_overtime_amount': 0,
+                'scheduled_work_days': work_calendar.working_days_between(start_date, end_date),
+                'required_work_minutes': work_calendar.total_required_minutes(start_date, end_date),
+                'work_days': totals['records'] - totals['holidays'],
+                'holidays': totals['holidays'],
+                'check_ins': totals['check_ins'],
+                'check_outs': totals['check_outs'],
+                'late_days': totals['late_days'],
+                'total_late_minutes': totals['total_late_minutes'],
+                'total_work_minutes': totals['total_work_minutes'],
+                'total_overtime_minutes': totals['total_overtime_minutes'],
+                'total_overtime_amount': float(totals['total_overtime_amount']),
                 'attendances': []
             }
             
-            for attendance in attendances:
-                summary['attendances'].append({
-                    'date': attendance.date_local.isoformat(),
-                    'status': attendance.status,
-                    'check_in': attendance.check_in_at_utc.isoformat() if attendance.check_in_at_utc else None,
-                    'check_out': attendance.check_out_at_utc.isoformat() if attendance.check_out_at_utc else None,
-                    'work_minutes': attendance.total_work_minutes,
-                    'overtime_minutes': attendance.overtime_minutes,
-                    'overtime_amount': float(attendance.overtime_amount),
-                    'is_holiday': attendance.is_holiday,
-                    'minutes_late': attendance.minutes_late
-                })
-                
-                if attendance.is_holiday:
-                    summary['holidays'] += 1
-                else:
-                    summary['work_days'] += 1
-                
-                if attendance.check_in_at_utc:
-                    summary['check_ins'] += 1
-                
-                if attendance.check_out_at_utc:
-                    summary['check_outs'] += 1
-                
-                if attendance.minutes_late > 0:
-                    summary['late_days'] += 1
-                
-                summary['total_work_minutes'] += attendance.total_work_minutes or 0
-                summary['total_overtime_minutes'] += attendance.overtime_minutes or 0
-                summary['total_overtime_amount'] += float(attendance.overtime_amount or 0)
+            # Absent/incomplete days are derived from the calendar, not stored rows
+            absence = AbsenceEngine(start_date, end_date, work_calendar=work_calendar).for_attendances(
+                attendances, first_day=employee.tmt_kerja if employee else None
+            )
+            summary.update(absence.as_dict(include_dates=include_details))
+            
+            if include_details:
+                rows = attendances.order_by('date_local').values(*self.SUMMARY_DETAIL_FIELDS)
+                if page_size:
+                    page = max(int(page or 1), 1)
+                    page_size = max(int(page_size), 1)
+                    offset = (page - 1) * page_size
+                    rows = rows[offset:offset + page_size]
+                    summary['details_pagination'] = {
+                        'page': page,
+                        'page_size': page_size,
+                        'total': totals['records'],
+                        'total_pages': (totals['records'] + page_size - 1) // page_size,
+                    }
+                summary['attendances'] = [
+                    {
+                        'date': row['date_local'].isoformat(),
+                        'status': Attendance.status_for(
+                            row['check_in_at_utc'], row['check_out_at_utc'], row['minutes_late']
+                        ),
+                        'check_in': row['check_in_at_utc'].isoformat() if row['check_in_at_utc'] else None,
+                        'check_out': row['check_out_at_utc'].isoformat() if row['check_out_at_utc'] else None,
+                        'work_minutes': row['total_work_minutes'],
+                        'overtime_minutes': row['overtime_minutes'],
+                        'overtime_amount': float(row['overtime_amount']),
+                        'is_holiday': row['is_holiday'],
+                        'minutes_late': row['minutes_late']
+                    }
+                    for row in rows
+                ]
             
             return {
                 'success': True,
@@ -342,3 +427,401 @@ class AttendanceService:
                 'success': False,
                 'error': str(e)
             }
+
+
+class TeamAttendanceService:
+    """
+    Team attendance overview shared by the supervisor JSON and PDF views.
+    
+    Query count is constant in team size: one query for the employees, the
+    rollup/grouped aggregate for the per-employee totals, one pass over the
+    range for absence detection, and one ROW_NUMBER() window query for the
+    latest rows of every employee.
+    """
+    
+    RECENT_FIELDS = (
+        'id', 'employee_id', 'date_local', 'check_in_at_utc', 'check_out_at_utc',
+        'minutes_late', 'total_work_minutes', 'is_holiday',
+        'within_geofence', 'note', 'employee_note'
+    )
+    
+    def get_team_attendance(self, division, start_date, end_date, employee_id=None, recent_limit=10):
+        """
+        Return ``[{'employee', 'summary', 'recent_attendance'}, ...]`` for the
+        division's employees, ordered like the employee queryset.
+        """
+        from apps.employees.models import Employee
+        
+        employees_qs = Employee.objects.filter(division=division).select_related('user', 'division', 'position')
+        if employee_id:
+            employees_qs = employees_qs.filter(id=employee_id)
+        employees = list(employees_qs)
+        employee_ids = [e.id for e in employees]
+        
+        totals_by_employee = monthly_totals(employee_ids, start_date, end_date)
+        absence_by_employee = AbsenceEngine(start_date, end_date).for_employees(
+            employee_ids, first_days={e.id: e.tmt_kerja for e in employees}
+        )
+        recent_by_employee = self._recent_attendance(employee_ids, start_date, end_date, recent_limit)
+        
+        team = []
+        for employee in employees:
+            totals = totals_by_employee[employee.id]
+            absence = absence_by_employee[employee.id]
+            team.append({
+                'employee': employee,
+                'summary': {
+                    'total_days': totals['record_days'],
+                    'present_days': totals['present_days'],
+                    'late_days': totals['late_days'],
+                    'expected_work_days': absence.expected_days,
+                    'absent_days': absence.absent_days,
+                    'incomplete_days': absence.incomplete_days,
+                    'attendance_rate': absence.attendance_rate,
+                },
+                'recent_attendance': recent_by_employee.get(employee.id, []),
+            })
+        return team
+    
+    def _recent_attendance(self, employee_ids, start_date, end_date, limit):
+        """Latest ``limit`` rows per employee from a single window-function query"""
+        if not employee_ids or not limit:
+            return {}
+        rows = (
+            Attendance.objects.filter(
+                employee_id__in=employee_ids,
+                date_local__range=[start_date, end_date]
+            )
+            .annotate(row_number=Window(
+                expression=RowNumber(),
+                partition_by=[F('employee_id')],
+                order_by=[F('date_local').desc(), F('id').desc()],
+            ))
+            .filter(row_number__lte=limit)
+            .order_by('employee_id', '-date_local', '-id')
+            .values(*self.RECENT_FIELDS)
+        )
+        recent = {}
+        for row in rows:
+            recent.setdefault(row.pop('employee_id'), []).append(row)
+        return recent
+
+
+class PunchBatchService:
+    """
+    Applies a batch of timestamped punches (kiosks, offline mobile clients).
+    
+    Users, settings, holidays and the affected attendance rows are resolved
+    once for the whole batch, punches are applied in memory in timestamp
+    order, and the result is written with bulk_create/bulk_update in one
+    transaction. Every punch leaves an AttendancePunch receipt keyed by
+    (user, idempotency_key), so replaying a batch returns the stored results
+    without touching attendance again.
+    
+    Offline punches can arrive out of order, so the earliest check-in and
+    the latest check-out of a day win. Punch times are client-supplied, so
+    unless the batch comes from an admin or a kiosk (``trusted``):
+    
+    - a punch must fall on the current work day and be at most
+      ``PUNCH_BATCH_MAX_AGE_SECONDS`` old when it arrives, so lateness
+      cannot be erased by back-dating a check-in
+    - an earlier check-in never replaces one that is already recorded
+    
+    The work day, lateness and the check-in/out windows always use the
+    WorkSettings timezone, never the client's ``timezone``.
+    """
+    
+    ATTENDANCE_UPDATE_FIELDS = [
+        'employee', 'timezone', 'is_holiday',
+        'check_in_at_utc', 'check_in_lat', 'check_in_lng', 'check_in_accuracy_m',
+        'check_in_ip', 'within_geofence', 'check_in_office', 'minutes_late',
+        'check_out_at_utc', 'check_out_lat', 'check_out_lng', 'check_out_accuracy_m', 'check_out_ip',
+        'total_work_minutes', 'overtime_minutes', 'overtime_amount', 'updated_at',
+    ]
+    
+    DEFAULT_TIMEZONE = 'Asia/Dubai'
+    DEFAULT_MAX_AGE_SECONDS = 15 * 60
+    
+    def __init__(self):
+        self.work_settings = get_work_settings()
+        self.holiday_calendar = get_holiday_calendar()
+        self.timezone_name = self.DEFAULT_TIMEZONE
+        if self.work_settings and self.work_settings.timezone:
+            self.timezone_name = self.work_settings.timezone
+        try:
+            self.tz = ZoneInfo(self.timezone_name)
+        except Exception:
+            self.timezone_name, self.tz = self.DEFAULT_TIMEZONE, ZoneInfo(self.DEFAULT_TIMEZONE)
+        self.max_age = timedelta(
+            seconds=getattr(settings, 'PUNCH_BATCH_MAX_AGE_SECONDS', self.DEFAULT_MAX_AGE_SECONDS)
+        )
+    
+    def process_batch(self, submitted_by, punches, trusted=False, ip_address=None, max_attempts=3):
+        """
+        Apply ``punches`` (validated PunchSerializer data); returns the batch
+        result dict. ``trusted`` (admin / kiosk submitter) lifts the
+        current-work-day and maximum-age limits and lets an earlier check-in
+        replace a recorded one. ``ip_address`` (the submitting client) is
+        stored as the check-in/out IP of the punches applied.
+        """
+        for attempt in range(max_attempts):
+            try:
+                with transaction.atomic():
+                    results = self._process(submitted_by, punches, trusted, ip_address)
+                break
+            except (IntegrityError, OperationalError) as e:
+                # A concurrent request created one of our (user, date_local) rows
+                # or receipts first (or won an InnoDB deadlock over them);
+                # replay the batch against the new state
+                if isinstance(e, OperationalError) and not is_deadlock(e):
+                    raise
+                if attempt == max_attempts - 1:
+                    raise
+        
+        summary = {'applied': 0, 'skipped': 0, 'rejected': 0, 'duplicate': 0}
+        for result in results:
+            summary['duplicate' if result.get('duplicate') else result['status']] += 1
+        return {
+            'success': True,
+            'total': len(results),
+            'summary': summary,
+            'results': results,
+        }
+    
+    def _process(self, submitted_by, punches, trusted=False, ip_address=None):
+        results = [None] * len(punches)
+        received_at = timezone.now()
+        today = received_at.astimezone(self.tz).date()
+        user_ids = {p['user_id'] for p in punches}
+        users = {
+            u.pk: u for u in User.objects.filter(pk__in=user_ids).select_related('employee_profile')
+        }
+        
+        # Replays: receipts already stored for these keys
+        receipts = {
+            (r.user_id, r.idempotency_key): r
+            for r in AttendancePunch.objects.filter(
+                user_id__in=user_ids,
+                idempotency_key__in={p['idempotency_key'] for p in punches},
+            )
+        }
+        
+        pending = []
+        first_index = {}
+        for index, punch in enumerate(punches):
+            key = (punch['user_id'], punch['idempotency_key'])
+            if key in receipts:
+                results[index] = dict(receipts[key].as_result(), duplicate=True)
+            elif key in first_index:
+                # Same key twice in one batch; resolved once the first one is applied
+                results[index] = first_index[key]
+            elif punch['user_id'] not in users:
+                results[index] = self._result(punch, AttendancePunch.STATUS_REJECTED, error='Unknown user')
+                first_index[key] = index
+            else:
+                local_time = punch['timestamp'].astimezone(self.tz)
+                if not trusted and received_at - punch['timestamp'] > self.max_age:
+                    results[index] = self._result(
+                        punch, AttendancePunch.STATUS_REJECTED, error='Punch is too old to be accepted'
+                    )
+                elif not trusted and local_time.date() != today:
+                    results[index] = self._result(
+                        punch, AttendancePunch.STATUS_REJECTED, error='Punch is outside the current work day'
+                    )
+                else:
+                    pending.append((index, punch, local_time))
+                first_index[key] = index
+        
+        # Lock every attendance row the batch touches
+        dates = {local_time.date() for _, _, local_time in pending}
+        pending_user_ids = {punch['user_id'] for _, punch, _ in pending}
+        rows = {}
+        if pending:
+            for attendance in (
+                Attendance.objects.select_for_update()
+                .select_related('employee')
+                .filter(user_id__in=pending_user_ids, date_local__in=dates)
+            ):
+                rows[(attendance.user_id, attendance.date_local)] = attendance
+        existing_keys = set(rows)
+        recorded_check_ins = {row_key for row_key, attendance in rows.items() if attendance.check_in_at_utc}
+        dirty = set()
+        
+        for index, punch, local_time in sorted(pending, key=lambda item: item[1]['timestamp']):
+            user = users[punch['user_id']]
+            row_key = (user.pk, local_time.date())
+            attendance = rows.get(row_key)
+            error = self._check_time_restrictions(punch['kind'], local_time)
+            if error:
+                results[index] = self._result(punch, AttendancePunch.STATUS_REJECTED, error=error)
+                continue
+            
+            if punch['kind'] == AttendancePunch.KIND_CHECK_IN:
+                if attendance is None:
+                    attendance = Attendance(
+                        user=user,
+                        date_local=row_key[1],
+                        timezone=self.timezone_name,
+                        is_holiday=self.holiday_calendar.is_holiday(row_key[1]),
+                    )
+                    rows[row_key] = attendance
+                if attendance.check_in_at_utc and attendance.check_in_at_utc <= punch['timestamp']:
+                    results[index] = self._result(
+                        punch, AttendancePunch.STATUS_SKIPPED, attendance,
+                        error='An earlier check-in is already recorded'
+                    )
+                    continue
+                if not trusted and row_key in recorded_check_ins:
+                    results[index] = self._result(
+                        punch, AttendancePunch.STATUS_SKIPPED, attendance,
+                        error='A check-in is already recorded'
+                    )
+                    continue
+                self._apply_check_in(attendance, punch, local_time)
+                attendance.check_in_ip = ip_address
+            else:
+                if attendance is None or not attendance.check_in_at_utc:
+                    results[index] = self._result(
+                        punch, AttendancePunch.STATUS_REJECTED, error='No check-in record found for this date'
+                    )
+                    continue
+                if punch['timestamp'] < attendance.check_in_at_utc:
+                    results[index] = self._result(
+                        punch, AttendancePunch.STATUS_REJECTED, attendance, error='Check-out is before check-in'
+                    )
+                    continue
+                if attendance.check_out_at_utc and attendance.check_out_at_utc >= punch['timestamp']:
+                    results[index] = self._result(
+                        punch, AttendancePunch.STATUS_SKIPPED, attendance,
+                        error='A later check-out is already recorded'
+                    )
+                    continue
+                attendance.check_out_at_utc = punch['timestamp']
+                attendance.check_out_lat = punch.get('latitude')
+                attendance.check_out_lng = punch.get('longitude')
+                attendance.check_out_accuracy_m = punch.get('accuracy')
+                attendance.check_out_ip = ip_address
+            
+            dirty.add(row_key)
+            results[index] = self._result(punch, AttendancePunch.STATUS_APPLIED, attendance)
+        
+        self._write_attendance(rows, dirty, existing_keys, users)
+        
+        # Attendance ids are only known after the insert; resolve them into the results
+        for result in results:
+            if isinstance(result, dict) and '_attendance' in result:
+                result['attendance_id'] = result.pop('_attendance').pk
+        for index, result in enumerate(results):
+            if isinstance(result, int):
+                results[index] = dict(results[result], duplicate=True)
+        
+        AttendancePunch.objects.bulk_create([
+            AttendancePunch(
+                user_id=punches[index]['user_id'],
+                idempotency_key=punches[index]['idempotency_key'],
+                kind=punches[index]['kind'],
+                punched_at_utc=punches[index]['timestamp'],
+                attendance_id=results[index]['attendance_id'],
+                status=results[index]['status'],
+                error=results[index]['error'],
+                submitted_by=submitted_by,
+            )
+            for index in first_index.values()
+            if punches[index]['user_id'] in users
+        ])
+        return results
+    
+    def _check_time_restrictions(self, kind, local_time):
+        ws = self.work_settings
+        if not ws:
+            return None
+        if kind == AttendancePunch.KIND_CHECK_IN and ws.earliest_check_in_enabled:
+            if local_time.time() < ws.earliest_check_in_time:
+                return f'Check-in tidak diizinkan sebelum jam {ws.earliest_check_in_time.strftime("%H:%M")}.'
+        if kind == AttendancePunch.KIND_CHECK_OUT and ws.latest_check_out_enabled:
+            if local_time.time() > ws.latest_check_out_time:
+                return f'Check-out tidak diizinkan setelah jam {ws.latest_check_out_time.strftime("%H:%M")}.'
+        return None
+    
+    def _apply_check_in(self, attendance, punch, local_time):
+        lat = punch.get('latitude')
+        lng = punch.get('longitude')
+        geofence = locate_office(lat, lng, self.work_settings)
+        attendance.check_in_at_utc = punch['timestamp']
+        attendance.check_in_lat = lat
+        attendance.check_in_lng = lng
+        attendance.check_in_accuracy_m = punch.get('accuracy')
+        attendance.within_geofence = geofence.within_geofence
+        attendance.check_in_office_id = geofence.office_id
+        if self.work_settings:
+            work_hours = self.work_settings.get_work_hours_for_date(local_time.date())
+            attendance.minutes_late = evaluate_lateness_as_dict(
+                local_time.time(),
+                work_hours['start_time'],
+                work_hours['grace_minutes']
+            )['minutes_late']
+    
+    def _write_attendance(self, rows, dirty, existing_keys, users):
+        """Recompute derived fields of touched rows and write them in bulk"""
+        now = timezone.now()
+        to_create = []
+        to_update = []
+        for row_key in dirty:
+            attendance = rows[row_key]
+            user = users[row_key[0]]
+            # Keep calculate_overtime from lazily loading user/employee per row
+            attendance.user = user
+            if not attendance.employee_id:
+                attendance.employee = self._employee_for(user)
+            if not attendance.is_holiday:
+                attendance.is_holiday = self.holiday_calendar.is_holiday(attendance.date_local)
+            if attendance.check_in_at_utc and attendance.check_out_at_utc:
+                duration = attendance.check_out_at_utc - attendance.check_in_at_utc
+                attendance.total_work_minutes = int(duration.total_seconds() / 60)
+                if self.work_settings:
+                    attendance.overtime_minutes, attendance.overtime_amount = attendance.calculate_overtime()
+            attendance.updated_at = now
+            if row_key in existing_keys:
+                to_update.append(attendance)
+            else:
+                to_create.append(attendance)
+        
+        if to_create:
+            Attendance.objects.bulk_create(to_create)
+            if any(a.pk is None for a in to_create):
+                # Backends without RETURNING (MySQL) leave pks unset after bulk_create
+                ids = {
+                    (user_id, date_local): pk
+                    for user_id, date_local, pk in Attendance.objects.filter(
+                        user_id__in={a.user_id for a in to_create},
+                        date_local__in={a.date_local for a in to_create},
+                    ).values_list('user_id', 'date_local', 'id')
+                }
+                for attendance in to_create:
+                    attendance.pk = ids[(attendance.user_id, attendance.date_local)]
+        if to_update:
+            Attendance.objects.bulk_update(to_update, self.ATTENDANCE_UPDATE_FIELDS)
+        
+        # bulk_create/bulk_update bypass the post_save rollup and my-day signals
+        invalidate_my_day({row_key[0] for row_key in dirty})
+        refresh_monthly_stats(
+            [rows[row_key].rollup_key for row_key in dirty]
+            + [getattr(rows[row_key], '_loaded_rollup_key', None) for row_key in dirty]
+        )
+    
+    def _employee_for(self, user):
+        try:
+            return user.employee_profile
+        except Exception:
+            return None
+    
+    def _result(self, punch, status, attendance=None, error=None):
+        result = {
+            'idempotency_key': punch['idempotency_key'],
+            'status': status,
+            'attendance_id': None,
+            'error': error,
+        }
+        if attendance is not None:
+            result['_attendance'] = attendance
+        return result
@@ -0,0 +1,84 @@
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+from apps.settings.models import Holiday, WorkSettings
+from .models import Attendance, AttendanceRecomputeJob
+from .my_day import invalidate_my_day
+from .recompute import RECOMPUTE_SETTINGS_FIELDS, enqueue_recompute
+from .rollups import apply_row_change, refresh_monthly_stats, rollup_state
+
+
+@receiver(post_save, sender=Attendance)
+def refresh_attendance_rollup_on_save(sender, instance, created, **kwargs):
+    """Add the row's change to its monthly rollup bucket(s)"""
+    current = rollup_state(instance)
+    previous = None if created else getattr(instance, '_loaded_rollup', None)
+    if created or previous is not None:
+        apply_row_change(previous, current)
+    else:
+        # Loaded values unknown: recompute the bucket(s) from the rows
+        refresh_monthly_stats([getattr(instance, '_loaded_rollup_key', None), instance.rollup_key])
+    instance._loaded_rollup = current
+    instance._loaded_rollup_key = instance.rollup_key
+
+
+@receiver(post_delete, sender=Attendance)
+def refresh_attendance_rollup_on_delete(sender, instance, **kwargs):
+    """Remove the deleted row from its monthly rollup bucket"""
+    previous = getattr(instance, '_loaded_rollup', None)
+    if previous is not None:
+        apply_row_change(previous, None)
+    else:
+        refresh_monthly_stats([getattr(instance, '_loaded_rollup_key', None), instance.rollup_key])
+
+
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+def invalidate_my_day_on_change(sender, instance, **kwargs):
+    """Check-in, check-out and approved corrections all save the Attendance row"""
+    invalidate_my_day([instance.user_id])
+
+
+@receiver(pre_save, sender=Holiday)
+def remember_holiday_date(sender, instance, **kwargs):
+    """Moving a holiday to another date affects the rows of both dates"""
+    if instance.pk:
+        instance._previous_date = (
+            Holiday.objects.filter(pk=instance.pk).values_list('date', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Holiday)
+@receiver(post_delete, sender=Holiday)
+def recompute_attendance_on_holiday_change(sender, instance, **kwargs):
+    """Queue a recompute of the rows on the holiday's date(s)"""
+    dates = {instance.date, getattr(instance, '_previous_date', None)}
+    enqueue_recompute(
+        AttendanceRecomputeJob.KIND_HOLIDAY,
+        {'dates': sorted(str(day) for day in dates if day)},
+    )
+
+
+@receiver(pre_save, sender=WorkSettings)
+def remember_work_settings(sender, instance, **kwargs):
+    """Load the stored values of the fields the derived attendance columns depend on"""
+    instance._previous_recompute_values = (
+        WorkSettings.objects.filter(pk=instance.pk).values(*RECOMPUTE_SETTINGS_FIELDS).first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=WorkSettings)
+def recompute_attendance_on_work_settings_change(sender, instance, created, **kwargs):
+    """Queue a recompute of the rows affected by the changed settings"""
+    previous = getattr(instance, '_previous_recompute_values', None)
+    if created or previous is None:
+        # First settings row: existing attendance was computed with the defaults
+        changed = list(RECOMPUTE_SETTINGS_FIELDS)
+    else:
+        changed = [
+            name for name in RECOMPUTE_SETTINGS_FIELDS
+            # to_python: values assigned in code may be floats/strings rather than Decimal/time
+            if previous[name] != sender._meta.get_field(name).to_python(getattr(instance, name))
+        ]
+    if changed:
+        enqueue_recompute(AttendanceRecomputeJob.KIND_WORK_SETTINGS, {'fields': changed})
@@ -0,0 +1,378 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from zoneinfo import ZoneInfo
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.employees.models import Employee
+from apps.settings.geofence import invalidate_office_index
+from apps.settings.models import Office, WorkSettings
+from apps.settings.snapshot import mark_caches_stale
+from .models import Attendance, AttendanceMonthlyStat, AttendancePunch
+from .rollups import STAT_FIELDS, rebuild_monthly_stats
+from .services import AttendanceService, PunchBatchService
+
+
+PUNCH = {'latitude': 25.2, 'longitude': 55.27}
+
+
+class AttendanceTestCase(TestCase):
+    def setUp(self):
+        mark_caches_stale()
+        self.work_settings = WorkSettings.objects.create()
+        self.user = User.objects.create_user('pegawai1', password='pw')
+        self.employee = Employee.objects.create(user=self.user, nip='198001012000011001')
+
+    def fresh_user(self):
+        # A request's user arrives without a cached employee profile
+        return User.objects.get(pk=self.user.pk)
+
+    def warm_caches(self):
+        """Load the per-process settings / holiday / office snapshots outside the measured block"""
+        AttendanceService().precheck_attendance(self.fresh_user(), {})
+        AttendanceService()._check_geofence(PUNCH['latitude'], PUNCH['longitude'])
+
+
+class PunchWriteTests(AttendanceTestCase):
+    """A punch is one locked read and one write of the attendance row"""
+
+    def test_check_in_queries(self):
+        self.warm_caches()
+        today = timezone.now().astimezone(ZoneInfo(self.work_settings.timezone)).date()
+        # Another day of the month already has a rollup bucket
+        Attendance.objects.create(
+            user=self.user, employee=self.employee, date_local=today.replace(day=1 if today.day > 1 else 2),
+        )
+        service, user = AttendanceService(), self.fresh_user()
+        # employee + SELECT ... FOR UPDATE + INSERT + rollup UPDATE (and the savepoint)
+        with self.assertNumQueries(6):
+            result = service.process_check_in(user, PUNCH)
+        self.assertTrue(result['success'], result)
+
+    def test_first_check_in_of_month_builds_rollup_bucket(self):
+        self.warm_caches()
+        service, user = AttendanceService(), self.fresh_user()
+        # The rollup UPDATE finds no bucket, so it is aggregated and inserted
+        with self.assertNumQueries(13):
+            result = service.process_check_in(user, PUNCH)
+        self.assertTrue(result['success'], result)
+        self.assertEqual(AttendanceMonthlyStat.objects.get(employee=self.employee).present_days, 1)
+
+    def test_check_out_queries(self):
+        self.warm_caches()
+        AttendanceService().process_check_in(self.fresh_user(), PUNCH)
+        service, user = AttendanceService(), self.fresh_user()
+        # employee + SELECT ... FOR UPDATE + UPDATE + rollup UPDATE (and the savepoint)
+        with self.assertNumQueries(6):
+            result = service.process_check_out(user, PUNCH)
+        self.assertTrue(result['success'], result)
+        self.assertIsNotNone(Attendance.objects.get(user=self.user).check_out_at_utc)
+
+    def test_first_punch_deadlock_is_retried(self):
+        original_save = Attendance.save
+        calls = []
+
+        def deadlock_once(instance, *args, **kwargs):
+            calls.append(kwargs)
+            if len(calls) == 1:
+                raise OperationalError(1213, 'Deadlock found when trying to get lock')
+            return original_save(instance, *args, **kwargs)
+
+        with mock.patch.object(Attendance, 'save', autospec=True, side_effect=deadlock_once):
+            result = AttendanceService().process_check_in(self.fresh_user(), PUNCH)
+        self.assertTrue(result['success'], result)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(Attendance.objects.filter(user=self.user).count(), 1)
+
+    def test_other_operational_errors_are_not_retried(self):
+        with mock.patch.object(
+            Attendance, 'save', autospec=True, side_effect=OperationalError(2006, 'MySQL server has gone away')
+        ) as save:
+            result = AttendanceService().process_check_in(self.fresh_user(), PUNCH)
+        self.assertFalse(result['success'])
+        self.assertEqual(save.call_count, 1)
+
+
+class PunchBatchTests(AttendanceTestCase):
+    """Client-supplied punch times cannot rewrite server-recorded attendance"""
+
+    def setUp(self):
+        super().setUp()
+        self.tz = ZoneInfo(self.work_settings.timezone)
+        self.today = timezone.now().astimezone(self.tz).date()
+
+    def local(self, day, hour, minute=0):
+        return datetime.combine(day, time(hour, minute), tzinfo=self.tz)
+
+    def punch(self, key, timestamp, kind=AttendancePunch.KIND_CHECK_IN, client_timezone='Asia/Dubai'):
+        return {
+            'idempotency_key': key,
+            'kind': kind,
+            'timestamp': timestamp,
+            'user_id': self.user.pk,
+            'timezone': client_timezone,
+        }
+
+    @override_settings(PUNCH_BATCH_MAX_AGE_SECONDS=2 * 24 * 60 * 60)
+    def test_untrusted_punch_outside_current_work_day_is_rejected(self):
+        yesterday = self.today - timedelta(days=1)
+        result = PunchBatchService().process_batch(self.user, [self.punch('old', self.local(yesterday, 8))])
+        self.assertEqual(result['results'][0]['status'], AttendancePunch.STATUS_REJECTED)
+        self.assertEqual(result['results'][0]['error'], 'Punch is outside the current work day')
+        self.assertFalse(Attendance.objects.filter(user=self.user).exists())
+
+    @override_settings(PUNCH_BATCH_MAX_AGE_SECONDS=15 * 60)
+    def test_untrusted_punch_older_than_max_age_is_rejected(self):
+        # Back-dating a check-in to before the start of the day would erase lateness
+        stale = timezone.now() - timedelta(minutes=20)
+        result = PunchBatchService().process_batch(self.user, [self.punch('stale', stale)])
+        self.assertEqual(result['results'][0]['status'], AttendancePunch.STATUS_REJECTED)
+        self.assertEqual(result['results'][0]['error'], 'Punch is too old to be accepted')
+        self.assertFalse(Attendance.objects.filter(user=self.user).exists())
+
+    def test_trusted_punch_may_be_back_dated(self):
+        yesterday = self.today - timedelta(days=1)
+        result = PunchBatchService().process_batch(
+            self.user, [self.punch('old', self.local(yesterday, 8))], trusted=True
+        )
+        self.assertEqual(result['results'][0]['status'], AttendancePunch.STATUS_APPLIED)
+
+    @override_settings(PUNCH_BATCH_MAX_AGE_SECONDS=24 * 60 * 60)
+    def test_untrusted_earlier_check_in_does_not_replace_recorded_one(self):
+        recorded = self.local(self.today, 9, 30)
+        Attendance.objects.create(
+            user=self.user, employee=self.employee, date_local=self.today, check_in_at_utc=recorded,
+        )
+        result = PunchBatchService().process_batch(self.user, [self.punch('early', self.local(self.today, 7))])
+        self.assertEqual(result['results'][0]['status'], AttendancePunch.STATUS_SKIPPED)
+        self.assertEqual(Attendance.objects.get(user=self.user).check_in_at_utc, recorded)
+
+    def test_trusted_earlier_check_in_replaces_recorded_one(self):
+        Attendance.objects.create(
+            user=self.user, employee=self.employee, date_local=self.today,
+            check_in_at_utc=self.local(self.today, 9, 30),
+        )
+        early = self.local(self.today, 7)
+        result = PunchBatchService().process_batch(self.user, [self.punch('early', early)], trusted=True)
+        self.assertEqual(result['results'][0]['status'], AttendancePunch.STATUS_APPLIED)
+        self.assertEqual(Attendance.objects.get(user=self.user).check_in_at_utc, early)
+
+    def test_lateness_uses_work_settings_timezone(self):
+        # 10:00 in the office is the previous evening in Honolulu
+        check_in = self.local(self.today, 10)
+        PunchBatchService().process_batch(
+            self.user, [self.punch('late', check_in, client_timezone='Pacific/Honolulu')], trusted=True
+        )
+        attendance = Attendance.objects.get(user=self.user)
+        self.assertEqual(attendance.date_local, self.today)
+        self.assertEqual(attendance.timezone, self.work_settings.timezone)
+        # Default schedules start at 09:00 with no grace, Fridays included
+        self.assertEqual(attendance.minutes_late, 60)
+
+    def test_submitting_ip_is_recorded(self):
+        PunchBatchService().process_batch(
+            self.user,
+            [
+                self.punch('in', self.local(self.today, 8)),
+                self.punch('out', self.local(self.today, 17), kind=AttendancePunch.KIND_CHECK_OUT),
+            ],
+            trusted=True,
+            ip_address='10.0.0.5',
+        )
+        attendance = Attendance.objects.get(user=self.user)
+        self.assertEqual(attendance.check_in_ip, '10.0.0.5')
+        self.assertEqual(attendance.check_out_ip, '10.0.0.5')
+
+
+class MonthlyRollupTests(AttendanceTestCase):
+    """Per-row deltas keep AttendanceMonthlyStat equal to a rebuild from the rows"""
+
+    def stats(self):
+        return {
+            (stat.employee_id, stat.year, stat.month): {field: getattr(stat, field) for field in STAT_FIELDS}
+            for stat in AttendanceMonthlyStat.objects.all()
+        }
+
+    def assertMatchesRebuild(self):
+        incremental = self.stats()
+        rebuild_monthly_stats()
+        self.assertEqual(incremental, self.stats())
+
+    def test_saves_moves_and_deletes(self):
+        other = Employee.objects.create(
+            user=User.objects.create_user('pegawai2', password='pw'), nip='198001012000011002',
+        )
+        check_in = timezone.make_aware(datetime(2026, 3, 2, 9, 30))
+        first = Attendance.objects.create(
+            user=self.user, employee=self.employee, date_local=date(2026, 3, 2),
+            check_in_at_utc=check_in, minutes_late=30,
+        )
+        second = Attendance.objects.create(user=self.user, employee=self.employee, date_local=date(2026, 3, 3))
+
+        first = Attendance.objects.get(pk=first.pk)
+        first.check_out_at_utc = check_in + timedelta(hours=8)
+        first.overtime_minutes = 45
+        first.overtime_amount = Decimal('12500.50')
+        first.save()
+        self.assertMatchesRebuild()
+
+        # Moving a row to another month and employee
+        second = Attendance.objects.get(pk=second.pk)
+        second.date_local = date(2026, 4, 1)
+        second.employee = other
+        second.is_holiday = True
+        second.save()
+        self.assertMatchesRebuild()
+
+        Attendance.objects.get(pk=second.pk).delete()
+        self.assertMatchesRebuild()
+        self.assertFalse(AttendanceMonthlyStat.objects.filter(employee=other).exists())
+
+    def test_deferred_load_falls_back_to_refresh(self):
+        attendance = Attendance.objects.create(user=self.user, employee=self.employee, date_local=date(2026, 3, 2))
+        attendance = Attendance.objects.only('id', 'employee_id', 'date_local', 'user_id').get(pk=attendance.pk)
+        attendance.minutes_late = 15
+        attendance.save()
+        self.assertEqual(AttendanceMonthlyStat.objects.get(employee=self.employee).total_late_minutes, 15)
+        self.assertMatchesRebuild()
+
+
+class AttendanceSummaryTests(AttendanceTestCase):
+    def test_month_summary_counts_rows_without_employee(self):
+        Attendance.objects.create(user=self.user, employee=self.employee, date_local=date(2026, 3, 2))
+        Attendance.objects.create(user=self.user, employee=None, date_local=date(2026, 3, 3))
+        result = AttendanceService().get_attendance_summary(
+            self.user, None, None, month='2026-03', include_details=False,
+        )
+        self.assertEqual(result['summary']['work_days'], 2)
+
+
+class AttendanceListETagTests(AttendanceTestCase):
+    """The list ETag covers the nested employee and user of the rows in view"""
+    url = '/api/v2/attendance/attendance/'
+
+    def setUp(self):
+        super().setUp()
+        # Admins get the serializer that nests employee and user
+        self.user.is_superuser = True
+        self.user.save()
+        Attendance.objects.create(user=self.user, employee=self.employee, date_local=date(2026, 3, 2))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def test_employee_change_changes_etag(self):
+        before = self.etag()
+        Employee.objects.filter(pk=self.employee.pk).update(fullname='Nama Baru', updated_at=timezone.now())
+        self.assertNotEqual(before, self.etag())
+
+    def test_user_change_changes_etag(self):
+        before = self.etag()
+        self.user.first_name = 'Baru'
+        self.user.save()
+        self.assertNotEqual(before, self.etag())
+
+    def test_unrelated_employee_change_keeps_etag(self):
+        other = Employee.objects.create(
+            user=User.objects.create_user('pegawai2', password='pw'), nip='198001012000011002',
+        )
+        before = self.etag()
+        Employee.objects.filter(pk=other.pk).update(fullname='Nama Baru', updated_at=timezone.now())
+        self.assertEqual(before, self.etag())
+
+    def test_unchanged_list_is_not_modified(self):
+        etag = self.etag()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+class AttendancePdfExportTests(AttendanceTestCase):
+    url = '/api/v2/attendance/attendance/export_pdf/'
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_invalid_month_is_rejected(self):
+        for month in ['2026-13', '2026-00', 'maret', '2026-03-01']:
+            with self.subTest(month=month):
+                response = self.client.get(self.url, {'month': month})
+                self.assertEqual(response.status_code, 400)
+
+    def test_month_export(self):
+        Attendance.objects.create(user=self.user, employee=self.employee, date_local=date(2026, 3, 2))
+        response = self.client.get(self.url, {'month': '2026-03'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+
+
+class RecheckGeofenceCommandTests(AttendanceTestCase):
+    """recheck_geofence re-evaluates stored check-ins after an office moves"""
+
+    def setUp(self):
+        super().setUp()
+        invalidate_office_index()
+        self.addCleanup(invalidate_office_index)
+        self.office = Office.objects.create(
+            name='Kantor', latitude='25.2000000', longitude='55.2700000', radius_meters=500,
+        )
+        self.old_site = Attendance.objects.create(
+            user=self.user, employee=self.employee, date_local=date(2026, 3, 2),
+            check_in_lat=Decimal('25.2000000'), check_in_lng=Decimal('55.2700000'),
+            within_geofence=True, check_in_office=self.office,
+        )
+        self.new_site = Attendance.objects.create(
+            user=self.user, employee=self.employee, date_local=date(2026, 3, 3),
+            check_in_lat=Decimal('25.3000000'), check_in_lng=Decimal('55.2700000'),
+            within_geofence=False,
+        )
+        # The office moves about 11 km north
+        self.office.latitude = Decimal('25.3000000')
+        self.office.save()
+
+    def recheck(self, *args):
+        out = StringIO()
+        call_command('recheck_geofence', *args, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run_lists_changes_without_writing(self):
+        output = self.recheck('--dry-run')
+        self.assertIn(f'#{self.old_site.pk}: within_geofence True -> False, office {self.office.pk} -> None', output)
+        self.assertIn(f'#{self.new_site.pk}: within_geofence False -> True, office None -> {self.office.pk}', output)
+        self.old_site.refresh_from_db()
+        self.assertTrue(self.old_site.within_geofence)
+
+    def test_flags_are_rewritten_and_my_day_invalidated(self):
+        with mock.patch(
+            'apps.attendance.management.commands.recheck_geofence.invalidate_my_day'
+        ) as invalidate:
+            self.recheck()
+        self.old_site.refresh_from_db()
+        self.new_site.refresh_from_db()
+        self.assertFalse(self.old_site.within_geofence)
+        self.assertIsNone(self.old_site.check_in_office_id)
+        self.assertTrue(self.new_site.within_geofence)
+        self.assertEqual(self.new_site.check_in_office_id, self.office.pk)
+        invalidate.assert_called_once_with({self.user.pk})
+
+    def test_date_range_limits_rows(self):
+        self.recheck('--start-date', '2026-03-03', '--end-date', '2026-03-03')
+        self.old_site.refresh_from_db()
+        self.new_site.refresh_from_db()
+        self.assertTrue(self.old_site.within_geofence)
+        self.assertTrue(self.new_site.within_geofence)
+
+    def test_invalid_date_is_rejected(self):
+        with self.assertRaises(CommandError):
+            self.recheck('--start-date', '2026-13-01')
@@ -19,6 +19,9 @@ employee_router = DefaultRouter()
 employee_router.register(r'attendance', views.EmployeeAttendanceViewSet, basename='employee-attendance')
 
 urlpatterns = [
+    # Batch punch ingestion (kiosks, offline clients)
+    path('punches/batch/', views.punch_batch, name='attendance-punch-batch'),
+    
     # Main endpoints
     path('', include(router.urls)),
     
@@ -0,0 +1,147 @@
+"""
+``Idempotency-Key`` support for state-changing DRF actions.
+
+Decorate an action with ``@idempotent_action()`` (below ``@action``). The
+first request carrying a given key reserves an ``IdempotencyRecord`` row,
+runs the action and stores its response; retries with the same key get
+the stored response back without reaching the service layer. A retry that
+arrives while the first request is still running gets 409, and reusing a
+key for a different request gets 422. A reservation that never completed
+(the worker died mid-request) is taken over once it is older than
+``IDEMPOTENCY_PROCESSING_TIMEOUT_SECONDS``. Requests without the header
+behave exactly as before.
+"""
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyRecord
+
+
+IDEMPOTENCY_HEADER = 'HTTP_IDEMPOTENCY_KEY'
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_PROCESSING_TIMEOUT_SECONDS = 60
+MAX_KEY_LENGTH = 128
+
+
+def _ttl_seconds():
+    return getattr(settings, 'IDEMPOTENCY_KEY_TTL_SECONDS', DEFAULT_TTL_SECONDS)
+
+
+def _processing_timeout_seconds():
+    return getattr(settings, 'IDEMPOTENCY_PROCESSING_TIMEOUT_SECONDS', DEFAULT_PROCESSING_TIMEOUT_SECONDS)
+
+
+def _request_hash(request):
+    try:
+        payload = json.dumps(request.data, sort_keys=True, default=str)
+    except Exception:
+        payload = repr(request.data)
+    return hashlib.sha256(f"{request.method} {request.path}\n{payload}".encode()).hexdigest()
+
+
+def _stored_response(record):
+    response = Response(record.response_body, status=record.status_code)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _reserve(request, key, request_hash):
+    """
+    Reserve ``key`` for this request.
+
+    Returns ``(record, None)`` when the caller should run the action, or
+    ``(None, response)`` when the request is a replay or a conflict.
+    """
+    now = timezone.now()
+    scope = f"{request.method} {request.path}"[:255]
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                record = IdempotencyRecord.objects.create(
+                    user=request.user,
+                    key=key,
+                    scope=scope,
+                    request_hash=request_hash,
+                    expires_at=now + timedelta(seconds=_ttl_seconds()),
+                )
+            return record, None
+        except IntegrityError:
+            existing = IdempotencyRecord.objects.filter(user=request.user, key=key).first()
+            if existing is None:
+                # Deleted between the insert and the lookup; try once more
+                continue
+            if existing.expires_at <= now:
+                existing.delete()
+                continue
+            lease_cutoff = now - timedelta(seconds=_processing_timeout_seconds())
+            if not existing.is_complete and existing.created_at <= lease_cutoff:
+                # The request holding the key never finished (worker killed);
+                # only one retry wins the delete, the others see the new row
+                IdempotencyRecord.objects.filter(
+                    pk=existing.pk, status_code__isnull=True, created_at__lte=lease_cutoff
+                ).delete()
+                continue
+            if existing.request_hash != request_hash:
+                return None, Response(
+                    {"error": "Idempotency-Key sudah digunakan untuk permintaan lain."},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                )
+            if not existing.is_complete:
+                return None, Response(
+                    {"error": "Permintaan dengan Idempotency-Key ini masih diproses."},
+                    status=status.HTTP_409_CONFLICT
+                )
+            return None, _stored_response(existing)
+    return None, Response(
+        {"error": "Permintaan dengan Idempotency-Key ini masih diproses."},
+        status=status.HTTP_409_CONFLICT
+    )
+
+
+def idempotent_action():
+    """Decorator making a DRF viewset action honour the ``Idempotency-Key`` header"""
+    def decorator(view_method):
+        @functools.wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            key = request.META.get(IDEMPOTENCY_HEADER)
+            if not key or not request.user or not request.user.is_authenticated:
+                return view_method(self, request, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return Response(
+                    {"error": f"Idempotency-Key maksimal {MAX_KEY_LENGTH} karakter."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            record, replay = _reserve(request, key, _request_hash(request))
+            if replay is not None:
+                return replay
+
+            try:
+                response = view_method(self, request, *args, **kwargs)
+            except Exception:
+                record.delete()
+                raise
+
+            data = getattr(response, 'data', None)
+            if response.status_code >= 500 or not isinstance(data, (dict, list)):
+                # Server errors and non-JSON responses are not remembered; the client may retry
+                record.delete()
+                return response
+
+            # update() rather than save(): if this request outlived its lease the
+            # row may already have been taken over by a retry
+            IdempotencyRecord.objects.filter(pk=record.pk).update(
+                status_code=response.status_code,
+                response_body=json.loads(json.dumps(data, default=str)),
+            )
+            return response
+        return wrapper
+    return decorator
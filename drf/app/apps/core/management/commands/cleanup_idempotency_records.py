@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.core.models import IdempotencyRecord
+
+
+class Command(BaseCommand):
+    help = 'Delete expired Idempotency-Key records'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show how many records would be deleted without deleting them',
+        )
+
+    def handle(self, *args, **options):
+        expired = IdempotencyRecord.objects.filter(expires_at__lte=timezone.now())
+
+        if options['dry_run']:
+            self.stdout.write(
+                self.style.WARNING('DRY RUN MODE - No changes will be made')
+            )
+            self.stdout.write(f'Would delete {expired.count()} expired idempotency records')
+            return
+
+        deleted, _ = expired.delete()
+        self.stdout.write(
+            self.style.SUCCESS(f'Deleted {deleted} expired idempotency records')
+        )
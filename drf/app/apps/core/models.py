@@ -186,3 +186,39 @@ class GroupPermissionTemplate(models.Model):
                     permission_action=perm_action,
                     is_active=True
                 )
+
+
+class IdempotencyRecord(models.Model):
+    """
+    Stored response of a state-changing request sent with an ``Idempotency-Key`` header.
+    Retries with the same key get this response back instead of re-running the action.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='idempotency_records',
+    )
+    key = models.CharField(max_length=128)
+    scope = models.CharField(
+        max_length=255,
+        help_text="HTTP method and path the key was first used with",
+    )
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        verbose_name = "Idempotency Record"
+        verbose_name_plural = "Idempotency Records"
+        constraints = [
+            models.UniqueConstraint(fields=["user", "key"], name="uniq_idempotency_user_key"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.key} ({self.scope})"
+
+    @property
+    def is_complete(self):
+        return self.status_code is not None
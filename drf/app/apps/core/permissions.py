@@ -4,10 +4,7 @@ from rest_framework import permissions
 class IsAdmin(permissions.BasePermission):
     """Allow access only to admin users"""
     def has_permission(self, request, view):
-        return request.user.is_authenticated and (
-            request.user.is_superuser or 
-            request.user.groups.filter(name='admin').exists()
-        )
+        return request.principal.is_admin
 
 
 class IsSupervisor(permissions.BasePermission):
@@ -16,25 +13,20 @@ class IsSupervisor(permissions.BasePermission):
         if not request.user.is_authenticated:
             return False
         
+        principal = request.principal
+        
         # Check if user has supervisor group
-        if request.user.groups.filter(name='supervisor').exists():
+        if principal.is_supervisor:
             return True
         
         # Check if user has approval capabilities (for multi-position users)
-        if hasattr(request.user, 'employee_profile'):
-            employee = request.user.employee_profile
-            approval_capabilities = employee.get_approval_capabilities()
-            return approval_capabilities.get('approval_level', 0) > 0
-        
-        return False
+        return principal.capabilities.get('approval_level', 0) > 0
 
 
 class IsEmployee(permissions.BasePermission):
     """Allow access only to employee users"""
     def has_permission(self, request, view):
-        return request.user.is_authenticated and (
-            request.user.groups.filter(name='employee').exists()
-        )
+        return request.user.is_authenticated and request.principal.has_role('employee')
 
 
 class IsOwnerOrAdmin(permissions.BasePermission):
@@ -53,8 +45,9 @@ class IsDivisionMemberOrAdmin(permissions.BasePermission):
         
         # Check if user is in the same division
         if hasattr(obj, 'division') and obj.division:
-            if hasattr(request.user, 'employee_profile') and request.user.employee_profile.division:
-                return obj.division == request.user.employee_profile.division
+            division = request.principal.division
+            if division:
+                return obj.division == division
             return False
         return False
 
@@ -64,7 +57,7 @@ class IsAdminOrSupervisor(permissions.BasePermission):
     def has_permission(self, request, view):
         return request.user.is_authenticated and (
             request.user.is_superuser or 
-            request.user.groups.filter(name__in=['admin', 'supervisor']).exists()
+            request.principal.has_role('admin', 'supervisor')
         )
 
 
@@ -73,7 +66,4 @@ class IsAdminOrReadOnly(permissions.BasePermission):
     def has_permission(self, request, view):
         if request.method in permissions.SAFE_METHODS:
             return True
-        return request.user.is_authenticated and (
-            request.user.is_superuser or 
-            request.user.groups.filter(name='admin').exists()
-        )
+        return request.principal.is_admin
@@ -0,0 +1,208 @@
+"""
+Per-request view of "who is calling": roles, employee, division, active
+position and approval capabilities.
+
+Views and permission classes used to ask the database the same questions
+several times per request (``user.groups.filter(name='admin').exists()``,
+``user.employee_profile.division``, ``get_approval_capabilities()``...).
+``PrincipalMiddleware`` attaches a lazy ``request.principal`` instead; each
+attribute is loaded on first use and then reused for the rest of the
+request:
+
+- ``roles``: one query for the user's group names
+- ``employee`` / ``division``: one query (employee + division, legacy
+  position and active position joined)
+- ``capabilities`` / ``active_position``: one query for the active
+  position assignments
+
+DRF authenticates inside the view, so the principal must not be read
+before authentication has run (permission checks, ``get_queryset`` and
+action bodies are all fine).
+"""
+from functools import cached_property
+
+
+class Principal:
+    """Roles, employee profile and approval capabilities of one user"""
+
+    def __init__(self, user):
+        self.user = user
+
+    @property
+    def is_authenticated(self):
+        return bool(self.user and self.user.is_authenticated)
+
+    @cached_property
+    def roles(self):
+        """Group names of the user, as a frozenset"""
+        if not self.is_authenticated:
+            return frozenset()
+        return frozenset(self.user.groups.values_list('name', flat=True))
+
+    def has_role(self, *names):
+        """True if the user is in any of the given groups"""
+        return not self.roles.isdisjoint(names)
+
+    @property
+    def is_admin(self):
+        return self.is_authenticated and (self.user.is_superuser or 'admin' in self.roles)
+
+    @property
+    def is_supervisor(self):
+        return 'supervisor' in self.roles
+
+    @property
+    def is_employee(self):
+        return 'pegawai' in self.roles
+
+    @property
+    def is_kiosk(self):
+        """Shared attendance terminal that submits punches on behalf of employees"""
+        return 'kiosk' in self.roles
+
+    @cached_property
+    def employee(self):
+        """The user's Employee profile (or None), with division and positions joined"""
+        if not self.is_authenticated:
+            return None
+        from apps.employees.models import Employee
+
+        employee = (
+            Employee.objects
+            .select_related('user', 'division', 'position', 'active_position__position')
+            .filter(user_id=self.user.pk)
+            .first()
+        )
+        if employee is not None:
+            # Prime the reverse accessor so request.user.employee_profile is free too
+            self.user.employee_profile = employee
+        return employee
+
+    @property
+    def division(self):
+        return self.employee.division if self.employee else None
+
+    @property
+    def division_id(self):
+        return self.employee.division_id if self.employee else None
+
+    @cached_property
+    def _assignments(self):
+        """Active EmployeePosition rows (model ordering: primary first)"""
+        if self.employee is None:
+            return []
+        return list(self.employee.employee_positions.filter(is_active=True).select_related('position'))
+
+    @property
+    def active_assignments(self):
+        """Assignments that are active and currently effective (Employee.get_active_position_assignments)"""
+        return [a for a in self._assignments if a.is_currently_effective()]
+
+    @cached_property
+    def active_position(self):
+        """Current position context (Employee.get_current_active_position)"""
+        employee = self.employee
+        if employee is None:
+            return None
+        if employee.active_position and employee.active_position.is_currently_effective():
+            return employee.active_position
+        primary = next((a for a in self._assignments if a.is_primary), None)
+        if primary:
+            return primary
+        active = self.active_assignments
+        return active[0] if active else None
+
+    @cached_property
+    def capabilities(self):
+        """Combined capabilities of all active positions (Employee.get_approval_capabilities)"""
+        positions = [a.position for a in self.active_assignments]
+        if not positions and self.employee and self.employee.position:
+            # Fallback to legacy position
+            positions = [self.employee.position]
+        return {
+            'approval_level': max((p.approval_level or 0 for p in positions), default=0),
+            'can_approve_overtime_org_wide': any(p.can_approve_overtime_org_wide for p in positions),
+            'active_positions': [
+                {
+                    'id': p.id,
+                    'name': p.name,
+                    'approval_level': p.approval_level,
+                    'can_approve_overtime_org_wide': p.can_approve_overtime_org_wide
+                }
+                for p in positions
+            ],
+        }
+
+    @property
+    def context_capabilities(self):
+        """Capabilities of the current position context (Employee.get_current_context_capabilities)"""
+        assignment = self.active_position
+        if assignment is None:
+            return {
+                'approval_level': 0,
+                'can_approve_overtime_org_wide': False,
+                'active_position': None,
+                'context': 'no_positions'
+            }
+        pos = assignment.position
+        return {
+            'approval_level': pos.approval_level,
+            'can_approve_overtime_org_wide': pos.can_approve_overtime_org_wide,
+            'active_position': {
+                'id': pos.id,
+                'name': pos.name,
+                'approval_level': pos.approval_level,
+                'can_approve_overtime_org_wide': pos.can_approve_overtime_org_wide
+            },
+            'context': 'active_position'
+        }
+
+    @property
+    def approval_level(self):
+        """0 = none, 1 = division, 2 = organization; superusers are organization level"""
+        if self.is_authenticated and self.user.is_superuser:
+            return 2
+        return self.capabilities['approval_level']
+
+    @property
+    def can_approve_overtime_org_wide(self):
+        if self.is_authenticated and self.user.is_superuser:
+            return True
+        return self.capabilities['can_approve_overtime_org_wide']
+
+
+def get_principal(request):
+    """
+    Return the Principal for ``request``'s current user.
+
+    Rebuilt if the user changes (e.g. DRF authentication replaced the
+    anonymous user after the principal was first read).
+    """
+    user = getattr(request, 'user', None)
+    principal = request.__dict__.get('_principal')
+    if principal is None or principal.user is not user:
+        principal = Principal(user)
+        request.__dict__['_principal'] = principal
+    return principal
+
+
+class LazyPrincipal:
+    """``request.principal``: every attribute access goes through get_principal"""
+    __slots__ = ('_request',)
+
+    def __init__(self, request):
+        self._request = request
+
+    def __getattr__(self, name):
+        return getattr(get_principal(self._request), name)
+
+
+class PrincipalMiddleware:
+    """Attach a lazy ``request.principal`` to every request"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.principal = LazyPrincipal(request)
+        return self.get_response(request)
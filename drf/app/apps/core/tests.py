@@ -0,0 +1,78 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+from .idempotency import idempotent_action
+from .models import IdempotencyRecord
+
+
+class CountingView(APIView):
+    """Echoes the payload and counts how many times the action really ran"""
+    calls = 0
+
+    @idempotent_action()
+    def post(self, request):
+        CountingView.calls += 1
+        return Response({'calls': CountingView.calls, 'data': request.data}, status=201)
+
+
+class IdempotentActionTests(TestCase):
+
+    def setUp(self):
+        CountingView.calls = 0
+        self.user = User.objects.create_user('pegawai1', password='pw')
+        self.factory = APIRequestFactory()
+
+    def post(self, payload, key='key-1'):
+        request = self.factory.post('/api/v2/things/', payload, format='json', HTTP_IDEMPOTENCY_KEY=key)
+        force_authenticate(request, user=self.user)
+        return CountingView.as_view()(request)
+
+    def test_retry_replays_stored_response(self):
+        first = self.post({'a': 1})
+        second = self.post({'a': 1})
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(CountingView.calls, 1)
+
+    def test_reused_key_with_different_payload_is_rejected(self):
+        self.post({'a': 1})
+        response = self.post({'a': 2})
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(CountingView.calls, 1)
+
+    def test_retry_while_processing_conflicts(self):
+        self.post({'a': 1})
+        IdempotencyRecord.objects.update(status_code=None, response_body=None)
+
+        response = self.post({'a': 1})
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(CountingView.calls, 1)
+
+    def test_abandoned_reservation_is_taken_over(self):
+        self.post({'a': 1})
+        # The first worker died before storing its response
+        IdempotencyRecord.objects.update(
+            status_code=None,
+            response_body=None,
+            created_at=timezone.now() - timedelta(minutes=5),
+        )
+
+        with self.settings(IDEMPOTENCY_PROCESSING_TIMEOUT_SECONDS=60):
+            response = self.post({'a': 1})
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(CountingView.calls, 2)
+        record = IdempotencyRecord.objects.get()
+        self.assertEqual(record.status_code, 201)
+        self.assertEqual(record.response_body['calls'], 2)
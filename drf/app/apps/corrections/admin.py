@@ -1,6 +1,8 @@
 from django.contrib import admin
 from .models import AttendanceCorrection
 from django.utils import timezone
+from apps.approvals.models import ApprovalWorkItem
+from apps.approvals.services import sync_work_items_by_id
 
 
 @admin.register(AttendanceCorrection)
@@ -67,11 +69,13 @@ class AttendanceCorrectionAdmin(admin.ModelAdmin):
     
     def approve_corrections(self, request, queryset):
         """Approve selected corrections"""
+        ids = list(queryset.values_list('id', flat=True))
         updated = queryset.update(
             status='approved',
             approved_by=request.user,
             approved_at=timezone.now()
         )
+        sync_work_items_by_id(ApprovalWorkItem.KIND_CORRECTION, ids)
         self.message_user(
             request, 
             f"Successfully approved {updated} correction(s)"
@@ -80,7 +84,9 @@ class AttendanceCorrectionAdmin(admin.ModelAdmin):
     
     def reject_corrections(self, request, queryset):
         """Reject selected corrections"""
+        ids = list(queryset.values_list('id', flat=True))
         updated = queryset.update(status='rejected')
+        sync_work_items_by_id(ApprovalWorkItem.KIND_CORRECTION, ids)
         self.message_user(
             request, 
             f"Successfully rejected {updated} correction(s)"
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.2 on 2026-10-17 04:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0006_attendance_keyset_index'),
+        ('corrections', '0003_fix_employee_cascade_deletion'),
+        ('employees', '0004_add_active_position_switching'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendancecorrection',
+            index=models.Index(fields=['created_at', 'id'], name='corrections_created_bbd4b2_idx'),
+        ),
+    ]
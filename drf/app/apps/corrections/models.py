@@ -116,6 +116,9 @@ class AttendanceCorrection(TimeStampedModel):
     
     class Meta:
         ordering = ['-requested_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
         verbose_name = "Attendance Correction"
         verbose_name_plural = "Attendance Corrections"
     
@@ -172,10 +175,10 @@ class AttendanceCorrection(TimeStampedModel):
         attendance = self.attendance
         if not attendance and self.date_local:
             # Get or create attendance record for manual correction
-            from apps.settings.models import WorkSettings
+            from apps.settings.snapshot import get_work_settings
             from django.utils import timezone as dj_timezone
             
-            ws = WorkSettings.objects.first()
+            ws = get_work_settings()
             tzname = ws.timezone if ws else dj_timezone.get_current_timezone_name()
             
             attendance, created = Attendance.objects.get_or_create(
@@ -92,10 +92,10 @@ class AttendanceCorrectionSerializer(serializers.ModelSerializer):
         
         # Convert proposed times back to local timezone for display
         if instance.requested_check_in:
-            from apps.settings.models import WorkSettings
+            from apps.settings.snapshot import get_work_settings
             import pytz
             
-            ws = WorkSettings.objects.first()
+            ws = get_work_settings()
             tz_name = ws.timezone if ws else 'Asia/Dubai'
             tz = pytz.timezone(tz_name)
             
@@ -104,10 +104,10 @@ class AttendanceCorrectionSerializer(serializers.ModelSerializer):
             data['proposed_check_in_local'] = local_check_in.isoformat()
             
         if instance.requested_check_out:
-            from apps.settings.models import WorkSettings
+            from apps.settings.snapshot import get_work_settings
             import pytz
             
-            ws = WorkSettings.objects.first()
+            ws = get_work_settings()
             tz_name = ws.timezone if ws else 'Asia/Dubai'
             tz = pytz.timezone(tz_name)
             
@@ -210,10 +210,10 @@ class AttendanceCorrectionCreateUpdateSerializer(serializers.ModelSerializer):
         
         if date_local:
             # Get work settings timezone
-            from apps.settings.models import WorkSettings
+            from apps.settings.snapshot import get_work_settings
             import pytz
             
-            ws = WorkSettings.objects.first()
+            ws = get_work_settings()
             tz_name = ws.timezone if ws else 'Asia/Dubai'
             tz = pytz.timezone(tz_name)
             
@@ -9,6 +9,8 @@ from .serializers import (
     AttendanceCorrectionCreateUpdateSerializer, AttendanceCorrectionApprovalSerializer,
     AttendanceCorrectionListSerializer
 )
+from api.pagination import KeysetPagination
+from apps.core.idempotency import idempotent_action
 from apps.core.permissions import IsAdmin, IsSupervisor, IsEmployee, IsAdminOrSupervisor
 
 
@@ -16,27 +18,29 @@ class AttendanceCorrectionViewSet(viewsets.ModelViewSet):
     """Attendance correction management ViewSet with role-based access"""
     serializer_class = AttendanceCorrectionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
     
     def get_serializer_class(self):
         """Return appropriate serializer based on user role and action"""
         if self.action in ['create', 'update', 'partial_update']:
             return AttendanceCorrectionCreateUpdateSerializer
-        elif self.request.user.is_superuser or self.request.user.groups.filter(name='admin').exists():
+        elif self.request.principal.is_admin:
             return AttendanceCorrectionAdminSerializer
-        elif self.request.user.groups.filter(name='supervisor').exists():
+        elif self.request.principal.is_supervisor:
             return AttendanceCorrectionSupervisorSerializer
         else:
             return AttendanceCorrectionEmployeeSerializer
     
     def get_queryset(self):
         """Filter corrections based on user role"""
-        if self.request.user.is_superuser or self.request.user.groups.filter(name='admin').exists():
+        if self.request.principal.is_admin:
             return AttendanceCorrection.objects.all()
-        elif self.request.user.groups.filter(name='supervisor').exists():
+        elif self.request.principal.is_supervisor:
             # Supervisors can see corrections of employees in their division
-            if hasattr(self.request.user, 'employee_profile') and self.request.user.employee_profile.division:
+            if self.request.principal.division:
                 return AttendanceCorrection.objects.filter(
-                    employee__division=self.request.user.employee_profile.division
+                    employee__division=self.request.principal.division
                 )
             return AttendanceCorrection.objects.none()
         else:
@@ -75,10 +79,11 @@ class AttendanceCorrectionViewSet(viewsets.ModelViewSet):
             serializer.save(user=self.request.user)
     
     @action(detail=True, methods=['post'])
+    @idempotent_action()
     def approve(self, request, pk=None):
         """Approve or reject a correction request"""
         if not (request.user.is_superuser or 
-                request.user.groups.filter(name__in=['admin', 'supervisor']).exists()):
+                request.principal.has_role('admin', 'supervisor')):
             return Response(
                 {"error": "Only admins and supervisors can approve corrections"}, 
                 status=status.HTTP_403_FORBIDDEN
@@ -110,13 +115,17 @@ class AttendanceCorrectionViewSet(viewsets.ModelViewSet):
     def pending(self, request):
         """Get pending corrections for approval"""
         if not (request.user.is_superuser or 
-                request.user.groups.filter(name__in=['admin', 'supervisor']).exists()):
+                request.principal.has_role('admin', 'supervisor')):
             return Response(
                 {"error": "Only admins and supervisors can view pending corrections"}, 
                 status=status.HTTP_403_FORBIDDEN
             )
         
         queryset = self.get_queryset().filter(status='pending')
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = AttendanceCorrectionListSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         serializer = AttendanceCorrectionListSerializer(queryset, many=True)
         return Response(serializer.data)
     
@@ -124,6 +133,10 @@ class AttendanceCorrectionViewSet(viewsets.ModelViewSet):
     def my_corrections(self, request):
         """Get current user's correction requests"""
         queryset = AttendanceCorrection.objects.filter(user=request.user)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
     
@@ -136,6 +149,10 @@ class AttendanceCorrectionViewSet(viewsets.ModelViewSet):
         else:
             queryset = self.get_queryset()
         
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = AttendanceCorrectionListSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         serializer = AttendanceCorrectionListSerializer(queryset, many=True)
         return Response(serializer.data)
     
@@ -388,12 +405,12 @@ class SupervisorAttendanceCorrectionViewSet(AttendanceCorrectionViewSet):
     
     def get_queryset(self):
         # Admin can see all corrections
-        if self.request.user.is_superuser or self.request.user.groups.filter(name='admin').exists():
+        if self.request.principal.is_admin:
             return AttendanceCorrection.objects.all().select_related('user', 'employee', 'attendance')
         
         # Supervisors can see corrections of employees in their division
-        if hasattr(self.request.user, 'employee_profile'):
-            employee = self.request.user.employee_profile
+        employee = self.request.principal.employee
+        if employee:
             
             # Use employee's division (positions don't have division field)
             if employee.division:
@@ -0,0 +1,18 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Employee
+
+
+@receiver(post_save, sender=get_user_model())
+def touch_employee_on_user_change(sender, instance, update_fields=None, **kwargs):
+    """
+    User has no updated_at, so a renamed user would not change the ETag of
+    lists that nest it (api.conditional). Touch the user's Employee, which
+    those lists already fold in. Logins only update last_login.
+    """
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    Employee.objects.filter(user_id=instance.pk).update(updated_at=timezone.now())
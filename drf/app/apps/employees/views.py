@@ -15,22 +15,24 @@ from .serializers import (
     PositionAssignmentSerializer, BulkPositionAssignmentSerializer, SetPrimaryPositionSerializer
 )
 from apps.core.permissions import IsAdmin, IsSupervisor, IsEmployee, IsAdminOrReadOnly
+from api.conditional import ConditionalGetMixin
 
 
-class DivisionViewSet(viewsets.ModelViewSet):
+class DivisionViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """Division management ViewSet"""
+    reference_data = True
     queryset = Division.objects.all()
     serializer_class = DivisionSerializer
     permission_classes = [permissions.AllowAny]  # Allow read access for testing
     
     def get_queryset(self):
         """Filter divisions based on user role"""
-        if self.request.user.is_superuser or self.request.user.groups.filter(name='admin').exists():
+        if self.request.principal.is_admin:
             return Division.objects.all()
         
         # For other users, return divisions they have access to
-        if hasattr(self.request.user, 'employee_profile') and self.request.user.employee_profile.division:
-            return Division.objects.filter(id=self.request.user.employee_profile.division.id)
+        if self.request.principal.division:
+            return Division.objects.filter(id=self.request.principal.division.id)
         
         # For anonymous users or users without specific access, return all divisions (read-only)
         return Division.objects.all()
@@ -42,20 +44,22 @@ class DivisionViewSet(viewsets.ModelViewSet):
         return DivisionSerializer
 
 
-class PositionViewSet(viewsets.ModelViewSet):
+class PositionViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """Position management ViewSet"""
+    reference_data = True
     queryset = Position.objects.all()
     serializer_class = PositionSerializer
     permission_classes = [IsAdminOrReadOnly]
     
     def get_queryset(self):
         """Filter positions based on user role"""
-        if self.request.user.is_superuser or self.request.user.groups.filter(name='admin').exists():
+        if self.request.principal.is_admin:
             return Position.objects.all()
         
         # For other users, return positions they have access to
-        if hasattr(self.request.user, 'employee_profile') and self.request.user.employee_profile.position:
-            return Position.objects.filter(id=self.request.user.employee_profile.position.id)
+        employee = self.request.principal.employee
+        if employee and employee.position_id:
+            return Position.objects.filter(id=employee.position_id)
         
         return Position.objects.none()
     
@@ -66,30 +70,31 @@ class PositionViewSet(viewsets.ModelViewSet):
         return PositionSerializer
 
 
-class EmployeeViewSet(viewsets.ModelViewSet):
+class EmployeeViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """Employee management ViewSet with role-based access"""
+    etag_related_models = (Division, Position, EmployeePosition)
     queryset = Employee.objects.all()
     permission_classes = [permissions.IsAuthenticated]
     
     def get_serializer_class(self):
         """Return appropriate serializer based on user role"""
-        if self.request.user.is_superuser or self.request.user.groups.filter(name='admin').exists():
+        if self.request.principal.is_admin:
             if self.action in ['create', 'update', 'partial_update']:
                 return EmployeeCreateUpdateSerializer
             return EmployeeAdminSerializer
-        elif self.request.user.groups.filter(name='supervisor').exists():
+        elif self.request.principal.is_supervisor:
             return EmployeeSupervisorSerializer
         else:
             return EmployeeEmployeeSerializer
     
     def get_queryset(self):
         """Filter employees based on user role"""
-        if self.request.user.is_superuser or self.request.user.groups.filter(name='admin').exists():
+        if self.request.principal.is_admin:
             return Employee.objects.all()
-        elif self.request.user.groups.filter(name='supervisor').exists():
+        elif self.request.principal.is_supervisor:
             # Supervisors can see employees in their division
-            if hasattr(self.request.user, 'employee_profile') and self.request.user.employee_profile.division:
-                return Employee.objects.filter(division=self.request.user.employee_profile.division)
+            if self.request.principal.division:
+                return Employee.objects.filter(division=self.request.principal.division)
             return Employee.objects.none()
         else:
             # Regular employees can only see themselves
@@ -167,15 +172,12 @@ class EmployeeViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def my_approval_capabilities(self, request):
         """Get current user's approval capabilities"""
-        try:
-            employee = request.user.employee_profile
-            capabilities = employee.get_approval_capabilities()
-            return Response(capabilities)
-        except Employee.DoesNotExist:
+        if not request.principal.employee:
             return Response(
                 {"error": "Employee profile not found"}, 
                 status=status.HTTP_404_NOT_FOUND
             )
+        return Response(request.principal.capabilities)
 
     @action(detail=False, methods=['get'])
     def available_contexts(self, request):
@@ -193,31 +195,30 @@ class EmployeeViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def current_context(self, request):
         """Get current position context and capabilities"""
-        try:
-            employee = request.user.employee_profile
-            context_capabilities = employee.get_current_context_capabilities()
-            current_assignment = employee.get_current_active_position()
-            
-            response_data = {
-                **context_capabilities,
-                'current_assignment': {
-                    'id': current_assignment.id,
-                    'position': {
-                        'id': current_assignment.position.id,
-                        'name': current_assignment.position.name,
-                        'approval_level': current_assignment.position.approval_level,
-                        'can_approve_overtime_org_wide': current_assignment.position.can_approve_overtime_org_wide
-                    },
-                    'is_primary': current_assignment.is_primary
-                } if current_assignment else None
-            }
-            
-            return Response(response_data)
-        except Employee.DoesNotExist:
+        if not request.principal.employee:
             return Response(
                 {"error": "Employee profile not found"}, 
                 status=status.HTTP_404_NOT_FOUND
             )
+        
+        context_capabilities = request.principal.context_capabilities
+        current_assignment = request.principal.active_position
+        
+        response_data = {
+            **context_capabilities,
+            'current_assignment': {
+                'id': current_assignment.id,
+                'position': {
+                    'id': current_assignment.position.id,
+                    'name': current_assignment.position.name,
+                    'approval_level': current_assignment.position.approval_level,
+                    'can_approve_overtime_org_wide': current_assignment.position.can_approve_overtime_org_wide
+                },
+                'is_primary': current_assignment.is_primary
+            } if current_assignment else None
+        }
+        
+        return Response(response_data)
 
     @action(detail=False, methods=['post'])
     def switch_position(self, request):
@@ -251,8 +252,9 @@ class EmployeeViewSet(viewsets.ModelViewSet):
             )
 
 
-class EmployeePositionViewSet(viewsets.ModelViewSet):
+class EmployeePositionViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """Employee Position assignment management ViewSet"""
+    etag_related_models = (Position,)
     queryset = EmployeePosition.objects.all()
     serializer_class = EmployeePositionSerializer
     permission_classes = [IsAdmin]  # Only admins can manage position assignments by default
@@ -261,12 +263,12 @@ class EmployeePositionViewSet(viewsets.ModelViewSet):
         """Filter position assignments based on user role"""
         queryset = EmployeePosition.objects.select_related('employee', 'position', 'assigned_by')
         
-        if self.request.user.is_superuser or self.request.user.groups.filter(name='admin').exists():
+        if self.request.principal.is_admin:
             return queryset
-        elif self.request.user.groups.filter(name='supervisor').exists():
+        elif self.request.principal.is_supervisor:
             # Supervisors can see assignments in their division
-            if hasattr(self.request.user, 'employee_profile') and self.request.user.employee_profile.division:
-                return queryset.filter(employee__division=self.request.user.employee_profile.division)
+            if self.request.principal.division:
+                return queryset.filter(employee__division=self.request.principal.division)
             return queryset.none()
         else:
             # Regular employees can only see their own assignments
@@ -453,70 +455,78 @@ class AdminEmployeeViewSet(EmployeeViewSet):
         return context
 
 
-class SupervisorDivisionViewSet(viewsets.ReadOnlyModelViewSet):
+class SupervisorDivisionViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """Supervisor-specific division ViewSet (read-only)"""
+    reference_data = True
     queryset = Division.objects.all()
     serializer_class = DivisionSerializer
     permission_classes = [IsSupervisor]
     
     def get_queryset(self):
         # Supervisors can see their own division
-        if hasattr(self.request.user, 'employee_profile') and self.request.user.employee_profile.division:
-            return Division.objects.filter(id=self.request.user.employee_profile.division.id)
+        if self.request.principal.division:
+            return Division.objects.filter(id=self.request.principal.division.id)
         return Division.objects.none()
 
 
-class SupervisorPositionViewSet(viewsets.ReadOnlyModelViewSet):
+class SupervisorPositionViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """Supervisor-specific position ViewSet (read-only)"""
+    reference_data = True
     queryset = Position.objects.all()
     serializer_class = PositionSerializer
     permission_classes = [IsSupervisor]
     
     def get_queryset(self):
         # Supervisors can see their own position
-        if hasattr(self.request.user, 'employee_profile') and self.request.user.employee_profile.position:
-            return Position.objects.filter(id=self.request.user.employee_profile.position.id)
+        employee = self.request.principal.employee
+        if employee and employee.position_id:
+            return Position.objects.filter(id=employee.position_id)
         return Position.objects.none()
 
 
-class SupervisorEmployeeViewSet(viewsets.ReadOnlyModelViewSet):
+class SupervisorEmployeeViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """Supervisor-specific employee ViewSet (read-only)"""
+    etag_related_models = (Division, Position, EmployeePosition)
     serializer_class = EmployeeSupervisorSerializer
     permission_classes = [IsSupervisor]
     
     def get_queryset(self):
         # Supervisors can see employees in their division
-        if hasattr(self.request.user, 'employee_profile') and self.request.user.employee_profile.division:
-            return Employee.objects.filter(division=self.request.user.employee_profile.division)
+        if self.request.principal.division:
+            return Employee.objects.filter(division=self.request.principal.division)
         return Employee.objects.none()
 
 
-class EmployeeDivisionViewSet(viewsets.ReadOnlyModelViewSet):
+class EmployeeDivisionViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """Employee-specific division ViewSet (read-only)"""
+    reference_data = True
     serializer_class = DivisionSerializer
     permission_classes = [IsEmployee]
     
     def get_queryset(self):
         # Employees can only see their own division
-        if hasattr(self.request.user, 'employee_profile') and self.request.user.employee_profile.division:
-            return Division.objects.filter(id=self.request.user.employee_profile.division.id)
+        if self.request.principal.division:
+            return Division.objects.filter(id=self.request.principal.division.id)
         return Division.objects.none()
 
 
-class EmployeePositionReadOnlyViewSet(viewsets.ReadOnlyModelViewSet):
+class EmployeePositionReadOnlyViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """Employee-specific position ViewSet (read-only)"""
+    reference_data = True
     serializer_class = PositionSerializer
     permission_classes = [IsEmployee]
     
     def get_queryset(self):
         # Employees can only see their own position
-        if hasattr(self.request.user, 'employee_profile') and self.request.user.employee_profile.position:
-            return Position.objects.filter(id=self.request.user.employee_profile.position.id)
+        employee = self.request.principal.employee
+        if employee and employee.position_id:
+            return Position.objects.filter(id=employee.position_id)
         return Position.objects.none()
 
 
-class EmployeeEmployeeViewSet(viewsets.ReadOnlyModelViewSet):
+class EmployeeEmployeeViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """Employee-specific employee ViewSet (read-only)"""
+    etag_related_models = (Division, Position, EmployeePosition)
     serializer_class = EmployeeEmployeeSerializer
     permission_classes = [IsEmployee]
     
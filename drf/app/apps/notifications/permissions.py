@@ -149,13 +149,12 @@ class IsNotificationRecipient(permissions.BasePermission):
     
     def has_object_permission(self, request, view, obj):
         # Check if user is in target groups
-        user_groups = request.user.groups.all()
-        if obj.target_groups.filter(id__in=user_groups).exists():
+        if obj.target_groups.filter(name__in=request.principal.roles).exists():
             return True
         
         # Check if user is in target divisions
-        if hasattr(request.user, 'employee_profile'):
-            if obj.target_divisions.filter(id=request.user.employee_profile.division_id).exists():
+        if request.principal.employee:
+            if obj.target_divisions.filter(id=request.principal.division_id).exists():
                 return True
         
         # Check if user is specifically targeted
@@ -170,7 +169,7 @@ class IsNotificationOwnerOrAdmin(permissions.BasePermission):
     
     def has_object_permission(self, request, view, obj):
         # Admin bisa akses semua
-        if request.user.is_superuser or request.user.groups.filter(name='admin').exists():
+        if request.principal.is_admin:
             return True
         
         # User hanya bisa akses notifikasi yang mereka buat
@@ -185,7 +184,7 @@ class IsNotificationManager(permissions.BasePermission):
             return False
         
         # Admin always has permission
-        if request.user.is_superuser or request.user.groups.filter(name='admin').exists():
+        if request.principal.is_admin:
             return True
         
         # Check custom permission for notification management
@@ -207,7 +206,7 @@ class CanPublishNotification(permissions.BasePermission):
             return False
         
         # Admin can always publish
-        if request.user.is_superuser or request.user.groups.filter(name='admin').exists():
+        if request.principal.is_admin:
             return True
         
         # Others need notification create permission
@@ -222,7 +221,7 @@ class CanArchiveNotification(permissions.BasePermission):
             return False
         
         # Admin can always archive
-        if request.user.is_superuser or request.user.groups.filter(name='admin').exists():
+        if request.principal.is_admin:
             return True
         
         # Others need notification management permission
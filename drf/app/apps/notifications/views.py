@@ -16,17 +16,23 @@ from .permissions import (
     CanArchiveNotification, NotificationPermissionMixin
 )
 from .services import NotificationService
+from api.conditional import ConditionalGetMixin
+from api.pagination import KeysetPagination
 
 
-class AdminNotificationViewSet(viewsets.ModelViewSet):
+class AdminNotificationViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet untuk admin notification management"""
     permission_classes = [IsNotificationManager, IsNotificationTargetValidator]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
+    # Read counts are part of the payload
+    etag_related_models = (NotificationRead,)
     
     def get_queryset(self):
         user = self.request.user
         
         # Admin can see all
-        if user.is_superuser or user.groups.filter(name='admin').exists():
+        if self.request.principal.is_admin:
             return Notification.objects.all().select_related('created_by').prefetch_related(
                 'target_groups', 'target_divisions', 'target_positions', 'target_specific_users'
             )
@@ -75,7 +81,7 @@ class AdminNotificationViewSet(viewsets.ModelViewSet):
         elif target_divisions:
             user_division_id = None
             try:
-                user_division_id = request.user.employee_profile.division.id
+                user_division_id = request.principal.division_id
             except:
                 pass
             
@@ -97,7 +103,7 @@ class AdminNotificationViewSet(viewsets.ModelViewSet):
     def perform_update(self, serializer):
         # Only allow update if user owns the notification or is admin
         notification = self.get_object()
-        if (not (self.request.user.is_superuser or self.request.user.groups.filter(name='admin').exists()) 
+        if (not self.request.principal.is_admin 
             and notification.created_by != self.request.user):
             return Response({'error': 'Anda hanya dapat mengedit notifikasi yang Anda buat'}, 
                           status=status.HTTP_403_FORBIDDEN)
@@ -154,7 +160,7 @@ class AdminNotificationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def cleanup_expired(self, request):
         """Manually cleanup expired notifications"""
-        if not (request.user.is_superuser or request.user.groups.filter(name='admin').exists()):
+        if not request.principal.is_admin:
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
         
         try:
@@ -164,10 +170,16 @@ class AdminNotificationViewSet(viewsets.ModelViewSet):
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class UserNotificationViewSet(viewsets.ReadOnlyModelViewSet):
+class UserNotificationViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """ViewSet untuk user notifications (read-only)"""
     permission_classes = [IsNotificationViewer]
     serializer_class = UserNotificationSerializer
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-is_sticky', '-created_at', '-id')
+    
+    def get_etag_dependencies(self):
+        # is_read / read_at come from the user's own NotificationRead rows
+        return [NotificationRead.objects.filter(user=self.request.user)]
     
     def get_queryset(self):
         user = self.request.user
@@ -1,6 +1,8 @@
 from django.contrib import admin
 from .models import OvertimeRequest, MonthlySummaryRequest
 from django.utils import timezone
+from apps.approvals.models import ApprovalWorkItem
+from apps.approvals.services import sync_work_items_by_id
 
 
 @admin.register(OvertimeRequest)
@@ -64,11 +66,13 @@ class OvertimeRequestAdmin(admin.ModelAdmin):
     
     def approve_overtime(self, request, queryset):
         """Approve selected overtime requests"""
+        ids = list(queryset.values_list('id', flat=True))
         updated = queryset.update(
             status='approved',
             approved_by=request.user,
             approved_at=timezone.now()
         )
+        sync_work_items_by_id(ApprovalWorkItem.KIND_OVERTIME, ids)
         self.message_user(
             request, 
             f"Successfully approved {updated} overtime request(s)"
@@ -77,7 +81,9 @@ class OvertimeRequestAdmin(admin.ModelAdmin):
     
     def reject_overtime(self, request, queryset):
         """Reject selected overtime requests"""
+        ids = list(queryset.values_list('id', flat=True))
         updated = queryset.update(status='rejected')
+        sync_work_items_by_id(ApprovalWorkItem.KIND_OVERTIME, ids)
         self.message_user(
             request, 
             f"Successfully rejected {updated} overtime request(s)"
@@ -86,7 +92,9 @@ class OvertimeRequestAdmin(admin.ModelAdmin):
     
     def cancel_overtime(self, request, queryset):
         """Cancel selected overtime requests"""
+        ids = list(queryset.values_list('id', flat=True))
         updated = queryset.update(status='cancelled')
+        sync_work_items_by_id(ApprovalWorkItem.KIND_OVERTIME, ids)
         self.message_user(
             request, 
             f"Successfully cancelled {updated} overtime request(s)"
@@ -153,11 +161,13 @@ class MonthlySummaryRequestAdmin(admin.ModelAdmin):
     
     def approve_summaries(self, request, queryset):
         """Approve selected monthly summary requests"""
+        ids = list(queryset.values_list('id', flat=True))
         updated = queryset.update(
             status='approved',
             approved_by=request.user,
             approved_at=timezone.now()
         )
+        sync_work_items_by_id(ApprovalWorkItem.KIND_MONTHLY_SUMMARY, ids)
         self.message_user(
             request, 
             f"Successfully approved {updated} monthly summary request(s)"
@@ -166,7 +176,9 @@ class MonthlySummaryRequestAdmin(admin.ModelAdmin):
     
     def reject_summaries(self, request, queryset):
         """Reject selected monthly summary requests"""
+        ids = list(queryset.values_list('id', flat=True))
         updated = queryset.update(status='rejected')
+        sync_work_items_by_id(ApprovalWorkItem.KIND_MONTHLY_SUMMARY, ids)
         self.message_user(
             request, 
             f"Successfully rejected {updated} monthly summary request(s)"
@@ -0,0 +1,454 @@
+"""
+Overtime letters and monthly summaries as DOCX / PDF.
+
+The ``download`` / ``export_pdf`` / ``export_docx`` actions and the export
+worker (apps.reporting.exports) both go through this module: the actions
+with the object ``get_object()`` returned, the worker through the
+``render_*`` functions, which look the object up in what the job's user may
+see (the same role scoping as the viewsets' ``get_queryset``).
+"""
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .docx_templates import MONTHLY_SUMMARY_TEMPLATE, OVERTIME_TEMPLATE, docx_templates
+from .models import MonthlySummaryRequest, OvertimeRequest
+from .pdf_export import ConverterError, convert_docx_to_pdf
+
+
+DOCX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+
+def format_date_indonesian(date_obj, format_type='full'):
+    """
+    Format tanggal dalam bahasa Indonesia
+    format_type: 'full' (dd MMMM yyyy), 'short' (dd MMM yyyy), 'month_year' (MMMM yyyy)
+    """
+    if not date_obj:
+        return '-'
+    
+    # Nama bulan dalam bahasa Indonesia
+    bulan_indonesia = {
+        1: 'Januari', 2: 'Februari', 3: 'Maret', 4: 'April',
+        5: 'Mei', 6: 'Juni', 7: 'Juli', 8: 'Agustus',
+        9: 'September', 10: 'Oktober', 11: 'November', 12: 'Desember'
+    }
+    
+    # Nama bulan singkat dalam bahasa Indonesia
+    bulan_singkat = {
+        1: 'Jan', 2: 'Feb', 3: 'Mar', 4: 'Apr',
+        5: 'Mei', 6: 'Jun', 7: 'Jul', 8: 'Agu',
+        9: 'Sep', 10: 'Okt', 11: 'Nov', 12: 'Des'
+    }
+    
+    if format_type == 'full':
+        return f"{date_obj.day:02d} {bulan_indonesia[date_obj.month]} {date_obj.year}"
+    elif format_type == 'short':
+        return f"{date_obj.day:02d} {bulan_singkat[date_obj.month]} {date_obj.year}"
+    elif format_type == 'month_year':
+        return f"{bulan_indonesia[date_obj.month]} {date_obj.year}"
+    else:
+        return str(date_obj)
+
+
+# Supervisor scope meaning "every division" (see supervised_division_scope)
+ALL_DIVISIONS = object()
+
+
+def supervised_division_scope(principal):
+    """
+    Divisions whose overtime requests the user supervises: ALL_DIVISIONS,
+    a division id, or None.
+    """
+    if principal.is_admin:
+        return ALL_DIVISIONS
+    # Supervisors see the requests of employees in their division;
+    # with org-wide approval, all overtime requests
+    employee = principal.employee
+    if employee and employee.position:
+        if employee.position.can_approve_overtime_org_wide:
+            return ALL_DIVISIONS
+        if principal.division_id:
+            return principal.division_id
+    return None
+
+
+def overtime_requests_visible_to(principal):
+    """Overtime requests ``principal`` may see, by role"""
+    queryset = OvertimeRequest.objects.all()
+    if principal.is_admin:
+        return queryset
+    if principal.is_supervisor:
+        scope = supervised_division_scope(principal)
+        if scope is ALL_DIVISIONS:
+            return queryset
+        if scope is not None:
+            return queryset.filter(employee__division_id=scope)
+        return queryset.none()
+    # Regular employees can only see their own overtime requests
+    return queryset.filter(user=principal.user)
+
+
+def monthly_summaries_visible_to(principal):
+    """Monthly summary requests ``principal`` may see, by role"""
+    if principal.is_admin:
+        return MonthlySummaryRequest.objects.all()
+    if principal.is_supervisor:
+        # Mirror overtime visibility: org-wide supervisors see all; else only their division
+        employee = principal.employee
+        if employee and employee.position:
+            if employee.position.can_approve_overtime_org_wide:
+                return MonthlySummaryRequest.objects.all()
+            if principal.division:
+                return MonthlySummaryRequest.objects.filter(employee__division=principal.division)
+        return MonthlySummaryRequest.objects.none()
+    # Regular employees can only see their own monthly summary requests
+    return MonthlySummaryRequest.objects.filter(user=principal.user)
+
+
+def generate_overtime_docx(overtime_request):
+    """Generate DOCX bytes for the overtime_request. Returns (bytes, filename)."""
+    try:
+        import docx  # noqa: F401
+    except Exception:
+        raise RuntimeError('python-docx is not installed')
+
+    # Build replacements
+    employee = overtime_request.employee
+    employee_name = None
+    if employee:
+        # Prefer explicit display name
+        try:
+            employee_name = employee.display_name
+        except Exception:
+            employee_name = getattr(employee, 'fullname', None)
+    if not employee_name:
+        if employee and getattr(employee, 'user', None):
+            employee_name = employee.user.get_full_name() or employee.user.username
+        else:
+            employee_name = '-'
+
+    employee_nip = getattr(employee, 'nip', '-') if employee else '-'
+    nip_18 = employee_nip if employee_nip and len(employee_nip) >= 18 else employee_nip
+    if nip_18 and len(nip_18) < 18:
+        nip_18 = nip_18 + ('0' * (18 - len(nip_18)))
+    nip_9 = employee_nip[:9] if employee_nip else '-'
+
+    division_name = employee.get_division_name() if employee else '-'
+    position_name = employee.get_position_name() if employee else '-'
+
+    current_dt = timezone.now()
+    tahun = current_dt.strftime('%Y')
+    bulan = format_date_indonesian(current_dt.date(), 'month_year')
+    hari = current_dt.strftime('%d')
+    tanggal_doc = format_date_indonesian(current_dt.date(), 'full')
+
+    tanggal_lembur = format_date_indonesian(overtime_request.date, 'full') if overtime_request.date else '-'
+    jam_lembur = f"{overtime_request.total_hours} jam"
+    deskripsi = overtime_request.work_description
+    jumlah = f"{overtime_request.total_amount or 0}"
+
+    # Approver info
+    def _approver_name(user):
+        if not user:
+            return '-'
+        try:
+            emp = getattr(user, 'employee_profile', None)
+            if emp and getattr(emp, 'fullname', None):
+                return emp.fullname
+        except Exception:
+            pass
+        return user.get_full_name() or user.username
+
+    def _approver_nip(user):
+        try:
+            emp = getattr(user, 'employee_profile', None)
+            return getattr(emp, 'nip', '-') if emp else '-'
+        except Exception:
+            return '-'
+
+    lvl1_name = _approver_name(getattr(overtime_request, 'level1_approved_by', None))
+    lvl1_nip = _approver_nip(getattr(overtime_request, 'level1_approved_by', None))
+    lvl1_at = getattr(overtime_request, 'level1_approved_at', None)
+    lvl1_date = format_date_indonesian(lvl1_at.date(), 'full') if lvl1_at else '-'
+
+    final_name = _approver_name(getattr(overtime_request, 'final_approved_by', None))
+    final_nip = _approver_nip(getattr(overtime_request, 'final_approved_by', None))
+    final_at = getattr(overtime_request, 'final_approved_at', None)
+    final_date = format_date_indonesian(final_at.date(), 'full') if final_at else '-'
+
+    nomor_dok = f"{overtime_request.id}/SPKL/KJRI-DXB/{tahun}"
+
+    replacements = {
+        # Document info
+        '{{NOMOR_DOKUMEN}}': nomor_dok,
+        '{{TANGGAL_DOKUMEN}}': tanggal_doc,
+        '{{TAHUN}}': tahun,
+        '{{BULAN}}': bulan,
+        '{{HARI}}': hari,
+
+        # Employee info
+        '{{NAMA_PEGAWAI}}': employee_name,
+        '{{NIP_PEGAWAI}}': employee_nip or '-',
+        '{{NIP}}': employee_nip or '-',
+        '{{NIP_LENGKAP}}': nip_18 or '-',
+        '{{NIP_18_DIGIT}}': nip_18 or '-',
+        '{{NIP_9_DIGIT}}': nip_9 or '-',
+        '{{JABATAN_PEGAWAI}}': position_name,
+        '{{DIVISI_PEGAWAI}}': division_name,
+
+        # Overtime details
+        '{{TANGGAL_LEMBUR}}': tanggal_lembur,
+        '{{JAM_LEMBUR}}': jam_lembur,
+        '{{DESKRIPSI_PEKERJAAN}}': deskripsi,
+        '{{JUMLAH_GAJI_LEMBUR}}': jumlah,
+
+        # Approval info
+        '{{LEVEL1_APPROVER}}': lvl1_name,
+        '{{LEVEL1_APPROVER_NIP}}': lvl1_nip,
+        '{{LEVEL1_APPROVAL_DATE}}': lvl1_date,
+        '{{FINAL_APPROVER}}': final_name,
+        '{{FINAL_APPROVER_NIP}}': final_nip,
+        '{{FINAL_APPROVAL_DATE}}': final_date,
+    }
+
+    # Template parsed and placeholder runs indexed once per process
+    content = docx_templates.render(OVERTIME_TEMPLATE, replacements).to_bytes()
+
+    base_filename = f"Surat_Perintah_Kerja_Lembur_{employee_nip or 'pegawai'}_{overtime_request.date}.docx"
+    return content, base_filename
+
+
+def generate_monthly_summary_docx(monthly_summary):
+    """Generate DOCX bytes for the monthly summary request. Returns (bytes, filename)."""
+    try:
+        import docx  # noqa: F401
+    except Exception:
+        raise RuntimeError('python-docx is not installed')
+
+    employee = monthly_summary.employee
+    employee_name = None
+    if employee:
+        try:
+            employee_name = employee.display_name
+        except Exception:
+            employee_name = getattr(employee, 'fullname', None)
+    if not employee_name:
+        if employee and getattr(employee, 'user', None):
+            employee_name = employee.user.get_full_name() or employee.user.username
+        else:
+            employee_name = '-'
+
+    employee_nip = getattr(employee, 'nip', '-') if employee else '-'
+    division_name = employee.get_division_name() if employee else '-'
+    position_name = employee.get_position_name() if employee else '-'
+
+    # Determine month range
+    from calendar import monthrange
+    year = monthly_summary.year
+    month = monthly_summary.month
+    last_day = monthrange(year, month)[1]
+    from datetime import date as _date
+    start_date = _date(year, month, 1)
+    end_date = _date(year, month, last_day)
+
+    # Fetch approved overtime requests for this employee in period
+    requests_qs = OvertimeRequest.objects.filter(
+        employee=employee,
+        status='approved',
+        date__gte=start_date,
+        date__lte=end_date,
+    ).order_by('date')
+
+    total_hours = 0
+    total_amount = 0
+    rows = []
+    for r in requests_qs:
+        hrs = float(r.total_hours or 0)
+        amt = float(r.total_amount or 0)
+        total_hours += hrs
+        total_amount += amt
+        rows.append({
+            'date': r.date,
+            'hours': hrs,
+            'amount': amt,
+            'desc': r.work_description,
+        })
+
+    # Build replacements
+    bulan_tahun = f"{month:02d}/{year}"
+
+    # Calculate additional metrics
+    total_days = len(rows)  # Number of days with overtime
+    avg_per_day = total_hours / total_days if total_days > 0 else 0
+
+    # Get current date for export
+    current_dt = timezone.now()
+    tanggal_export = format_date_indonesian(current_dt.date(), 'full')
+
+    # Get approval info for monthly summary
+    def _approver_name(user):
+        if not user:
+            return '-'
+        try:
+            emp = getattr(user, 'employee_profile', None)
+            if emp and getattr(emp, 'fullname', None):
+                return emp.fullname
+        except Exception:
+            pass
+        return user.get_full_name() or user.username
+
+    def _approver_nip(user):
+        try:
+            emp = getattr(user, 'employee_profile', None)
+            return getattr(emp, 'nip', '-') if emp else '-'
+        except Exception:
+            return '-'
+
+    lvl1_name = _approver_name(getattr(monthly_summary, 'level1_approved_by', None))
+    lvl1_nip = _approver_nip(getattr(monthly_summary, 'level1_approved_by', None))
+    lvl1_at = getattr(monthly_summary, 'level1_approved_at', None)
+    lvl1_date = format_date_indonesian(lvl1_at.date(), 'full') if lvl1_at else '-'
+
+    final_name = _approver_name(getattr(monthly_summary, 'final_approved_by', None))
+    final_nip = _approver_nip(getattr(monthly_summary, 'final_approved_by', None))
+    final_at = getattr(monthly_summary, 'final_approved_at', None)
+    final_date = format_date_indonesian(final_at.date(), 'full') if final_at else '-'
+
+    replacements = {
+        '{{NAMA_PEGAWAI}}': employee_name,
+        '{{NIP_PEGAWAI}}': employee_nip or '-',
+        '{{JABATAN_PEGAWAI}}': position_name,
+        '{{DIVISI_PEGAWAI}}': division_name,
+        '{{PERIODE}}': bulan_tahun,
+        '{{TOTAL_JAM_LEMBUR}}': f"{total_hours:.2f}",
+        '{{TOTAL_GAJI_LEMBUR}}': f"{total_amount:.2f}",
+
+        # New placeholders
+        '{{PERIODE_EXPORT}}': f"{month:02d} {year}",
+        '{{TOTAL_HARI_LEMBUR}}': f"{total_days} hari",
+        '{{RATA_RATA_PER_HARI}}': f"{avg_per_day:.2f} jam",
+        '{{TANGGAL_EXPORT}}': tanggal_export,
+
+        # Approval placeholders
+        '{{LEVEL1_APPROVER}}': lvl1_name,
+        '{{LEVEL1_APPROVER_NIP}}': lvl1_nip,
+        '{{LEVEL1_APPROVAL_DATE}}': lvl1_date,
+        '{{FINAL_APPROVER}}': final_name,
+        '{{FINAL_APPROVER_NIP}}': final_nip,
+        '{{FINAL_APPROVAL_DATE}}': final_date,
+    }
+
+    rendered = docx_templates.render(MONTHLY_SUMMARY_TEMPLATE, replacements)
+    doc = rendered.document
+
+    # Append overtime table at the end
+    table = doc.add_table(rows=1, cols=4)
+    hdr_cells = table.rows[0].cells
+    hdr_cells[0].text = 'Tanggal'
+    hdr_cells[1].text = 'Jam Lembur'
+    hdr_cells[2].text = 'Jumlah'
+    hdr_cells[3].text = 'Deskripsi'
+    for item in rows:
+        row_cells = table.add_row().cells
+        row_cells[0].text = format_date_indonesian(item['date'], 'short')
+        row_cells[1].text = f"{item['hours']:.2f}j"
+        row_cells[2].text = f"{item['amount']:.2f}"
+        row_cells[3].text = item['desc'] or ''
+
+    content = rendered.to_bytes()
+
+    filename = f"rekap_lembur_{employee_nip or 'pegawai'}_{year}-{month:02d}.docx"
+    return content, filename
+
+
+def _file_response(content, filename, content_type):
+    response = HttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def _pdf_response(docx_bytes, base_filename):
+    try:
+        # Served from the PDF cache when this exact document was converted before
+        pdf_content = convert_docx_to_pdf(docx_bytes)
+    except ConverterError as e:
+        return Response(
+            {"detail": f"DOCX converter error: {e.status_code}"},
+            status=status.HTTP_502_BAD_GATEWAY,
+        )
+    return _file_response(pdf_content, base_filename.replace('.docx', '.pdf'), 'application/pdf')
+
+
+def overtime_docx_response(overtime_request):
+    """The approved overtime letter as a DOCX download (v2)"""
+    if overtime_request.status != 'approved':
+        return Response(
+            {"detail": "Hanya overtime yang sudah disetujui yang dapat didownload"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    try:
+        docx_bytes, filename = generate_overtime_docx(overtime_request)
+        return _file_response(docx_bytes, filename, DOCX_CONTENT_TYPE)
+    except Exception as e:
+        return Response(
+            {"detail": f"Gagal generate dokumen: {str(e)}"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+def overtime_pdf_response(overtime_request):
+    """The approved overtime letter as PDF, via the converter service (v2)"""
+    if overtime_request.status != 'approved':
+        return Response(
+            {"detail": "Overtime request must be approved to export PDF."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    try:
+        return _pdf_response(*generate_overtime_docx(overtime_request))
+    except Exception as e:
+        return Response(
+            {"detail": f"Gagal export PDF: {str(e)}"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+def monthly_summary_docx_response(summary):
+    """The approved monthly summary as a DOCX download"""
+    if summary.status != 'approved':
+        return Response({"detail": "Monthly summary must be approved to export."}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        docx_bytes, filename = generate_monthly_summary_docx(summary)
+        return _file_response(docx_bytes, filename, DOCX_CONTENT_TYPE)
+    except Exception as e:
+        return Response({"detail": f"Gagal export DOCX: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def monthly_summary_pdf_response(summary):
+    """The approved monthly summary as PDF, via the converter service"""
+    if summary.status != 'approved':
+        return Response({"detail": "Monthly summary must be approved to export PDF."}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        return _pdf_response(*generate_monthly_summary_docx(summary))
+    except Exception as e:
+        return Response({"detail": f"Gagal export PDF: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# Export worker entry points: (principal, params, object_id) -> response
+
+def render_overtime_docx(principal, params, object_id):
+    return overtime_docx_response(get_object_or_404(overtime_requests_visible_to(principal), pk=object_id))
+
+
+def render_overtime_pdf(principal, params, object_id):
+    return overtime_pdf_response(get_object_or_404(overtime_requests_visible_to(principal), pk=object_id))
+
+
+def render_monthly_summary_docx(principal, params, object_id):
+    return monthly_summary_docx_response(get_object_or_404(monthly_summaries_visible_to(principal), pk=object_id))
+
+
+def render_monthly_summary_pdf(principal, params, object_id):
+    return monthly_summary_pdf_response(get_object_or_404(monthly_summaries_visible_to(principal), pk=object_id))
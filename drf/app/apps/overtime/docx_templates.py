@@ -0,0 +1,213 @@
+"""
+Compiled DOCX templates.
+
+Every overtime / monthly summary document used to resolve its template
+(``os.listdir`` plus an mtime sort), parse the .docx from disk, try every
+replacement key against every paragraph and table cell, and round-trip
+through a temp file to get the bytes.
+
+``DocxTemplateRegistry`` compiles each template once per process:
+
+- the template path is resolved once
+- the package is parsed once; the raw bytes of every zip entry are kept
+- the runs of the main document part that contain ``{{PLACEHOLDER}}``s
+  are indexed by their position in document order
+
+Rendering deep-copies only the main document element, rewrites the
+indexed runs, and zips the copy together with the cached bytes of the
+other parts into an in-memory buffer. The compiled template is shared
+read-only, so rendering is thread-safe. A template whose file changes
+(mtime/size) is recompiled on the next render.
+
+Placeholders are replaced run by run, like before. A placeholder split
+across runs by Word is not replaced, and unknown placeholders are left
+as they are.
+"""
+import copy
+import io
+import os
+import re
+import threading
+import zipfile
+
+from django.conf import settings
+
+
+PLACEHOLDER_RE = re.compile(r'\{\{[A-Z0-9_]+\}\}')
+WORDML_RUN = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}r'
+
+OVERTIME_TEMPLATE = 'overtime'
+MONTHLY_SUMMARY_TEMPLATE = 'monthly_summary'
+
+# name -> (priority file names in the template dir, heading of the fallback document)
+TEMPLATE_SPECS = {
+    OVERTIME_TEMPLATE: (
+        [
+            'template_SURAT_PERINTAH_KERJA_LEMBUR.docx',
+            'template_overtime_clean.docx',
+            'template_overtime_working.docx',
+            'template_overtime_simple.docx',
+        ],
+        'Surat Perintah Kerja Lembur',
+    ),
+    MONTHLY_SUMMARY_TEMPLATE: (
+        [
+            'template_rekap_lembur.docx',
+            'template_rekap_lembur_bulanan.docx',
+        ],
+        'Rekap Lembur Bulanan',
+    ),
+}
+
+
+def template_dir():
+    return getattr(settings, 'DOCX_TEMPLATE_DIR', os.path.join(settings.BASE_DIR, 'template'))
+
+
+def resolve_template_path(priority_names):
+    """Best template for ``priority_names``: the first that exists, else the newest .docx, else None"""
+    directory = template_dir()
+    if not os.path.isdir(directory):
+        return None
+
+    for name in priority_names:
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            return path
+
+    docx_files = [
+        os.path.join(directory, f)
+        for f in os.listdir(directory)
+        if f.endswith('.docx') and not f.startswith('~$')
+    ]
+    if not docx_files:
+        return None
+    docx_files.sort(key=lambda p: os.path.getmtime(p), reverse=True)
+    return docx_files[0]
+
+
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class CompiledTemplate:
+    """A parsed .docx with the placeholder runs of its main document part indexed"""
+
+    def __init__(self, document, source_bytes, path=None):
+        self.path = path
+        self.signature = _file_signature(path) if path else None
+        self._document = document
+        self._part_name = document.part.partname.lstrip('/')
+        # (ZipInfo, bytes) of every entry; the main document part is re-serialized per render
+        with zipfile.ZipFile(io.BytesIO(source_bytes)) as archive:
+            self._entries = [(info, archive.read(info)) for info in archive.infolist()]
+        # (position among the body's runs, original run text)
+        self._placeholder_runs = [
+            (position, run.text)
+            for position, run in enumerate(document.element.body.iter(WORDML_RUN))
+            if PLACEHOLDER_RE.search(run.text)
+        ]
+
+    @classmethod
+    def from_path(cls, path):
+        from docx import Document
+
+        with open(path, 'rb') as f:
+            source_bytes = f.read()
+        return cls(Document(io.BytesIO(source_bytes)), source_bytes, path)
+
+    @classmethod
+    def blank(cls, heading):
+        """python-docx's default document with a heading, for when no template file exists"""
+        from docx import Document
+
+        document = Document()
+        document.add_heading(heading, level=1)
+        buffer = io.BytesIO()
+        document.save(buffer)
+        source_bytes = buffer.getvalue()
+        return cls(Document(io.BytesIO(source_bytes)), source_bytes)
+
+    @property
+    def placeholders(self):
+        return sorted({key for _, text in self._placeholder_runs for key in PLACEHOLDER_RE.findall(text)})
+
+    def render(self, replacements):
+        """
+        A RenderedDocument with ``replacements`` (``{'{{KEY}}': value}``)
+        applied. Its ``document`` can still be edited (e.g. tables appended)
+        before ``to_bytes()``.
+        """
+        element = copy.deepcopy(self._document.element)
+        if self._placeholder_runs:
+            def substitute(match):
+                key = match.group(0)
+                return str(replacements[key]) if key in replacements else key
+
+            runs = list(element.body.iter(WORDML_RUN))
+            for position, text in self._placeholder_runs:
+                runs[position].text = PLACEHOLDER_RE.sub(substitute, text)
+        return RenderedDocument(self, element)
+
+
+class RenderedDocument:
+    """A rendered copy of a template's main document part"""
+
+    def __init__(self, template, element):
+        from docx.document import Document
+
+        self._template = template
+        self._element = element
+        # Sections/styles are read from the shared (unmodified) template part
+        self.document = Document(element, template._document.part)
+
+    def to_bytes(self):
+        from docx.opc.oxml import serialize_part_xml
+
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for info, data in self._template._entries:
+                if info.filename == self._template._part_name:
+                    data = serialize_part_xml(self._element)
+                archive.writestr(info, data)
+        return buffer.getvalue()
+
+
+class DocxTemplateRegistry:
+    """Per-process cache of compiled templates by name (see TEMPLATE_SPECS)"""
+
+    def __init__(self, specs=None):
+        self.specs = specs or TEMPLATE_SPECS
+        self._paths = {}
+        self._compiled = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        """The compiled template ``name``, compiling it on first use or when its file changed"""
+        compiled = self._compiled.get(name)
+        if compiled is not None and (compiled.path is None or compiled.signature == _file_signature(compiled.path)):
+            return compiled
+
+        with self._lock:
+            priority_names, heading = self.specs[name]
+            if name not in self._paths or (self._paths[name] and not os.path.exists(self._paths[name])):
+                self._paths[name] = resolve_template_path(priority_names)
+            path = self._paths[name]
+            compiled = CompiledTemplate.from_path(path) if path else CompiledTemplate.blank(heading)
+            self._compiled[name] = compiled
+            return compiled
+
+    def render(self, name, replacements):
+        return self.get(name).render(replacements)
+
+    def clear(self):
+        with self._lock:
+            self._paths.clear()
+            self._compiled.clear()
+
+
+docx_templates = DocxTemplateRegistry()
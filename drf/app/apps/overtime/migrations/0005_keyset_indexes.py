@@ -0,0 +1,25 @@
+# Generated by Django 5.0.2 on 2026-10-17 04:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0006_attendance_keyset_index'),
+        ('employees', '0004_add_active_position_switching'),
+        ('overtime', '0004_fix_employee_cascade_deletion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='monthlysummaryrequest',
+            index=models.Index(fields=['created_at', 'id'], name='overtime_mo_created_3700c4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='overtimerequest',
+            index=models.Index(fields=['created_at', 'id'], name='overtime_ov_created_a754c3_idx'),
+        ),
+    ]
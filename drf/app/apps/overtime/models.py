@@ -151,6 +151,9 @@ class OvertimeRequest(TimeStampedModel):
     
     class Meta:
         ordering = ['-requested_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
         verbose_name = "Overtime Request"
         verbose_name_plural = "Overtime Requests"
     
@@ -213,10 +216,7 @@ class OvertimeRequest(TimeStampedModel):
         # For backward compatibility, fill old fields too
         self.approved_by = approved_by
         self.approved_at = timezone.now()
-        self.save()
-        
-        # Calculate financial details
-        self._calculate_financial_details()
+        # save() calculates the financial details of approved requests
         self.save()
     
     def reject(self, rejected_by, reason):
@@ -235,39 +235,24 @@ class OvertimeRequest(TimeStampedModel):
         if not self.employee or not self.employee.gaji_pokok:
             return
         
-        try:
-            # Get work settings for overtime rates
-            from apps.settings.models import WorkSettings
-            work_settings = WorkSettings.objects.first()
-            
-            if work_settings:
-                # Determine rate based on request type
-                if self.request_type == 'holiday':
-                    rate_multiplier = work_settings.overtime_rate_holiday or 0.75
-                else:
-                    rate_multiplier = work_settings.overtime_rate_workday or 0.50
-                
-                # Calculate hourly rate
-                monthly_hours = 22 * 8  # 22 workdays * 8 hours per day
-                base_hourly_rate = float(self.employee.gaji_pokok) / monthly_hours
-                self.hourly_rate = base_hourly_rate * rate_multiplier
-                
-                # Apply payment threshold policy
-                payment_threshold_minutes = int(work_settings.overtime_payment_threshold_minutes or 60)
-                total_hours = float(self.total_hours)
-                total_minutes = total_hours * 60
-                
-                if total_minutes > payment_threshold_minutes:
-                    # Only pay for minutes above the threshold
-                    payable_minutes = total_minutes - payment_threshold_minutes
-                    payable_hours = payable_minutes / 60
-                    self.total_amount = self.hourly_rate * payable_hours
-                else:
-                    # No payment if overtime is less than or equal to threshold
-                    self.total_amount = 0
-                
-        except Exception:
-            pass
+        estimate = self.estimate_financial_details()
+        if estimate:
+            self.hourly_rate, self.total_amount = estimate
+    
+    def estimate_financial_details(self, policy=None):
+        """``(hourly_rate, total_amount)`` under the current overtime policy, or None"""
+        from .payroll import get_overtime_policy, hours_to_minutes, overtime_pay
+        
+        policy = policy or get_overtime_policy()
+        if not policy or not self.employee or not self.employee.gaji_pokok:
+            return None
+        total_amount, hourly_rate = overtime_pay(
+            policy,
+            hours_to_minutes(self.total_hours),
+            self.employee.gaji_pokok,
+            self.request_type == 'holiday',
+        )
+        return hourly_rate, total_amount
 
 
 class MonthlySummaryRequest(TimeStampedModel):
@@ -353,6 +338,9 @@ class MonthlySummaryRequest(TimeStampedModel):
         verbose_name = "Monthly Summary Request"
         verbose_name_plural = "Monthly Summary Requests"
         unique_together = ('user', 'month', 'year')
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
     
     def __str__(self) -> str:
         return f"Monthly Summary {self.month}/{self.year} - {self.user.username}"
@@ -0,0 +1,227 @@
+"""
+Overtime payroll engine.
+
+Overtime pay used to be computed row by row with floats in four places
+(attendance overtime, approved overtime requests, the estimates shown to
+employees/supervisors and potential overtime), and they did not quite
+agree. Everything now goes through ``compute_overtime_pay`` which works on
+columnar NumPy arrays in integer cents:
+
+- salary (``gaji_pokok``) in cents
+- rates as integer multiples of 1/10000 (``overtime_rate_*`` has 4 decimals)
+- whole overtime minutes
+
+so the amount of a row is one exact integer division, rounded half up to
+the cent:
+
+    payable = max(0, overtime_minutes - payment_threshold)
+    amount  = payable * salary * rate / (monthly work minutes * 10000)
+
+A single row and a whole organisation's month go through the same code,
+and the per-employee totals are exact integer sums.
+"""
+from dataclasses import dataclass
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Optional
+
+import numpy as np
+from django.conf import settings
+
+
+DEFAULT_MONTHLY_WORK_HOURS = 22 * 8  # 22 workdays * 8 hours
+DEFAULT_RATE_WORKDAY = Decimal('0.50')
+DEFAULT_RATE_HOLIDAY = Decimal('0.75')
+DEFAULT_THRESHOLD_MINUTES = 60
+DEFAULT_PAYMENT_THRESHOLD_MINUTES = 60
+
+RATE_SCALE = 10000
+CENT = Decimal('0.01')
+
+# Above this numerator int64 could overflow; fall back to Python integers
+_INT64_SAFE = 2 ** 62
+
+
+def to_cents(value):
+    """Money (Decimal/float/str/None) to integer cents, rounded half up"""
+    if value in (None, ''):
+        return 0
+    return int((Decimal(str(value)) * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents):
+    """Integer cents to a 2-decimal Decimal"""
+    return (Decimal(int(cents)) / 100).quantize(CENT)
+
+
+def _scaled_rate(value, default):
+    rate = Decimal(str(value)) if value not in (None, '') else default
+    return int((rate * RATE_SCALE).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def _minutes(value, default):
+    return int(value) if value is not None else default
+
+
+@dataclass(frozen=True)
+class OvertimePolicy:
+    """Overtime thresholds and rates in integer units"""
+    rate_workday: int  # multiple of 1/RATE_SCALE
+    rate_holiday: int
+    threshold_minutes: int
+    payment_threshold_minutes: int
+    monthly_work_minutes: int
+
+    @classmethod
+    def from_work_settings(cls, work_settings):
+        """Policy of a WorkSettings (or snapshot); defaults apply to unset values"""
+        monthly_hours = getattr(settings, 'OVERTIME_MONTHLY_WORK_HOURS', DEFAULT_MONTHLY_WORK_HOURS)
+        return cls(
+            rate_workday=_scaled_rate(
+                getattr(work_settings, 'overtime_rate_workday', None) or None, DEFAULT_RATE_WORKDAY
+            ),
+            rate_holiday=_scaled_rate(
+                getattr(work_settings, 'overtime_rate_holiday', None) or None, DEFAULT_RATE_HOLIDAY
+            ),
+            threshold_minutes=_minutes(
+                getattr(work_settings, 'overtime_threshold_minutes', None), DEFAULT_THRESHOLD_MINUTES
+            ),
+            payment_threshold_minutes=_minutes(
+                getattr(work_settings, 'overtime_payment_threshold_minutes', None),
+                DEFAULT_PAYMENT_THRESHOLD_MINUTES,
+            ),
+            monthly_work_minutes=int(monthly_hours * 60),
+        )
+
+
+def get_overtime_policy():
+    """Policy of the current work settings, or None when none are configured"""
+    from apps.settings.snapshot import get_work_settings
+
+    work_settings = get_work_settings()
+    return OvertimePolicy.from_work_settings(work_settings) if work_settings else None
+
+
+@dataclass
+class PayrollResult:
+    """Per-row and (when employee ids are given) per-employee overtime pay"""
+    overtime_minutes: np.ndarray
+    payable_minutes: np.ndarray
+    amount_cents: np.ndarray
+    hourly_rate_cents: np.ndarray
+    employee_ids: Optional[np.ndarray] = None
+    employee_overtime_minutes: Optional[np.ndarray] = None
+    employee_amount_cents: Optional[np.ndarray] = None
+
+    @property
+    def total_amount_cents(self):
+        return int(self.amount_cents.sum())
+
+    def amounts(self):
+        """Row amounts as 2-decimal Decimals"""
+        return [from_cents(cents) for cents in self.amount_cents.tolist()]
+
+    def employee_totals(self):
+        """``{employee_id: (overtime_minutes, amount Decimal)}``"""
+        if self.employee_ids is None:
+            return {}
+        return {
+            employee_id: (minutes, from_cents(cents))
+            for employee_id, minutes, cents in zip(
+                self.employee_ids.tolist(),
+                self.employee_overtime_minutes.tolist(),
+                self.employee_amount_cents.tolist(),
+            )
+        }
+
+
+def _as_int_array(values):
+    return np.asarray(values, dtype=np.int64).reshape(-1)
+
+
+def _divide_half_up(numerator, denominator):
+    """Non-negative integer division rounded half up"""
+    return (2 * numerator + denominator) // (2 * denominator)
+
+
+def attendance_overtime_minutes(policy, worked_minutes, required_minutes):
+    """Overtime minutes of attendance rows: work beyond required + threshold"""
+    worked = _as_int_array(worked_minutes)
+    required = _as_int_array(required_minutes)
+    return np.maximum(worked - required - policy.threshold_minutes, 0)
+
+
+def compute_overtime_pay(policy, overtime_minutes, salary_cents, is_holiday, employee_ids=None):
+    """
+    Overtime pay of rows given as parallel arrays.
+
+    ``overtime_minutes`` are whole minutes, ``salary_cents`` the monthly
+    base salary in cents and ``is_holiday`` selects the holiday rate. With
+    ``employee_ids`` the result also carries per-employee totals.
+    """
+    minutes = _as_int_array(overtime_minutes)
+    salary = _as_int_array(salary_cents)
+    holiday = np.asarray(is_holiday, dtype=bool).reshape(-1)
+
+    rate = np.where(holiday, policy.rate_holiday, policy.rate_workday).astype(np.int64)
+    payable = np.maximum(minutes - policy.payment_threshold_minutes, 0)
+    denominator = policy.monthly_work_minutes * RATE_SCALE
+
+    salary_rate = salary * rate
+    if len(minutes) and 2 * int(salary_rate.max()) * max(int(payable.max()), 60) > _INT64_SAFE:
+        # Unrealistically large salaries: exact arithmetic on Python ints
+        salary_rate = salary.astype(object) * rate.astype(object)
+        payable_numerator = payable.astype(object) * salary_rate
+    else:
+        payable_numerator = payable * salary_rate
+    amount = _divide_half_up(payable_numerator, denominator).astype(np.int64)
+    hourly = _divide_half_up(salary_rate * 60, denominator).astype(np.int64)
+
+    result = PayrollResult(
+        overtime_minutes=minutes,
+        payable_minutes=payable,
+        amount_cents=amount,
+        hourly_rate_cents=hourly,
+    )
+    if employee_ids is not None:
+        _add_employee_totals(result, _as_int_array(employee_ids))
+    return result
+
+
+def compute_attendance_overtime(policy, worked_minutes, required_minutes, salary_cents, is_holiday,
+                                employee_ids=None):
+    """
+    Overtime minutes and pay of attendance rows. Rows without a salary get
+    neither, as attendance overtime has always been recorded only for
+    employees with a ``gaji_pokok``.
+    """
+    salary = _as_int_array(salary_cents)
+    minutes = attendance_overtime_minutes(policy, worked_minutes, required_minutes)
+    minutes = np.where(salary > 0, minutes, 0)
+    return compute_overtime_pay(policy, minutes, salary, is_holiday, employee_ids)
+
+
+def _add_employee_totals(result, employee_ids):
+    if not len(employee_ids):
+        result.employee_ids = employee_ids
+        result.employee_overtime_minutes = employee_ids.copy()
+        result.employee_amount_cents = employee_ids.copy()
+        return
+    order = np.argsort(employee_ids, kind='stable')
+    sorted_ids = employee_ids[order]
+    starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+    result.employee_ids = sorted_ids[starts]
+    result.employee_overtime_minutes = np.add.reduceat(result.overtime_minutes[order], starts)
+    result.employee_amount_cents = np.add.reduceat(result.amount_cents[order], starts)
+
+
+def overtime_pay(policy, overtime_minutes, gaji_pokok, is_holiday):
+    """``(amount, hourly_rate)`` Decimals for a single row"""
+    result = compute_overtime_pay(policy, [overtime_minutes], [to_cents(gaji_pokok)], [is_holiday])
+    return from_cents(result.amount_cents[0]), from_cents(result.hourly_rate_cents[0])
+
+
+def hours_to_minutes(hours):
+    """Overtime request hours (2 decimals) to whole minutes, rounded half up"""
+    if not hours:
+        return 0
+    return int((Decimal(str(hours)) * 60).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
@@ -0,0 +1,176 @@
+"""
+DOCX -> PDF conversion with a content-addressed disk cache.
+
+Each overtime / monthly summary ``export_pdf`` used to render the DOCX and
+POST it to the converter service (up to 60 s), even for a letter that had
+been converted minutes before. ``convert_docx_to_pdf`` now keys the PDF
+by the SHA-256 of the rendered DOCX bytes:
+
+- rendering is deterministic (see docx_templates), so an unchanged letter
+  maps to the same key and is served from disk without the converter
+- any change to the request, the employee, the approvers or the template
+  changes the bytes and therefore the key, so stale PDFs are never served.
+  Entries nobody asks for any more age out through the LRU eviction.
+  (The letters carry the export date, so a letter is converted at most
+  once per day.)
+
+Entries live in ``PDF_CACHE_DIR`` (shared by the web and export worker
+containers when it is on a shared volume), sharded by the first two hex
+digits of the key. A hit refreshes the file's mtime; when a write pushes
+the directory over ``PDF_CACHE_MAX_BYTES`` the least recently used files
+are deleted. Writes go through a temp file and ``os.replace`` so
+concurrent readers never see a partial PDF.
+"""
+import hashlib
+import io
+import logging
+import os
+import tempfile
+
+import requests
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONVERTER_URL = 'http://docx_converter:5000/convert'
+DEFAULT_CONVERTER_TIMEOUT = 60
+DEFAULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+DOCX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+# Bump to invalidate every cached PDF (e.g. after a converter upgrade)
+CACHE_KEY_VERSION = b'pdf-v1'
+
+
+class ConverterError(Exception):
+    """The converter service did not return a PDF"""
+
+    def __init__(self, status_code):
+        super().__init__(f"DOCX converter error: {status_code}")
+        self.status_code = status_code
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class PdfCache:
+    """Size-bounded LRU cache of PDFs on disk, keyed by content hash"""
+
+    def __init__(self, directory=None, max_bytes=None):
+        self.directory = directory or _setting(
+            'PDF_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'absensi-pdf-cache')
+        )
+        self.max_bytes = max_bytes if max_bytes is not None else _setting('PDF_CACHE_MAX_BYTES', DEFAULT_CACHE_MAX_BYTES)
+
+    @staticmethod
+    def key_for(docx_bytes):
+        return hashlib.sha256(CACHE_KEY_VERSION + b'\0' + docx_bytes).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f'{key}.pdf')
+
+    def get(self, key):
+        """Cached PDF bytes, or None"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                content = f.read()
+            os.utime(path)  # mark as recently used
+        except OSError:
+            return None
+        return content
+
+    def set(self, key, content):
+        if self.max_bytes <= 0 or len(content) > self.max_bytes:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(content)
+                os.replace(tmp_path, path)
+            except BaseException:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+            self.evict()
+        except OSError as e:
+            # A cache that cannot be written must not break the export
+            logger.warning("Could not cache PDF %s: %s", key, e)
+
+    def evict(self):
+        """Delete least recently used PDFs until the cache fits in max_bytes"""
+        entries = []
+        total = 0
+        for shard in _scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in _scandir(shard.path):
+                if not entry.name.endswith('.pdf'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self):
+        for shard in _scandir(self.directory):
+            if shard.is_dir():
+                for entry in _scandir(shard.path):
+                    try:
+                        os.unlink(entry.path)
+                    except OSError:
+                        pass
+
+
+def _scandir(path):
+    try:
+        return list(os.scandir(path))
+    except OSError:
+        return []
+
+
+pdf_cache = PdfCache()
+
+
+def convert_docx_to_pdf(docx_bytes, cache=None):
+    """PDF bytes of ``docx_bytes``, from the cache or the converter service. Raises ConverterError."""
+    cache = cache or pdf_cache
+    key = cache.key_for(docx_bytes)
+    content = cache.get(key)
+    if content is not None:
+        return content
+
+    files = {'file': ('document.docx', io.BytesIO(docx_bytes), DOCX_CONTENT_TYPE)}
+    data = {'method': 'file'}
+    r = requests.post(
+        _setting('DOCX_CONVERTER_URL', DEFAULT_CONVERTER_URL),
+        files=files,
+        data=data,
+        timeout=_setting('DOCX_CONVERTER_TIMEOUT', DEFAULT_CONVERTER_TIMEOUT),
+    )
+    if r.status_code != 200:
+        raise ConverterError(r.status_code)
+
+    content = r.content
+    cache.set(key, content)
+    return content
@@ -51,24 +51,15 @@ class OvertimeRequestSupervisorSerializer(OvertimeRequestSerializer):
             hourly_rate = getattr(instance, 'hourly_rate', None)
             total_amount = getattr(instance, 'total_amount', None)
             if hourly_rate is None or total_amount is None:
-                from apps.settings.models import WorkSettings
-                ws = WorkSettings.objects.first()
-                employee = getattr(instance, 'employee', None)
+                # Estimate with the same payroll engine used on approval
                 total_hours = float(getattr(instance, 'total_hours', 0) or 0)
-                if ws and employee and getattr(employee, 'gaji_pokok', None) and total_hours > 0:
-                    monthly_hours = 22 * 8
-                    base_hourly = float(employee.gaji_pokok) / monthly_hours
-                    req_type = getattr(instance, 'request_type', 'regular') or 'regular'
-                    if req_type == 'holiday':
-                        rate_multiplier = float(getattr(ws, 'overtime_rate_holiday', 0.75) or 0.75)
-                    else:
-                        rate_multiplier = float(getattr(ws, 'overtime_rate_workday', 0.50) or 0.50)
-                    est_hourly = base_hourly * rate_multiplier
-                    est_total = est_hourly * total_hours
-                    data['hourly_rate'] = round(est_hourly, 2)
-                    data['total_amount'] = round(est_total, 2)
+                estimate = instance.estimate_financial_details() if total_hours > 0 else None
+                if estimate:
+                    est_hourly, est_total = estimate
+                    data['hourly_rate'] = float(est_hourly)
+                    data['total_amount'] = float(est_total)
                     # Add overtime_amount field for frontend compatibility
-                    data['overtime_amount'] = round(est_total, 2)
+                    data['overtime_amount'] = float(est_total)
                 else:
                     if hourly_rate is not None:
                         data['hourly_rate'] = float(hourly_rate)
@@ -103,26 +94,15 @@ class OvertimeRequestEmployeeSerializer(OvertimeRequestSerializer):
             hourly_rate = getattr(instance, 'hourly_rate', None)
             total_amount = getattr(instance, 'total_amount', None)
             if hourly_rate is None or total_amount is None:
-                from apps.settings.models import WorkSettings
-                from decimal import Decimal
-                ws = WorkSettings.objects.first()
-                employee = getattr(instance, 'employee', None)
+                # Estimate with the same payroll engine used on approval
                 total_hours = float(getattr(instance, 'total_hours', 0) or 0)
-                if ws and employee and getattr(employee, 'gaji_pokok', None) and total_hours > 0:
-                    monthly_hours = 22 * 8
-                    base_hourly = float(employee.gaji_pokok) / monthly_hours
-                    # Determine rate by request type
-                    req_type = getattr(instance, 'request_type', 'regular') or 'regular'
-                    if req_type == 'holiday':
-                        rate_multiplier = float(getattr(ws, 'overtime_rate_holiday', 0.75) or 0.75)
-                    else:
-                        rate_multiplier = float(getattr(ws, 'overtime_rate_workday', 0.50) or 0.50)
-                    est_hourly = base_hourly * rate_multiplier
-                    est_total = est_hourly * total_hours
-                    data['hourly_rate'] = round(est_hourly, 2)
-                    data['total_amount'] = round(est_total, 2)
+                estimate = instance.estimate_financial_details() if total_hours > 0 else None
+                if estimate:
+                    est_hourly, est_total = estimate
+                    data['hourly_rate'] = float(est_hourly)
+                    data['total_amount'] = float(est_total)
                     # Add overtime_amount field for frontend compatibility
-                    data['overtime_amount'] = round(est_total, 2)
+                    data['overtime_amount'] = float(est_total)
                 else:
                     if hourly_rate is not None:
                         data['hourly_rate'] = float(hourly_rate)
@@ -202,7 +182,7 @@ class OvertimeRequestCreateUpdateSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         """Create overtime request with attendance handling"""
         from apps.attendance.models import Attendance
-        from apps.settings.models import WorkSettings
+        from apps.settings.snapshot import get_work_settings
         from django.utils import timezone as dj_timezone
         
         # Handle attendance field
@@ -236,7 +216,7 @@ class OvertimeRequestCreateUpdateSerializer(serializers.ModelSerializer):
                 
                 if not attendance:
                     # Create new attendance record for overtime
-                    ws = WorkSettings.objects.first()
+                    ws = get_work_settings()
                     tzname = ws.timezone if ws else dj_timezone.get_current_timezone_name()
                     
                     attendance = Attendance.objects.create(
@@ -270,6 +250,31 @@ class OvertimeRequestApprovalSerializer(serializers.Serializer):
         return data
 
 
+class OvertimeBulkActionSerializer(serializers.Serializer):
+    """Ids of the overtime requests a bulk action applies to"""
+    MAX_IDS = 500
+    
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_IDS,
+    )
+    
+    def validate_ids(self, value):
+        # Keep the caller's order, drop duplicates
+        return list(dict.fromkeys(value))
+
+
+class OvertimeBulkApproveSerializer(OvertimeBulkActionSerializer):
+    """Serializer for bulk level 1 / final approval"""
+    approval_level = serializers.ChoiceField(choices=[1, 2])
+
+
+class OvertimeBulkRejectSerializer(OvertimeBulkActionSerializer):
+    """Serializer for bulk rejection"""
+    rejection_reason = serializers.CharField(required=False, allow_blank=True, default='')
+
+
 # Monthly Summary Request Serializers
 class MonthlySummaryRequestSerializer(serializers.ModelSerializer):
     """Base monthly summary request serializer"""
@@ -1,79 +1,66 @@
 from datetime import date
+from decimal import Decimal
+from django.db import transaction
 from django.db.models import Sum, Count
+from django.utils import timezone
+from apps.approvals.models import ApprovalWorkItem
+from apps.approvals.services import sync_work_items
 from .models import OvertimeRequest
+from .payroll import compute_overtime_pay, from_cents, get_overtime_policy, hours_to_minutes, to_cents
 
 class OvertimeService:
+    SUMMARY_REQUEST_FIELDS = ('id', 'created_at', 'date', 'total_hours', 'total_amount', 'status')
+    
+    def summary_queryset(self, user, start_date, end_date):
+        return OvertimeRequest.objects.filter(user=user, date__range=[start_date, end_date])
+    
+    def summary_requests(self, user, start_date, end_date):
+        """The requests behind a summary, with only the columns its detail list shows"""
+        return self.summary_queryset(user, start_date, end_date).only(*self.SUMMARY_REQUEST_FIELDS)
+    
     def get_overtime_summary(self, user, start_date, end_date):
-        """Get overtime summary for a user"""
+        """
+        Get overtime summary for a user.
+        
+        Two grouped queries regardless of the number of requests: counts and
+        stored hours/amounts per status, and the distinct (status, type,
+        hours, salary) combinations of requests without a stored amount,
+        which are estimated in one payroll engine call.
+        """
         try:
-            overtime_requests = OvertimeRequest.objects.filter(
-                user=user,
-                date__range=[start_date, end_date]
-            )
-
-            # Calculate total amounts using the same logic as the serializer
-            total_hours = 0
-            total_amount = 0
-            total_approved_amount = 0  # Only approved amounts for summary
-            level1_approved_requests = 0
+            overtime_requests = self.summary_queryset(user, start_date, end_date)
+            
+            counts = {}
+            total_hours = Decimal('0')
+            amounts = {}
+            for row in (
+                overtime_requests.order_by().values('status')
+                .annotate(requests=Count('id'), hours=Sum('total_hours'), amount=Sum('total_amount'))
+            ):
+                counts[row['status']] = row['requests']
+                total_hours += row['hours'] or 0
+                amounts[row['status']] = row['amount'] or Decimal('0')
+            
+            # Requests without a stored amount: estimate with the same logic as the serializer
+            for status_name, amount in self._estimate_amounts(overtime_requests).items():
+                amounts[status_name] = amounts.get(status_name, Decimal('0')) + amount
+            
+            total_hours = float(total_hours)
+            total_amount = float(sum(amounts.values(), Decimal('0')))
+            # Only approved amounts for summary
+            total_approved_amount = float(amounts.get('approved', 0))
             
-            for request in overtime_requests:
-                if request.total_hours:
-                    total_hours += float(request.total_hours)
-                
-                # Calculate amount using the same logic as serializer
-                request_amount = 0
-                if request.total_amount is not None:
-                    # Use stored amount if available
-                    request_amount = float(request.total_amount)
-                elif request.employee and request.employee.gaji_pokok and request.total_hours:
-                    # Calculate estimated amount using same logic as serializer
-                    from apps.settings.models import WorkSettings
-                    ws = WorkSettings.objects.first()
-                    if ws:
-                        monthly_hours = 22 * 8
-                        base_hourly_wage = float(request.employee.gaji_pokok) / monthly_hours
-                        
-                        # Determine rate by request type (same logic as serializer)
-                        req_type = getattr(request, 'request_type', 'regular') or 'regular'
-                        if req_type == 'holiday':
-                            rate_multiplier = float(ws.overtime_rate_holiday or 0.75)
-                        else:
-                            rate_multiplier = float(ws.overtime_rate_workday or 0.50)
-                        
-                        estimated_hourly_rate = base_hourly_wage * rate_multiplier
-                        request_amount = estimated_hourly_rate * float(request.total_hours)
-                
-                # Add to total amount (all requests)
-                total_amount += request_amount
-                
-                # Add to approved amount only if approved
-                if request.status == 'approved':
-                    total_approved_amount += request_amount
-                
-                if request.status == 'level1_approved':
-                    level1_approved_requests += 1
-
             summary = {
-                'total_requests': overtime_requests.count(),
-                'pending_requests': overtime_requests.filter(status='pending').count(),
-                'level1_approved_requests': level1_approved_requests,
-                'approved_requests': overtime_requests.filter(status='approved').count(),
-                'rejected_requests': overtime_requests.filter(status='rejected').count(),
+                'total_requests': sum(counts.values()),
+                'pending_requests': counts.get('pending', 0),
+                'level1_approved_requests': counts.get('level1_approved', 0),
+                'approved_requests': counts.get('approved', 0),
+                'rejected_requests': counts.get('rejected', 0),
                 'total_approved_hours': total_hours,  # Frontend expects this field name
                 'total_approved_amount': total_approved_amount,  # Frontend expects this field name
                 'total_hours': total_hours,
                 'total_amount': total_amount,
-                'requests': []
             }
-
-            for request in overtime_requests:
-                summary['requests'].append({
-                    'date': request.date.isoformat(),
-                    'total_hours': request.total_hours,
-                    'total_amount': request.total_amount,
-                    'status': request.status
-                })
             
             return {
                 'success': True,
@@ -84,3 +71,172 @@ class OvertimeService:
                 'success': False,
                 'message': str(e)
             }
+    
+    def _estimate_amounts(self, overtime_requests):
+        """Estimated amount per status of the requests without a stored amount"""
+        policy = get_overtime_policy()
+        if not policy:
+            return {}
+        groups = list(
+            overtime_requests.filter(
+                total_amount__isnull=True,
+                total_hours__gt=0,
+                employee__gaji_pokok__gt=0,
+            ).order_by().values_list('status', 'request_type', 'total_hours', 'employee__gaji_pokok')
+            .annotate(requests=Count('id'))
+        )
+        if not groups:
+            return {}
+        # Identical rows have identical amounts: price each combination once
+        result = compute_overtime_pay(
+            policy,
+            [hours_to_minutes(hours) for _, _, hours, _, _ in groups],
+            [to_cents(gaji_pokok) for _, _, _, gaji_pokok, _ in groups],
+            [request_type == 'holiday' for _, request_type, _, _, _ in groups],
+        )
+        estimates = {}
+        for (status_name, _, _, _, requests), cents in zip(groups, result.amount_cents.tolist()):
+            estimates[status_name] = estimates.get(status_name, 0) + cents * requests
+        return {status_name: from_cents(cents) for status_name, cents in estimates.items()}
+
+
+class OvertimeApprovalService:
+    """
+    Bulk level 1 / final approval and rejection of overtime requests.
+    
+    The selected rows are locked with ``select_for_update`` for the whole
+    operation. ``can_manage_division(division_id)`` is asked once per
+    division among them. Amounts of finally approved requests come from a
+    single payroll engine call. Every status transition is written with
+    one ``bulk_update``. Each id gets its own result, so one invalid
+    request does not fail the others.
+    """
+    NOT_FOUND = "Not found."
+    
+    def __init__(self, user, can_manage_division):
+        self.user = user
+        self.can_manage_division = can_manage_division
+    
+    def bulk_approve(self, ids, approval_level):
+        if approval_level == 1:
+            return self._bulk_transition(ids, self._approve_level1)
+        return self._bulk_transition(ids, self._approve_final)
+    
+    def bulk_reject(self, ids, rejection_reason=''):
+        def reject(overtime, now):
+            if overtime.status not in ('pending', 'level1_approved'):
+                return "Request cannot be rejected in current status."
+            overtime.status = 'rejected'
+            overtime.rejection_reason = rejection_reason
+            return None
+        
+        return self._bulk_transition(ids, reject)
+    
+    def _approve_level1(self, overtime, now):
+        if overtime.status != 'pending':
+            return "Request is not pending approval."
+        overtime.status = 'level1_approved'
+        overtime.level1_approved_by = self.user
+        overtime.level1_approved_at = now
+        return None
+    
+    def _approve_final(self, overtime, now):
+        if overtime.status not in ('pending', 'level1_approved'):
+            return "Request is not awaiting final approval."
+        overtime.status = 'approved'
+        # If level 1 was skipped, fill it in too
+        if not overtime.level1_approved_by_id:
+            overtime.level1_approved_by = self.user
+            overtime.level1_approved_at = now
+        overtime.final_approved_by = self.user
+        overtime.final_approved_at = now
+        # For backward compatibility, fill old fields too
+        overtime.approved_by = self.user
+        overtime.approved_at = now
+        return None
+    
+    # Columns written per resulting status (one bulk_update each)
+    UPDATE_FIELDS = {
+        'level1_approved': ['status', 'level1_approved_by', 'level1_approved_at', 'updated_at'],
+        'approved': [
+            'status', 'level1_approved_by', 'level1_approved_at', 'final_approved_by',
+            'final_approved_at', 'approved_by', 'approved_at', 'hourly_rate', 'total_amount', 'updated_at',
+        ],
+        'rejected': ['status', 'rejection_reason', 'updated_at'],
+    }
+    
+    def _bulk_transition(self, ids, transition):
+        from apps.employees.models import Employee
+        
+        results = {}
+        with transaction.atomic():
+            locked = {
+                overtime.id: overtime
+                for overtime in OvertimeRequest.objects.select_for_update().filter(id__in=ids).order_by('id')
+            }
+            employees = {
+                row['id']: row
+                for row in Employee.objects.filter(
+                    id__in={overtime.employee_id for overtime in locked.values() if overtime.employee_id}
+                ).values('id', 'division_id', 'gaji_pokok')
+            }
+            
+            allowed_divisions = {}
+            changed = []
+            now = timezone.now()
+            for overtime_id in ids:
+                overtime = locked.get(overtime_id)
+                division_id = employees.get(overtime.employee_id, {}).get('division_id') if overtime else None
+                if overtime is not None and division_id not in allowed_divisions:
+                    allowed_divisions[division_id] = self.can_manage_division(division_id)
+                if overtime is None or not allowed_divisions[division_id]:
+                    results[overtime_id] = {'id': overtime_id, 'success': False, 'detail': self.NOT_FOUND}
+                    continue
+                
+                error = transition(overtime, now)
+                if error:
+                    results[overtime_id] = {
+                        'id': overtime_id, 'success': False, 'detail': error, 'status': overtime.status,
+                    }
+                    continue
+                overtime.updated_at = now
+                changed.append(overtime)
+                results[overtime_id] = {'id': overtime_id, 'success': True, 'status': overtime.status}
+            
+            approved = [o for o in changed if o.status == 'approved']
+            self._price_approved(approved, employees)
+            for overtime in approved:
+                results[overtime.id]['total_amount'] = overtime.total_amount
+            for new_status, fields in self.UPDATE_FIELDS.items():
+                rows = [o for o in changed if o.status == new_status]
+                if rows:
+                    OvertimeRequest.objects.bulk_update(rows, fields)
+            # bulk_update bypasses the post_save signal that keeps the approver inbox in sync
+            sync_work_items(ApprovalWorkItem.KIND_OVERTIME, changed)
+        
+        return {
+            'success': True,
+            'updated': len(changed),
+            'results': [results[overtime_id] for overtime_id in ids],
+        }
+    
+    def _price_approved(self, approved, employees):
+        """hourly_rate / total_amount of newly approved requests in one payroll engine call"""
+        policy = get_overtime_policy()
+        priced = [
+            overtime for overtime in approved
+            if (employees.get(overtime.employee_id) or {}).get('gaji_pokok')
+        ]
+        if not policy or not priced:
+            return
+        result = compute_overtime_pay(
+            policy,
+            [hours_to_minutes(overtime.total_hours) for overtime in priced],
+            [to_cents(employees[overtime.employee_id]['gaji_pokok']) for overtime in priced],
+            [overtime.request_type == 'holiday' for overtime in priced],
+        )
+        for overtime, amount, hourly in zip(
+            priced, result.amount_cents.tolist(), result.hourly_rate_cents.tolist()
+        ):
+            overtime.total_amount = from_cents(amount)
+            overtime.hourly_rate = from_cents(hourly)
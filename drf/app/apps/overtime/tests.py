@@ -0,0 +1,252 @@
+from datetime import date, time
+from decimal import Decimal
+
+from django.contrib.auth.models import Group, User
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.attendance.models import Attendance
+from apps.employees.models import Division, Employee, Position
+from apps.settings.models import WorkSettings
+from apps.settings.snapshot import mark_caches_stale
+from .models import OvertimeRequest
+from .payroll import (
+    DEFAULT_MONTHLY_WORK_HOURS, OvertimePolicy, compute_attendance_overtime, compute_overtime_pay,
+    from_cents, hours_to_minutes, overtime_pay, to_cents,
+)
+from .services import OvertimeApprovalService, OvertimeService
+
+
+def policy(**overrides):
+    values = {
+        'rate_workday': 5000,  # 0.50
+        'rate_holiday': 7500,  # 0.75
+        'threshold_minutes': 60,
+        'payment_threshold_minutes': 60,
+        'monthly_work_minutes': DEFAULT_MONTHLY_WORK_HOURS * 60,
+    }
+    values.update(overrides)
+    return OvertimePolicy(**values)
+
+
+class PayrollTests(SimpleTestCase):
+    """compute_overtime_pay: integer cents, rounded half up"""
+
+    def test_amount_formula(self):
+        # 3h overtime, 1h payment threshold: 120 payable minutes
+        # 120 * 10,560,000.00 * 0.50 / 10,560 minutes = 60,000.00
+        amount, hourly = overtime_pay(policy(), 180, Decimal('10560000.00'), False)
+        self.assertEqual(amount, Decimal('60000.00'))
+        self.assertEqual(hourly, Decimal('30000.00'))
+
+    def test_rounds_half_up_to_the_cent(self):
+        # One payable minute; salary * 0.50 / 1,000,000 is exactly half a cent at 100 cents
+        tight = policy(monthly_work_minutes=100)
+        result = compute_overtime_pay(tight, [61, 61, 61], [99, 100, 101], [False] * 3)
+        self.assertEqual(result.amount_cents.tolist(), [0, 1, 1])
+
+    def test_to_cents_rounds_half_up(self):
+        self.assertEqual(to_cents('0.005'), 1)
+        self.assertEqual(to_cents(Decimal('0.004')), 0)
+        self.assertEqual(to_cents(1234.5), 123450)
+        self.assertEqual(from_cents(123450), Decimal('1234.50'))
+        self.assertEqual(hours_to_minutes(Decimal('1.01')), 61)  # 60.6 minutes
+
+    def test_holiday_rate(self):
+        result = compute_overtime_pay(policy(), [180, 180], [1056000000, 1056000000], [False, True])
+        workday, holiday = result.amount_cents.tolist()
+        self.assertEqual(workday, 6000000)
+        self.assertEqual(holiday, 9000000)
+        self.assertEqual(result.hourly_rate_cents.tolist(), [3000000, 4500000])
+
+    def test_payment_threshold(self):
+        result = compute_overtime_pay(policy(), [30, 60, 61], [1056000000] * 3, [False] * 3)
+        self.assertEqual(result.payable_minutes.tolist(), [0, 0, 1])
+        self.assertEqual(result.amount_cents.tolist(), [0, 0, 50000])
+
+    def test_monthly_hours_divisor(self):
+        self.assertEqual(OvertimePolicy.from_work_settings(None).monthly_work_minutes, 176 * 60)
+        with override_settings(OVERTIME_MONTHLY_WORK_HOURS=160):
+            custom = OvertimePolicy.from_work_settings(None)
+        self.assertEqual(custom.monthly_work_minutes, 160 * 60)
+        # Same pay, fewer hours in the month: a higher hourly wage
+        default_amount, _ = overtime_pay(policy(), 120, Decimal('9600000.00'), False)
+        custom_amount, custom_hourly = overtime_pay(custom, 120, Decimal('9600000.00'), False)
+        self.assertEqual(default_amount, Decimal('27272.73'))  # 60 * 96,000 / 176 / 2, rounded
+        self.assertEqual(custom_amount, Decimal('30000.00'))
+        self.assertEqual(custom_hourly, Decimal('30000.00'))
+
+    def test_zero_or_missing_salary(self):
+        for salary in (None, '', 0, Decimal('0')):
+            with self.subTest(salary=salary):
+                self.assertEqual(overtime_pay(policy(), 240, salary, True), (Decimal('0.00'), Decimal('0.00')))
+        # Attendance overtime is only recorded for employees with a salary
+        result = compute_attendance_overtime(policy(), [720, 720], [480, 480], [0, 1056000000], [False, False])
+        self.assertEqual(result.overtime_minutes.tolist(), [0, 180])
+        self.assertEqual(result.amount_cents.tolist(), [0, 6000000])
+
+    def test_policy_from_work_settings_defaults(self):
+        class Settings:
+            overtime_rate_workday = None
+            overtime_rate_holiday = Decimal('1.2500')
+            overtime_threshold_minutes = 0
+            overtime_payment_threshold_minutes = None
+
+        loaded = OvertimePolicy.from_work_settings(Settings())
+        self.assertEqual(loaded.rate_workday, 5000)
+        self.assertEqual(loaded.rate_holiday, 12500)
+        self.assertEqual(loaded.threshold_minutes, 0)
+        self.assertEqual(loaded.payment_threshold_minutes, 60)
+
+    def test_employee_totals(self):
+        result = compute_overtime_pay(
+            policy(), [180, 120, 180], [1056000000] * 3, [False, False, True], employee_ids=[7, 3, 7],
+        )
+        self.assertEqual(result.employee_totals(), {
+            3: (120, Decimal('30000.00')),
+            7: (360, Decimal('150000.00')),
+        })
+        self.assertEqual(result.total_amount_cents, 18000000)
+
+
+class OvertimeTestCase(TestCase):
+    def setUp(self):
+        mark_caches_stale()
+        WorkSettings.objects.create()
+        self.division = Division.objects.create(name='Konsuler')
+        self.user, self.employee = self.make_employee('pegawai1', self.division, Decimal('12345678.90'))
+
+    def make_employee(self, username, division, gaji_pokok=None):
+        user = User.objects.create_user(username, password='pw')
+        employee = Employee.objects.create(
+            user=user, nip=f'1980010120000{user.pk:05d}', division=division, gaji_pokok=gaji_pokok,
+        )
+        return user, employee
+
+    def overtime(self, user, day, end, status='pending', request_type='regular', **fields):
+        attendance, _ = Attendance.objects.get_or_create(
+            user=user, date_local=day, defaults={'employee': user.employee_profile},
+        )
+        return OvertimeRequest.objects.create(
+            user=user, attendance=attendance, date=day, start_time=time(17, 0), end_time=end, status=status,
+            request_type=request_type, purpose='-', work_description='-', **fields
+        )
+
+
+class OvertimeSummaryTests(OvertimeTestCase):
+    """The grouped summary matches totals computed request by request"""
+
+    def test_summary_matches_per_request_totals(self):
+        march = date(2026, 3, 10)
+        self.overtime(self.user, march, time(20, 0))
+        self.overtime(self.user, march, time(20, 0))  # same combination, priced once
+        self.overtime(self.user, march, time(19, 30), request_type='holiday')
+        self.overtime(self.user, march, time(21, 15), status='level1_approved')
+        self.overtime(self.user, march, time(22, 0), status='approved')
+        self.overtime(self.user, march, time(19, 0), status='rejected')
+        self.overtime(self.user, march, time(18, 0), total_amount=Decimal('123.45'))
+        self.overtime(self.user, date(2026, 4, 1), time(23, 0))  # outside the range
+        _, unpaid = self.make_employee('pegawai2', self.division)
+        self.overtime(unpaid.user, march, time(20, 0))  # another user
+
+        start, end = date(2026, 3, 1), date(2026, 3, 31)
+        summary = OvertimeService().get_overtime_summary(self.user, start, end)['summary']
+
+        requests = list(OvertimeRequest.objects.filter(user=self.user, date__range=[start, end]))
+        amounts = {}
+        for overtime in requests:
+            amount = overtime.total_amount
+            if amount is None:
+                estimate = overtime.estimate_financial_details()
+                amount = estimate[1] if estimate and overtime.total_hours else Decimal('0')
+            amounts[overtime.status] = amounts.get(overtime.status, Decimal('0')) + amount
+
+        self.assertEqual(summary['total_requests'], len(requests))
+        self.assertEqual(summary['pending_requests'], 4)
+        self.assertEqual(summary['level1_approved_requests'], 1)
+        self.assertEqual(summary['approved_requests'], 1)
+        self.assertEqual(summary['rejected_requests'], 1)
+        self.assertEqual(summary['total_hours'], float(sum(o.total_hours for o in requests)))
+        self.assertEqual(summary['total_amount'], float(sum(amounts.values())))
+        self.assertEqual(summary['total_approved_amount'], float(amounts['approved']))
+        self.assertGreater(summary['total_amount'], 0)
+
+
+class OvertimeBulkApprovalTests(OvertimeTestCase):
+    """Bulk approve / reject: one result per id, scoped to the approver's divisions"""
+
+    def setUp(self):
+        super().setUp()
+        self.other_division = Division.objects.create(name='Protokol')
+        self.other_user, _ = self.make_employee('pegawai2', self.other_division, Decimal('9000000.00'))
+        self.supervisor, _ = self.make_employee('atasan1', self.division)
+        self.day = date(2026, 3, 10)
+
+    def service(self):
+        return OvertimeApprovalService(self.supervisor, lambda division_id: division_id == self.division.id)
+
+    def test_bulk_approve_partial_failure(self):
+        pending = self.overtime(self.user, self.day, time(20, 0))
+        rejected = self.overtime(self.user, date(2026, 3, 11), time(20, 0), status='rejected')
+        other_division = self.overtime(self.other_user, self.day, time(20, 0))
+
+        result = self.service().bulk_approve([pending.id, rejected.id, other_division.id, 999999], 1)
+
+        self.assertEqual(result['updated'], 1)
+        self.assertEqual(result['results'], [
+            {'id': pending.id, 'success': True, 'status': 'level1_approved'},
+            {'id': rejected.id, 'success': False, 'detail': 'Request is not pending approval.', 'status': 'rejected'},
+            {'id': other_division.id, 'success': False, 'detail': OvertimeApprovalService.NOT_FOUND},
+            {'id': 999999, 'success': False, 'detail': OvertimeApprovalService.NOT_FOUND},
+        ])
+        pending.refresh_from_db()
+        other_division.refresh_from_db()
+        self.assertEqual(pending.status, 'level1_approved')
+        self.assertEqual(pending.level1_approved_by, self.supervisor)
+        self.assertEqual(other_division.status, 'pending')
+
+    def test_final_approval_prices_requests(self):
+        level1 = self.overtime(self.user, self.day, time(21, 0), status='level1_approved')
+        result = self.service().bulk_approve([level1.id], 2)
+
+        level1.refresh_from_db()
+        expected_hourly, expected_amount = level1.estimate_financial_details()
+        self.assertEqual(level1.status, 'approved')
+        self.assertEqual(level1.final_approved_by, self.supervisor)
+        self.assertEqual(level1.total_amount, expected_amount)
+        self.assertEqual(level1.hourly_rate, expected_hourly)
+        self.assertEqual(result['results'][0]['total_amount'], expected_amount)
+
+    def test_bulk_reject_partial_failure(self):
+        pending = self.overtime(self.user, self.day, time(20, 0))
+        approved = self.overtime(self.user, date(2026, 3, 11), time(20, 0), status='approved')
+        other_division = self.overtime(self.other_user, self.day, time(20, 0))
+
+        result = self.service().bulk_reject([pending.id, approved.id, other_division.id], 'Tidak perlu')
+
+        self.assertEqual(result['updated'], 1)
+        self.assertEqual([r['success'] for r in result['results']], [True, False, False])
+        self.assertEqual(result['results'][1]['detail'], 'Request cannot be rejected in current status.')
+        pending.refresh_from_db()
+        self.assertEqual((pending.status, pending.rejection_reason), ('rejected', 'Tidak perlu'))
+        self.assertEqual(OvertimeRequest.objects.get(pk=other_division.pk).status, 'pending')
+
+    def test_endpoint_scopes_to_supervisors_division(self):
+        self.supervisor.groups.add(Group.objects.get_or_create(name='supervisor')[0])
+        Employee.objects.filter(user=self.supervisor).update(
+            position=Position.objects.create(name='Kepala Bidang', approval_level=1),
+        )
+        own = self.overtime(self.user, self.day, time(20, 0))
+        other_division = self.overtime(self.other_user, self.day, time(20, 0))
+
+        client = APIClient()
+        client.force_authenticate(self.supervisor)
+        response = client.post(
+            '/api/v2/overtime/overtime/bulk-approve/',
+            {'ids': [own.id, other_division.id], 'approval_level': 1},
+            format='json',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['success'] for r in response.data['results']], [True, False])
+        self.assertEqual(OvertimeRequest.objects.get(pk=other_division.pk).status, 'pending')
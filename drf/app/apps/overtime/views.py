@@ -10,54 +10,26 @@ from .serializers import (
     OvertimeRequestSerializer, OvertimeRequestAdminSerializer,
     OvertimeRequestSupervisorSerializer, OvertimeRequestEmployeeSerializer,
     OvertimeRequestCreateUpdateSerializer, OvertimeRequestApprovalSerializer,
-    OvertimeRequestListSerializer,
+    OvertimeRequestListSerializer, OvertimeBulkApproveSerializer, OvertimeBulkRejectSerializer,
     MonthlySummaryRequestSerializer, MonthlySummaryRequestAdminSerializer,
     MonthlySummaryRequestSupervisorSerializer, MonthlySummaryRequestEmployeeSerializer,
     MonthlySummaryRequestCreateUpdateSerializer, MonthlySummaryRequestApprovalSerializer,
     MonthlySummaryRequestListSerializer
 )
+from api.pagination import KeysetOrPageNumberPagination, KeysetPagination
+from apps.core.idempotency import idempotent_action
 from apps.core.permissions import IsAdmin, IsSupervisor, IsEmployee
-from .services import OvertimeService
-from django.http import HttpResponse
-from django.conf import settings
-import os
-import tempfile
-import requests
+from apps.reporting.exports import submit_export_response, wants_async
+from .documents import (
+    ALL_DIVISIONS, monthly_summaries_visible_to,
+    monthly_summary_docx_response, monthly_summary_pdf_response,
+    overtime_docx_response, overtime_pdf_response, overtime_requests_visible_to,
+    supervised_division_scope,
+)
+from .services import OvertimeApprovalService, OvertimeService
 import locale
 
 
-def format_date_indonesian(date_obj, format_type='full'):
-    """
-    Format tanggal dalam bahasa Indonesia
-    format_type: 'full' (dd MMMM yyyy), 'short' (dd MMM yyyy), 'month_year' (MMMM yyyy)
-    """
-    if not date_obj:
-        return '-'
-    
-    # Nama bulan dalam bahasa Indonesia
-    bulan_indonesia = {
-        1: 'Januari', 2: 'Februari', 3: 'Maret', 4: 'April',
-        5: 'Mei', 6: 'Juni', 7: 'Juli', 8: 'Agustus',
-        9: 'September', 10: 'Oktober', 11: 'November', 12: 'Desember'
-    }
-    
-    # Nama bulan singkat dalam bahasa Indonesia
-    bulan_singkat = {
-        1: 'Jan', 2: 'Feb', 3: 'Mar', 4: 'Apr',
-        5: 'Mei', 6: 'Jun', 7: 'Jul', 8: 'Agu',
-        9: 'Sep', 10: 'Okt', 11: 'Nov', 12: 'Des'
-    }
-    
-    if format_type == 'full':
-        return f"{date_obj.day:02d} {bulan_indonesia[date_obj.month]} {date_obj.year}"
-    elif format_type == 'short':
-        return f"{date_obj.day:02d} {bulan_singkat[date_obj.month]} {date_obj.year}"
-    elif format_type == 'month_year':
-        return f"{bulan_indonesia[date_obj.month]} {date_obj.year}"
-    else:
-        return str(date_obj)
-
-
 # Overtime Request Views
 class OvertimeRequestViewSet(viewsets.ModelViewSet):
     """Overtime request management ViewSet with role-based access"""
@@ -68,14 +40,16 @@ class OvertimeRequestViewSet(viewsets.ModelViewSet):
     search_fields = ['user__username', 'user__first_name', 'user__last_name', 'employee__name']
     ordering_fields = ['created_at', 'date', 'status']
     ordering = ['-created_at']
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
     
     def get_serializer_class(self):
         """Return appropriate serializer based on user role"""
         if self.action in ['create', 'update', 'partial_update']:
             return OvertimeRequestCreateUpdateSerializer
-        elif self.request.user.is_superuser or self.request.user.groups.filter(name='admin').exists():
+        elif self.request.principal.is_admin:
             return OvertimeRequestAdminSerializer
-        elif self.request.user.groups.filter(name='supervisor').exists():
+        elif self.request.principal.is_supervisor:
             return OvertimeRequestSupervisorSerializer
         else:
             return OvertimeRequestEmployeeSerializer
@@ -88,30 +62,7 @@ class OvertimeRequestViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Filter overtime requests based on user role and date range"""
-        queryset = OvertimeRequest.objects.all()
-        
-        # Apply role-based filtering
-        if self.request.user.is_superuser or self.request.user.groups.filter(name='admin').exists():
-            queryset = queryset
-        elif self.request.user.groups.filter(name='supervisor').exists():
-            # Supervisors can see overtime requests of employees in their division
-            # If they have org-wide approval, they can see all overtime requests
-            if hasattr(self.request.user, 'employee_profile') and self.request.user.employee_profile.position:
-                if self.request.user.employee_profile.position.can_approve_overtime_org_wide:
-                    # Org-wide approval: can see all overtime requests
-                    queryset = queryset
-                elif self.request.user.employee_profile.division:
-                    # Division-only approval: can see only their division's requests
-                    queryset = queryset.filter(
-                        employee__division=self.request.user.employee_profile.division
-                    )
-                else:
-                    queryset = queryset.none()
-            else:
-                queryset = queryset.none()
-        else:
-            # Regular employees can only see their own overtime requests
-            queryset = queryset.filter(user=self.request.user)
+        queryset = overtime_requests_visible_to(self.request.principal)
         
         # Apply date range filtering if start_date and end_date parameters are provided
         start_date = self.request.query_params.get('start_date')
@@ -133,6 +84,10 @@ class OvertimeRequestViewSet(viewsets.ModelViewSet):
         
         return queryset
     
+    def supervised_division_scope(self):
+        """Divisions whose overtime requests the user supervises (see documents.supervised_division_scope)"""
+        return supervised_division_scope(self.request.principal)
+    
     def perform_create(self, serializer):
         """Auto-set user when creating"""
         serializer.save(user=self.request.user)
@@ -141,264 +96,20 @@ class OvertimeRequestViewSet(viewsets.ModelViewSet):
     def download(self, request, pk=None):
         """Download approved overtime request as DOCX (v2)"""
         overtime_request = self.get_object()
-
-        if overtime_request.status != 'approved':
-            return Response(
-                {"detail": "Hanya overtime yang sudah disetujui yang dapat didownload"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        # Generate DOCX on-the-fly using template when available
-        try:
-            docx_bytes, filename = self._generate_docx(overtime_request)
-            response = HttpResponse(
-                docx_bytes,
-                content_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-            )
-            response['Content-Disposition'] = f'attachment; filename="{filename}"'
-            return response
-        except Exception as e:
-            return Response(
-                {"detail": f"Gagal generate dokumen: {str(e)}"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
+        if wants_async(request) and overtime_request.status == 'approved':
+            return submit_export_response(request, 'overtime_docx', overtime_request.pk)
+        return overtime_docx_response(overtime_request)
 
     @action(detail=True, methods=['get'])
     def export_pdf(self, request, pk=None):
         """Export approved overtime request to PDF using converter service (v2)"""
         overtime_request = self.get_object()
-
-        if overtime_request.status != 'approved':
-            return Response(
-                {"detail": "Overtime request must be approved to export PDF."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        try:
-            # 1) Generate a temporary DOCX
-            docx_bytes, base_filename = self._generate_docx(overtime_request)
-
-            with tempfile.NamedTemporaryFile(suffix='.docx', delete=False) as tmp:
-                tmp.write(docx_bytes)
-                tmp_path = tmp.name
-
-            try:
-                # 2) Convert via converter service
-                with open(tmp_path, 'rb') as f:
-                    files = {
-                        'file': (
-                            'document.docx',
-                            f,
-                            'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-                        )
-                    }
-                    data = {'method': 'file'}
-                    converter_url = 'http://docx_converter:5000/convert'
-                    r = requests.post(converter_url, files=files, data=data, timeout=60)
-                    if r.status_code != 200:
-                        return Response(
-                            {"detail": f"DOCX converter error: {r.status_code}"},
-                            status=status.HTTP_502_BAD_GATEWAY,
-                        )
-
-                    pdf_content = r.content
-            finally:
-                try:
-                    os.unlink(tmp_path)
-                except Exception:
-                    pass
-
-            # 3) Return PDF
-            pdf_filename = base_filename.replace('.docx', '.pdf')
-            response = HttpResponse(pdf_content, content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="{pdf_filename}"'
-            return response
-        except Exception as e:
-            return Response(
-                {"detail": f"Gagal export PDF: {str(e)}"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
-
-    def _get_template_path(self):
-        """Return best template path for overtime document or None."""
-        template_dir = os.path.join(settings.BASE_DIR, 'template')
-        if not os.path.isdir(template_dir):
-            return None
-
-        priority_names = [
-            'template_SURAT_PERINTAH_KERJA_LEMBUR.docx',
-            'template_overtime_clean.docx',
-            'template_overtime_working.docx',
-            'template_overtime_simple.docx',
-        ]
-
-        # Priority match
-        for name in priority_names:
-            path = os.path.join(template_dir, name)
-            if os.path.exists(path):
-                return path
-
-        # Fallback to any latest .docx
-        docx_files = [
-            os.path.join(template_dir, f)
-            for f in os.listdir(template_dir)
-            if f.endswith('.docx') and not f.startswith('~$')
-        ]
-        if not docx_files:
-            return None
-        docx_files.sort(key=lambda p: os.path.getmtime(p), reverse=True)
-        return docx_files[0]
-
-    def _generate_docx(self, overtime_request):
-        """Generate DOCX bytes for the overtime_request. Returns (bytes, filename)."""
-        try:
-            from docx import Document
-        except Exception:
-            raise RuntimeError('python-docx is not installed')
-
-        template_path = self._get_template_path()
-        if template_path and os.path.exists(template_path):
-            doc = Document(template_path)
-        else:
-            # Minimal fallback document
-            doc = Document()
-            doc.add_heading('Surat Perintah Kerja Lembur', level=1)
-
-        # Build replacements
-        employee = overtime_request.employee
-        employee_name = None
-        if employee:
-            # Prefer explicit display name
-            try:
-                employee_name = employee.display_name
-            except Exception:
-                employee_name = getattr(employee, 'fullname', None)
-        if not employee_name:
-            if employee and getattr(employee, 'user', None):
-                employee_name = employee.user.get_full_name() or employee.user.username
-            else:
-                employee_name = '-'
-
-        employee_nip = getattr(employee, 'nip', '-') if employee else '-'
-        nip_18 = employee_nip if employee_nip and len(employee_nip) >= 18 else employee_nip
-        if nip_18 and len(nip_18) < 18:
-            nip_18 = nip_18 + ('0' * (18 - len(nip_18)))
-        nip_9 = employee_nip[:9] if employee_nip else '-'
-
-        division_name = employee.get_division_name() if employee else '-'
-        position_name = employee.get_position_name() if employee else '-'
-
-        current_dt = timezone.now()
-        tahun = current_dt.strftime('%Y')
-        bulan = format_date_indonesian(current_dt.date(), 'month_year')
-        hari = current_dt.strftime('%d')
-        tanggal_doc = format_date_indonesian(current_dt.date(), 'full')
-
-        tanggal_lembur = format_date_indonesian(overtime_request.date, 'full') if overtime_request.date else '-'
-        jam_lembur = f"{overtime_request.total_hours} jam"
-        deskripsi = overtime_request.work_description
-        jumlah = f"{overtime_request.total_amount or 0}"
-
-        # Approver info
-        def _approver_name(user):
-            if not user:
-                return '-'
-            try:
-                emp = getattr(user, 'employee_profile', None)
-                if emp and getattr(emp, 'fullname', None):
-                    return emp.fullname
-            except Exception:
-                pass
-            return user.get_full_name() or user.username
-
-        def _approver_nip(user):
-            try:
-                emp = getattr(user, 'employee_profile', None)
-                return getattr(emp, 'nip', '-') if emp else '-'
-            except Exception:
-                return '-'
-
-        lvl1_name = _approver_name(getattr(overtime_request, 'level1_approved_by', None))
-        lvl1_nip = _approver_nip(getattr(overtime_request, 'level1_approved_by', None))
-        lvl1_at = getattr(overtime_request, 'level1_approved_at', None)
-        lvl1_date = format_date_indonesian(lvl1_at.date(), 'full') if lvl1_at else '-'
-
-        final_name = _approver_name(getattr(overtime_request, 'final_approved_by', None))
-        final_nip = _approver_nip(getattr(overtime_request, 'final_approved_by', None))
-        final_at = getattr(overtime_request, 'final_approved_at', None)
-        final_date = format_date_indonesian(final_at.date(), 'full') if final_at else '-'
-
-        nomor_dok = f"{overtime_request.id}/SPKL/KJRI-DXB/{tahun}"
-
-        replacements = {
-            # Document info
-            '{{NOMOR_DOKUMEN}}': nomor_dok,
-            '{{TANGGAL_DOKUMEN}}': tanggal_doc,
-            '{{TAHUN}}': tahun,
-            '{{BULAN}}': bulan,
-            '{{HARI}}': hari,
-
-            # Employee info
-            '{{NAMA_PEGAWAI}}': employee_name,
-            '{{NIP_PEGAWAI}}': employee_nip or '-',
-            '{{NIP}}': employee_nip or '-',
-            '{{NIP_LENGKAP}}': nip_18 or '-',
-            '{{NIP_18_DIGIT}}': nip_18 or '-',
-            '{{NIP_9_DIGIT}}': nip_9 or '-',
-            '{{JABATAN_PEGAWAI}}': position_name,
-            '{{DIVISI_PEGAWAI}}': division_name,
-
-            # Overtime details
-            '{{TANGGAL_LEMBUR}}': tanggal_lembur,
-            '{{JAM_LEMBUR}}': jam_lembur,
-            '{{DESKRIPSI_PEKERJAAN}}': deskripsi,
-            '{{JUMLAH_GAJI_LEMBUR}}': jumlah,
-
-            # Approval info
-            '{{LEVEL1_APPROVER}}': lvl1_name,
-            '{{LEVEL1_APPROVER_NIP}}': lvl1_nip,
-            '{{LEVEL1_APPROVAL_DATE}}': lvl1_date,
-            '{{FINAL_APPROVER}}': final_name,
-            '{{FINAL_APPROVER_NIP}}': final_nip,
-            '{{FINAL_APPROVAL_DATE}}': final_date,
-        }
-
-        # Replace in paragraphs
-        for paragraph in doc.paragraphs:
-            for old, new in replacements.items():
-                if old in paragraph.text:
-                    inline = paragraph.runs
-                    for i in range(len(inline)):
-                        inline[i].text = inline[i].text.replace(old, str(new))
-
-        # Replace in tables
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        for old, new in replacements.items():
-                            if old in paragraph.text:
-                                inline = paragraph.runs
-                                for i in range(len(inline)):
-                                    inline[i].text = inline[i].text.replace(old, str(new))
-
-        # Serialize to bytes
-        with tempfile.NamedTemporaryFile(suffix='.docx', delete=False) as tmp:
-            tmp_path = tmp.name
-            doc.save(tmp_path)
-        try:
-            with open(tmp_path, 'rb') as f:
-                content = f.read()
-        finally:
-            try:
-                os.unlink(tmp_path)
-            except Exception:
-                pass
-
-        base_filename = f"Surat_Perintah_Kerja_Lembur_{employee_nip or 'pegawai'}_{overtime_request.date}.docx"
-        return content, base_filename
+        if wants_async(request) and overtime_request.status == 'approved':
+            return submit_export_response(request, 'overtime_pdf', overtime_request.pk)
+        return overtime_pdf_response(overtime_request)
 
     @action(detail=True, methods=['post'], permission_classes=[IsSupervisor])
+    @idempotent_action()
     def approve(self, request, pk=None):
         """Approve an overtime request (Level 1 or Final)"""
         try:
@@ -464,17 +175,56 @@ class OvertimeRequestViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(overtime_request)
         return Response(serializer.data)
     
+    def _approval_service(self):
+        scope = self.supervised_division_scope()
+        
+        def can_manage_division(division_id):
+            return scope is ALL_DIVISIONS or (scope is not None and division_id == scope)
+        
+        return OvertimeApprovalService(self.request.user, can_manage_division)
+    
+    @action(detail=False, methods=['post'], url_path='bulk-approve', permission_classes=[IsSupervisor])
+    @idempotent_action()
+    def bulk_approve(self, request):
+        """
+        Approve many overtime requests at once (Level 1 or Final).
+        
+        Body: ``{"ids": [...], "approval_level": 1 | 2}``. Returns one result
+        per id; requests that cannot be approved are reported, not fatal.
+        """
+        serializer = OvertimeBulkApproveSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = self._approval_service().bulk_approve(
+            serializer.validated_data['ids'], serializer.validated_data['approval_level']
+        )
+        return Response(result)
+    
+    @action(detail=False, methods=['post'], url_path='bulk-reject', permission_classes=[IsSupervisor])
+    @idempotent_action()
+    def bulk_reject(self, request):
+        """Reject many overtime requests at once. Body: ``{"ids": [...], "rejection_reason": "..."}``"""
+        serializer = OvertimeBulkRejectSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = self._approval_service().bulk_reject(
+            serializer.validated_data['ids'], serializer.validated_data['rejection_reason']
+        )
+        return Response(result)
+    
     @action(detail=False, methods=['get'])
     def pending(self, request):
         """Get pending overtime requests for approval"""
         if not (request.user.is_superuser or 
-                request.user.groups.filter(name__in=['admin', 'supervisor']).exists()):
+                request.principal.has_role('admin', 'supervisor')):
             return Response(
                 {"error": "Only admins and supervisors can view pending overtime requests"}, 
                 status=status.HTTP_403_FORBIDDEN
             )
         
         queryset = self.get_queryset().filter(status='pending')
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = OvertimeRequestListSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         serializer = OvertimeRequestListSerializer(queryset, many=True)
         return Response(serializer.data)
     
@@ -482,6 +232,10 @@ class OvertimeRequestViewSet(viewsets.ModelViewSet):
     def my_overtime(self, request):
         """Get current user's overtime requests"""
         queryset = OvertimeRequest.objects.filter(user=request.user)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
     
@@ -494,6 +248,10 @@ class OvertimeRequestViewSet(viewsets.ModelViewSet):
         else:
             queryset = self.get_queryset()
         
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = OvertimeRequestListSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         serializer = OvertimeRequestListSerializer(queryset, many=True)
         return Response(serializer.data)
     
@@ -506,6 +264,10 @@ class OvertimeRequestViewSet(viewsets.ModelViewSet):
         else:
             queryset = self.get_queryset()
         
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = OvertimeRequestListSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         serializer = OvertimeRequestListSerializer(queryset, many=True)
         return Response(serializer.data)
     
@@ -515,15 +277,14 @@ class OvertimeRequestViewSet(viewsets.ModelViewSet):
         user = self.request.user
         
         # Only employees can view their potential overtime
-        if not user.groups.filter(name='pegawai').exists():
+        if not request.principal.is_employee:
             return Response(
                 {"detail": "Hanya pegawai yang dapat melihat potensi lembur"}, 
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        try:
-            employee = user.employee_profile
-        except:
+        employee = request.principal.employee
+        if employee is None:
             return Response(
                 {"detail": "User tidak memiliki profil employee"}, 
                 status=status.HTTP_400_BAD_REQUEST
@@ -532,7 +293,8 @@ class OvertimeRequestViewSet(viewsets.ModelViewSet):
         # Get date range (default: last 30 days)
         from datetime import date, timedelta
         from apps.attendance.models import Attendance
-        from apps.settings.models import WorkSettings
+        from apps.settings.calendars import get_work_calendar
+        from apps.settings.snapshot import get_work_settings
         
         start_date = request.query_params.get('start_date')
         end_date = request.query_params.get('end_date')
@@ -561,16 +323,18 @@ class OvertimeRequestViewSet(viewsets.ModelViewSet):
         
         # Get work settings
         try:
-            ws = WorkSettings.objects.first()
+            ws = get_work_settings()
         except:
             ws = None
         
-        # Get overtime threshold (respect 0 value)
-        overtime_threshold = int(ws.overtime_threshold_minutes) if ws and ws.overtime_threshold_minutes is not None else 30
+        # Overtime thresholds and rates (defaults when no settings exist; respects 0 values)
+        from .payroll import OvertimePolicy, attendance_overtime_minutes, compute_overtime_pay, to_cents
+        policy = OvertimePolicy.from_work_settings(ws)
+        overtime_threshold = policy.threshold_minutes
         
         # Get attendance records for the date range
         # Exclude records that already have overtime requests
-        attendance_records = Attendance.objects.filter(
+        attendance_records = list(Attendance.objects.filter(
             user=user,
             date_local__gte=start_date,
             date_local__lte=end_date,
@@ -578,48 +342,30 @@ class OvertimeRequestViewSet(viewsets.ModelViewSet):
             check_out_at_utc__isnull=False
         ).exclude(
             overtime_requests__isnull=False
-        ).order_by('date_local')
+        ).order_by('date_local'))
         
         potential_records = []
-        
-        for att in attendance_records:
-            # Determine required minutes based on day of week and settings
-            if att.date_local.weekday() == 4:  # Friday
-                required_minutes = int(ws.friday_required_minutes or 240) if ws else 240
-            else:
-                required_minutes = int(ws.required_minutes or 480) if ws else 480
-            
-            # Calculate potential overtime (total work - required - threshold)
-            potential_overtime_minutes = att.total_work_minutes - required_minutes - overtime_threshold
-            
+        work_calendar = get_work_calendar(start_date, end_date) if start_date <= end_date else None
+        
+        # Required minutes come from the precomputed day schedule (Friday rules included);
+        # minutes and amounts for the whole range come from one payroll engine call
+        required = [work_calendar.day(att.date_local).required_minutes for att in attendance_records]
+        overtime_minutes = attendance_overtime_minutes(
+            policy, [att.total_work_minutes for att in attendance_records], required
+        )
+        salary_cents = to_cents(employee.gaji_pokok) if ws else 0
+        payroll = compute_overtime_pay(
+            policy, overtime_minutes, [salary_cents] * len(attendance_records),
+            [att.is_holiday for att in attendance_records],
+        )
+        
+        for att, required_minutes, potential_overtime_minutes, amount_cents in zip(
+            attendance_records, required, payroll.overtime_minutes.tolist(), payroll.amount_cents.tolist()
+        ):
             # Only include if there's potential overtime (worked more than required + threshold)
             if potential_overtime_minutes > 0:
                 potential_overtime_hours = potential_overtime_minutes / 60
-                
-                # Calculate potential overtime amount with payment threshold policy
-                potential_amount = 0
-                if employee.gaji_pokok and ws:
-                    monthly_hours = 22 * 8
-                    hourly_wage = float(employee.gaji_pokok) / monthly_hours
-                    
-                    # Determine rate
-                    if att.is_holiday:
-                        rate = float(ws.overtime_rate_holiday or 0.75)
-                    else:
-                        rate = float(ws.overtime_rate_workday or 0.50)
-                    
-                    # Apply payment threshold policy
-                    payment_threshold_minutes = int(ws.overtime_payment_threshold_minutes or 60)
-                    potential_overtime_minutes = potential_overtime_hours * 60
-                    
-                    if potential_overtime_minutes > payment_threshold_minutes:
-                        # Only pay for minutes above the threshold
-                        payable_minutes = potential_overtime_minutes - payment_threshold_minutes
-                        payable_hours = payable_minutes / 60
-                        potential_amount = payable_hours * hourly_wage * rate
-                    else:
-                        # No payment if overtime is less than or equal to threshold
-                        potential_amount = 0
+                potential_amount = amount_cents / 100
                 
                 # Format times (convert UTC to local timezone)
                 check_in_time = None
@@ -669,7 +415,12 @@ class OvertimeRequestViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def summary(self, request):
-        """Get overtime summary for current user"""
+        """
+        Get overtime summary for current user.
+        
+        ``?include_requests=true`` adds the requests of the period under
+        ``requests``, paginated (``?page=`` / ``?page_size=``, or ``?cursor=``).
+        """
         # Get date range from query params
         end_date = date.today()
         start_date = end_date.replace(day=1)
@@ -692,19 +443,20 @@ class OvertimeRequestViewSet(viewsets.ModelViewSet):
         if result['success']:
             summary = result['summary']
             # Enrich with supervisor capability flags for frontend UI logic
-            is_admin = request.user.is_superuser or request.user.groups.filter(name='admin').exists()
+            is_admin = request.principal.is_admin
             can_org_wide = False
-            try:
-                emp = getattr(request.user, 'employee_profile', None)
-                pos = getattr(emp, 'position', None) if emp else None
-                if pos and getattr(pos, 'can_approve_overtime_org_wide', False):
-                    can_org_wide = True
-            except Exception:
-                can_org_wide = False
+            emp = request.principal.employee
+            pos = emp.position if emp else None
+            if pos and pos.can_approve_overtime_org_wide:
+                can_org_wide = True
             summary.update({
                 'can_approve_overtime_org_wide': can_org_wide,
                 'is_admin': is_admin,
             })
+            if request.query_params.get('include_requests', '').lower() in ('1', 'true'):
+                summary['requests'] = self._summary_requests_page(
+                    request, service.summary_requests(request.user, start_date, end_date)
+                )
             return Response(summary)
         else:
             return Response(
@@ -712,256 +464,52 @@ class OvertimeRequestViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+    def _summary_requests_page(self, request, queryset):
+        paginator = KeysetOrPageNumberPagination()
+        page = paginator.paginate_queryset(queryset.order_by('-created_at', '-id'), request, view=self)
+        rows = [
+            {
+                'id': overtime.id,
+                'date': overtime.date.isoformat(),
+                'total_hours': overtime.total_hours,
+                'total_amount': overtime.total_amount,
+                'status': overtime.status,
+            }
+            for overtime in page
+        ]
+        return paginator.get_paginated_response(rows).data
+
 
 # Monthly Summary Request Views
 class MonthlySummaryRequestViewSet(viewsets.ModelViewSet):
     """Monthly summary request management ViewSet with role-based access"""
     serializer_class = MonthlySummaryRequestSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
     
     def get_serializer_class(self):
         """Return appropriate serializer based on user role"""
-        if self.request.user.is_superuser or self.request.user.groups.filter(name='admin').exists():
+        if self.request.principal.is_admin:
             return MonthlySummaryRequestAdminSerializer
-        elif self.request.user.groups.filter(name='supervisor').exists():
+        elif self.request.principal.is_supervisor:
             return MonthlySummaryRequestSupervisorSerializer
         else:
             return MonthlySummaryRequestEmployeeSerializer
     
     def get_queryset(self):
         """Filter monthly summary requests based on user role"""
-        if self.request.user.is_superuser or self.request.user.groups.filter(name='admin').exists():
-            return MonthlySummaryRequest.objects.all()
-        elif self.request.user.groups.filter(name='supervisor').exists():
-            # Mirror overtime visibility: org-wide supervisors see all; else only their division
-            if hasattr(self.request.user, 'employee_profile') and self.request.user.employee_profile.position:
-                if self.request.user.employee_profile.position.can_approve_overtime_org_wide:
-                    return MonthlySummaryRequest.objects.all()
-                elif self.request.user.employee_profile.division:
-                    return MonthlySummaryRequest.objects.filter(
-                        employee__division=self.request.user.employee_profile.division
-                    )
-                else:
-                    return MonthlySummaryRequest.objects.none()
-            else:
-                return MonthlySummaryRequest.objects.none()
-        else:
-            # Regular employees can only see their own monthly summary requests
-            return MonthlySummaryRequest.objects.filter(user=self.request.user)
+        return monthly_summaries_visible_to(self.request.principal)
     
     def perform_create(self, serializer):
         """Set user when creating monthly summary request"""
         serializer.save(user=self.request.user)
     
-    def _get_monthly_template_path(self):
-        """Return best template path for monthly overtime summary document or None."""
-        template_dir = os.path.join(settings.BASE_DIR, 'template')
-        if not os.path.isdir(template_dir):
-            return None
-
-        priority_names = [
-            'template_rekap_lembur.docx',
-            'template_rekap_lembur_bulanan.docx',
-        ]
-
-        for name in priority_names:
-            path = os.path.join(template_dir, name)
-            if os.path.exists(path):
-                return path
-
-        # Fallback to any latest .docx in template dir
-        docx_files = [
-            os.path.join(template_dir, f)
-            for f in os.listdir(template_dir)
-            if f.endswith('.docx') and not f.startswith('~$')
-        ]
-        if not docx_files:
-            return None
-        docx_files.sort(key=lambda p: os.path.getmtime(p), reverse=True)
-        return docx_files[0]
-
-    def _generate_monthly_summary_docx(self, monthly_summary):
-        """Generate DOCX bytes for the monthly summary request. Returns (bytes, filename)."""
-        try:
-            from docx import Document
-        except Exception:
-            raise RuntimeError('python-docx is not installed')
-
-        template_path = self._get_monthly_template_path()
-        if template_path and os.path.exists(template_path):
-            doc = Document(template_path)
-        else:
-            doc = Document()
-            doc.add_heading('Rekap Lembur Bulanan', level=1)
-
-        employee = monthly_summary.employee
-        employee_name = None
-        if employee:
-            try:
-                employee_name = employee.display_name
-            except Exception:
-                employee_name = getattr(employee, 'fullname', None)
-        if not employee_name:
-            if employee and getattr(employee, 'user', None):
-                employee_name = employee.user.get_full_name() or employee.user.username
-            else:
-                employee_name = '-'
-
-        employee_nip = getattr(employee, 'nip', '-') if employee else '-'
-        division_name = employee.get_division_name() if employee else '-'
-        position_name = employee.get_position_name() if employee else '-'
-
-        # Determine month range
-        from calendar import monthrange
-        year = monthly_summary.year
-        month = monthly_summary.month
-        last_day = monthrange(year, month)[1]
-        from datetime import date as _date
-        start_date = _date(year, month, 1)
-        end_date = _date(year, month, last_day)
-
-        # Fetch approved overtime requests for this employee in period
-        requests_qs = OvertimeRequest.objects.filter(
-            employee=employee,
-            status='approved',
-            date__gte=start_date,
-            date__lte=end_date,
-        ).order_by('date')
-
-        total_hours = 0
-        total_amount = 0
-        rows = []
-        for r in requests_qs:
-            hrs = float(r.total_hours or 0)
-            amt = float(r.total_amount or 0)
-            total_hours += hrs
-            total_amount += amt
-            rows.append({
-                'date': r.date,
-                'hours': hrs,
-                'amount': amt,
-                'desc': r.work_description,
-            })
-
-        # Build replacements
-        bulan_tahun = f"{month:02d}/{year}"
-        
-        # Calculate additional metrics
-        total_days = len(rows)  # Number of days with overtime
-        avg_per_day = total_hours / total_days if total_days > 0 else 0
-        
-        # Get current date for export
-        from django.utils import timezone
-        current_dt = timezone.now()
-        tanggal_export = format_date_indonesian(current_dt.date(), 'full')
-        
-        # Get approval info for monthly summary
-        def _approver_name(user):
-            if not user:
-                return '-'
-            try:
-                emp = getattr(user, 'employee_profile', None)
-                if emp and getattr(emp, 'fullname', None):
-                    return emp.fullname
-            except Exception:
-                pass
-            return user.get_full_name() or user.username
-
-        def _approver_nip(user):
-            try:
-                emp = getattr(user, 'employee_profile', None)
-                return getattr(emp, 'nip', '-') if emp else '-'
-            except Exception:
-                return '-'
-
-        lvl1_name = _approver_name(getattr(monthly_summary, 'level1_approved_by', None))
-        lvl1_nip = _approver_nip(getattr(monthly_summary, 'level1_approved_by', None))
-        lvl1_at = getattr(monthly_summary, 'level1_approved_at', None)
-        lvl1_date = format_date_indonesian(lvl1_at.date(), 'full') if lvl1_at else '-'
-
-        final_name = _approver_name(getattr(monthly_summary, 'final_approved_by', None))
-        final_nip = _approver_nip(getattr(monthly_summary, 'final_approved_by', None))
-        final_at = getattr(monthly_summary, 'final_approved_at', None)
-        final_date = format_date_indonesian(final_at.date(), 'full') if final_at else '-'
-        
-        replacements = {
-            '{{NAMA_PEGAWAI}}': employee_name,
-            '{{NIP_PEGAWAI}}': employee_nip or '-',
-            '{{JABATAN_PEGAWAI}}': position_name,
-            '{{DIVISI_PEGAWAI}}': division_name,
-            '{{PERIODE}}': bulan_tahun,
-            '{{TOTAL_JAM_LEMBUR}}': f"{total_hours:.2f}",
-            '{{TOTAL_GAJI_LEMBUR}}': f"{total_amount:.2f}",
-            
-            # New placeholders
-            '{{PERIODE_EXPORT}}': f"{month:02d} {year}",
-            '{{TOTAL_HARI_LEMBUR}}': f"{total_days} hari",
-            '{{RATA_RATA_PER_HARI}}': f"{avg_per_day:.2f} jam",
-            '{{TANGGAL_EXPORT}}': tanggal_export,
-            
-            # Approval placeholders
-            '{{LEVEL1_APPROVER}}': lvl1_name,
-            '{{LEVEL1_APPROVER_NIP}}': lvl1_nip,
-            '{{LEVEL1_APPROVAL_DATE}}': lvl1_date,
-            '{{FINAL_APPROVER}}': final_name,
-            '{{FINAL_APPROVER_NIP}}': final_nip,
-            '{{FINAL_APPROVAL_DATE}}': final_date,
-        }
-
-        # Replace placeholders in paragraphs
-        for paragraph in doc.paragraphs:
-            for old, new in replacements.items():
-                if old in paragraph.text:
-                    runs = paragraph.runs
-                    for i in range(len(runs)):
-                        runs[i].text = runs[i].text.replace(old, str(new))
-
-        # Replace placeholders in tables
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        for old, new in replacements.items():
-                            if old in paragraph.text:
-                                runs = paragraph.runs
-                                for i in range(len(runs)):
-                                    runs[i].text = runs[i].text.replace(old, str(new))
-
-        # Append overtime table at the end
-        table = doc.add_table(rows=1, cols=4)
-        hdr_cells = table.rows[0].cells
-        hdr_cells[0].text = 'Tanggal'
-        hdr_cells[1].text = 'Jam Lembur'
-        hdr_cells[2].text = 'Jumlah'
-        hdr_cells[3].text = 'Deskripsi'
-        for item in rows:
-            row_cells = table.add_row().cells
-            row_cells[0].text = format_date_indonesian(item['date'], 'short')
-            row_cells[1].text = f"{item['hours']:.2f}j"
-            row_cells[2].text = f"{item['amount']:.2f}"
-            row_cells[3].text = item['desc'] or ''
-
-        # Serialize to bytes
-        with tempfile.NamedTemporaryFile(suffix='.docx', delete=False) as tmp:
-            tmp_path = tmp.name
-            doc.save(tmp_path)
-        try:
-            with open(tmp_path, 'rb') as f:
-                content = f.read()
-        finally:
-            try:
-                os.unlink(tmp_path)
-            except Exception:
-                pass
-
-        filename = f"rekap_lembur_{employee_nip or 'pegawai'}_{year}-{month:02d}.docx"
-        return content, filename
-
     @action(detail=True, methods=['post'])
     def approve(self, request, pk=None):
         """Approve or reject a monthly summary request (two-level approval)"""
         if not (request.user.is_superuser or 
-                request.user.groups.filter(name__in=['admin', 'supervisor']).exists()):
+                request.principal.has_role('admin', 'supervisor')):
             return Response(
                 {"error": "Only admins and supervisors can approve monthly summary requests"}, 
                 status=status.HTTP_403_FORBIDDEN
@@ -979,7 +527,7 @@ class MonthlySummaryRequestViewSet(viewsets.ModelViewSet):
                 # Determine approval level based on role if not provided
                 if approval_level is None:
                     # Org-wide approvers (admin) default to final approval
-                    if request.user.is_superuser or request.user.groups.filter(name='admin').exists():
+                    if request.principal.is_admin:
                         approval_level = 2
                     else:
                         approval_level = 1
@@ -1009,7 +557,7 @@ class MonthlySummaryRequestViewSet(viewsets.ModelViewSet):
     def reject(self, request, pk=None):
         """Reject a monthly summary request"""
         if not (request.user.is_superuser or 
-                request.user.groups.filter(name__in=['admin', 'supervisor']).exists()):
+                request.principal.has_role('admin', 'supervisor')):
             return Response(
                 {"error": "Only admins and supervisors can reject monthly summary requests"}, 
                 status=status.HTTP_403_FORBIDDEN
@@ -1032,13 +580,17 @@ class MonthlySummaryRequestViewSet(viewsets.ModelViewSet):
     def pending(self, request):
         """Get pending monthly summary requests for approval"""
         if not (request.user.is_superuser or 
-                request.user.groups.filter(name__in=['admin', 'supervisor']).exists()):
+                request.principal.has_role('admin', 'supervisor')):
             return Response(
                 {"error": "Only admins and supervisors can view pending monthly summary requests"}, 
                 status=status.HTTP_403_FORBIDDEN
             )
         
         queryset = self.get_queryset().filter(status='pending')
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = MonthlySummaryRequestListSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         serializer = MonthlySummaryRequestListSerializer(queryset, many=True)
         return Response(serializer.data)
     
@@ -1046,63 +598,26 @@ class MonthlySummaryRequestViewSet(viewsets.ModelViewSet):
     def export_docx(self, request, pk=None):
         """Export approved monthly summary to DOCX."""
         summary = self.get_object()
-        if summary.status != 'approved':
-            return Response({"detail": "Monthly summary must be approved to export."}, status=status.HTTP_400_BAD_REQUEST)
-        try:
-            docx_bytes, filename = self._generate_monthly_summary_docx(summary)
-            response = HttpResponse(
-                docx_bytes,
-                content_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-            )
-            response['Content-Disposition'] = f'attachment; filename="{filename}"'
-            return response
-        except Exception as e:
-            return Response({"detail": f"Gagal export DOCX: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        if wants_async(request) and summary.status == 'approved':
+            return submit_export_response(request, 'monthly_summary_docx', summary.pk)
+        return monthly_summary_docx_response(summary)
 
     @action(detail=True, methods=['get'])
     def export_pdf(self, request, pk=None):
         """Export approved monthly summary to PDF using converter service."""
         summary = self.get_object()
-        if summary.status != 'approved':
-            return Response({"detail": "Monthly summary must be approved to export PDF."}, status=status.HTTP_400_BAD_REQUEST)
-        try:
-            # Generate DOCX first
-            docx_bytes, base_filename = self._generate_monthly_summary_docx(summary)
-            with tempfile.NamedTemporaryFile(suffix='.docx', delete=False) as tmp:
-                tmp.write(docx_bytes)
-                tmp_path = tmp.name
-            try:
-                with open(tmp_path, 'rb') as f:
-                    files = {
-                        'file': (
-                            'document.docx',
-                            f,
-                            'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-                        )
-                    }
-                    data = {'method': 'file'}
-                    converter_url = 'http://docx_converter:5000/convert'
-                    r = requests.post(converter_url, files=files, data=data, timeout=60)
-                    if r.status_code != 200:
-                        return Response({"detail": f"DOCX converter error: {r.status_code}"}, status=status.HTTP_502_BAD_GATEWAY)
-                    pdf_content = r.content
-            finally:
-                try:
-                    os.unlink(tmp_path)
-                except Exception:
-                    pass
-
-            pdf_filename = base_filename.replace('.docx', '.pdf')
-            response = HttpResponse(pdf_content, content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="{pdf_filename}"'
-            return response
-        except Exception as e:
-            return Response({"detail": f"Gagal export PDF: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        if wants_async(request) and summary.status == 'approved':
+            return submit_export_response(request, 'monthly_summary_pdf', summary.pk)
+        return monthly_summary_pdf_response(summary)
 
     @action(detail=False, methods=['get'])
     def my_summaries(self, request):
         """Get current user's monthly summary requests"""
         queryset = MonthlySummaryRequest.objects.filter(user=request.user)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
     
@@ -1118,6 +633,10 @@ class MonthlySummaryRequestViewSet(viewsets.ModelViewSet):
         if year:
             queryset = queryset.filter(year=year)
         
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = MonthlySummaryRequestListSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         serializer = MonthlySummaryRequestListSerializer(queryset, many=True)
         return Response(serializer.data)
 
@@ -1138,21 +657,16 @@ class SupervisorOvertimeRequestViewSet(OvertimeRequestViewSet):
     def get_queryset(self):
         # Supervisors can see overtime requests of employees in their division
         # If they have org-wide approval, they can see all overtime requests
-        if hasattr(self.request.user, 'employee_profile'):
-            employee_profile = self.request.user.employee_profile
-            
+        principal = self.request.principal
+        if principal.employee:
             # Check if user has org-wide approval capability
-            can_approve_org_wide = False
-            if hasattr(employee_profile, 'approval_capabilities') and employee_profile.approval_capabilities:
-                can_approve_org_wide = employee_profile.approval_capabilities.get('can_approve_overtime_org_wide', False)
-            
-            if can_approve_org_wide:
+            if principal.capabilities['can_approve_overtime_org_wide']:
                 # Org-wide approval: can see all overtime requests
                 return OvertimeRequest.objects.all()
-            elif employee_profile.division:
+            elif principal.division:
                 # Division-only approval: can see only their division's requests
                 return OvertimeRequest.objects.filter(
-                    employee__division=employee_profile.division
+                    employee__division=principal.division
                 )
         return OvertimeRequest.objects.none()
 
@@ -0,0 +1,324 @@
+"""
+Asynchronous export jobs.
+
+The PDF/DOCX export actions (attendance ``export_pdf``, supervisor
+``team_attendance_pdf``, overtime ``export_pdf`` / ``download`` and
+monthly summary ``export_pdf`` / ``export_docx``) can take tens of seconds and used to hold a web worker
+for all of it. An export job is a ``GeneratedReport`` row with an
+``export_kind``: submitting one is a single insert, and the
+``run_export_worker`` management command claims pending rows, renders
+them and stores the file in ``output_file``.
+
+Each kind names a renderer ``(principal, params, object_id)`` that the
+synchronous action also calls (apps.attendance.reports,
+apps.overtime.documents). The worker calls it directly with the
+Principal of the job's user and the stored query parameters, so the
+file, the role scoping and the validation errors are exactly what the
+synchronous endpoint would have produced, without building a request.
+"""
+import logging
+import re
+import tempfile
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db.models import F
+from django.http import Http404
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import APIException
+
+from .models import GeneratedReport
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOB_TTL_HOURS = 24
+DEFAULT_STALE_SECONDS = 15 * 60
+DEFAULT_MAX_ATTEMPTS = 3
+ASYNC_QUERY_PARAM = 'async'
+
+ACTIVE_STATUSES = ('pending', 'processing')
+
+
+@dataclass(frozen=True)
+class ExportKind:
+    """An export action that can be rendered by the worker"""
+    name: str
+    label: str
+    report_type: str
+    # Dotted path of a ``(principal, params, object_id)`` function returning the response
+    renderer: str
+    # Exports of one object (``object_id`` required)
+    detail: bool = False
+
+    def get_renderer(self):
+        return import_string(self.renderer)
+
+
+EXPORT_KINDS = {
+    kind.name: kind
+    for kind in [
+        ExportKind(
+            'attendance_pdf', 'Laporan Absensi', 'attendance',
+            'apps.attendance.reports.attendance_report_pdf',
+        ),
+        ExportKind(
+            'team_attendance_pdf', 'Laporan Absensi Tim', 'attendance',
+            'apps.attendance.reports.team_attendance_report_pdf',
+        ),
+        ExportKind(
+            'overtime_pdf', 'Surat Perintah Lembur (PDF)', 'overtime',
+            'apps.overtime.documents.render_overtime_pdf', detail=True,
+        ),
+        ExportKind(
+            'overtime_docx', 'Surat Perintah Lembur (DOCX)', 'overtime',
+            'apps.overtime.documents.render_overtime_docx', detail=True,
+        ),
+        ExportKind(
+            'monthly_summary_pdf', 'Rekap Lembur Bulanan (PDF)', 'summary',
+            'apps.overtime.documents.render_monthly_summary_pdf', detail=True,
+        ),
+        ExportKind(
+            'monthly_summary_docx', 'Rekap Lembur Bulanan (DOCX)', 'summary',
+            'apps.overtime.documents.render_monthly_summary_docx', detail=True,
+        ),
+    ]
+}
+
+EXPORT_KIND_CHOICES = [(kind.name, kind.label) for kind in EXPORT_KINDS.values()]
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def wants_async(request):
+    """True if the export action was called with ``?async=true``"""
+    return request.query_params.get(ASYNC_QUERY_PARAM, '').lower() in ('1', 'true')
+
+
+def submit_export(user, kind, params=None, object_id=None):
+    """
+    Queue an export job and return its GeneratedReport.
+
+    An identical job of the same user that is still pending or processing
+    is returned instead of queueing a duplicate.
+    """
+    export_kind = EXPORT_KINDS[kind]
+    params = {
+        key: value for key, value in (params or {}).items()
+        if key != ASYNC_QUERY_PARAM and value not in (None, '')
+    }
+    parameters = {'params': params, 'object_id': object_id}
+
+    existing = GeneratedReport.objects.filter(
+        requested_by=user,
+        export_kind=kind,
+        status__in=ACTIVE_STATUSES,
+        parameters=parameters,
+    ).first()
+    if existing is not None:
+        return existing
+
+    name = export_kind.label if object_id is None else f"{export_kind.label} #{object_id}"
+    return GeneratedReport.objects.create(
+        name=name,
+        report_type=export_kind.report_type,
+        export_kind=kind,
+        parameters=parameters,
+        requested_by=user,
+        status='pending',
+        expires_at=timezone.now() + timedelta(hours=_setting('EXPORT_JOB_TTL_HOURS', DEFAULT_JOB_TTL_HOURS)),
+    )
+
+
+def export_job_response(request, job):
+    """202 Accepted with the job status and a Location to poll"""
+    from django.urls import reverse
+    from rest_framework import status
+    from rest_framework.response import Response
+    from .serializers import ExportJobSerializer
+
+    response = Response(ExportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+    response['Location'] = request.build_absolute_uri(reverse('export-detail', kwargs={'pk': job.id}))
+    return response
+
+
+def submit_export_response(request, kind, object_id=None):
+    """Queue ``kind`` with the request's query parameters and return the 202 response"""
+    job = submit_export(request.user, kind, request.query_params.dict(), object_id)
+    return export_job_response(request, job)
+
+
+def claim_exports(limit, worker_id):
+    """
+    Move up to ``limit`` of the oldest pending export jobs to processing.
+
+    Each row is claimed with a conditional UPDATE, so concurrent workers
+    never render the same job twice.
+    """
+    if limit <= 0:
+        return []
+    candidates = list(
+        GeneratedReport.objects
+        .filter(status='pending')
+        .exclude(export_kind='')
+        .order_by('created_at', 'id')
+        .values_list('id', flat=True)[:limit]
+    )
+    claimed = []
+    for report_id in candidates:
+        now = timezone.now()
+        updated = GeneratedReport.objects.filter(id=report_id, status='pending').update(
+            status='processing',
+            worker_id=worker_id[:100],
+            started_at=now,
+            attempts=F('attempts') + 1,
+            updated_at=now,
+        )
+        if updated:
+            claimed.append(report_id)
+    return claimed
+
+
+def heartbeat_exports(report_ids, worker_id):
+    """
+    Refresh ``updated_at`` of the jobs ``worker_id`` is still rendering, so
+    requeue_stale_exports leaves long renders alone. Returns the number of
+    rows touched.
+    """
+    if not report_ids:
+        return 0
+    return GeneratedReport.objects.filter(
+        id__in=report_ids, status='processing', worker_id=worker_id[:100],
+    ).update(updated_at=timezone.now())
+
+
+def requeue_stale_exports():
+    """
+    Return jobs stuck in processing (no heartbeat for
+    ``EXPORT_JOB_STALE_SECONDS``: their worker died) to the queue, or fail
+    them once they have used up their attempts. Returns the number of rows
+    touched.
+    """
+    now = timezone.now()
+    stale = GeneratedReport.objects.filter(
+        status='processing',
+        updated_at__lt=now - timedelta(seconds=_setting('EXPORT_JOB_STALE_SECONDS', DEFAULT_STALE_SECONDS)),
+    ).exclude(export_kind='')
+    max_attempts = _setting('EXPORT_JOB_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)
+    failed = stale.filter(attempts__gte=max_attempts).update(
+        status='failed',
+        error_message='Export melebihi batas waktu proses',
+        completed_at=now,
+        updated_at=now,
+    )
+    requeued = stale.filter(attempts__lt=max_attempts).update(
+        status='pending',
+        worker_id='',
+        updated_at=now,
+    )
+    return failed + requeued
+
+
+def purge_expired_exports():
+    """Delete expired export jobs and their files. Returns the number of jobs removed."""
+    expired = GeneratedReport.objects.filter(
+        expires_at__lte=timezone.now(),
+    ).exclude(export_kind='').exclude(status__in=ACTIVE_STATUSES)
+    count = 0
+    for report in expired.iterator():
+        if report.output_file:
+            report.output_file.delete(save=False)
+        report.delete()
+        count += 1
+    return count
+
+
+def render_export(report_id):
+    """
+    Render one claimed job and store the result on the report.
+
+    Returns True when the file was stored, False when the job failed.
+    """
+    from apps.core.principal import Principal
+
+    report = GeneratedReport.objects.select_related('requested_by').get(id=report_id)
+    export_kind = EXPORT_KINDS.get(report.export_kind)
+    if export_kind is None:
+        _fail(report, f'Jenis export tidak dikenal: {report.export_kind}')
+        return False
+    user = report.requested_by
+    if user is None or not user.is_active:
+        _fail(report, 'Pengguna yang meminta export tidak aktif')
+        return False
+
+    parameters = report.parameters or {}
+    try:
+        response = export_kind.get_renderer()(
+            Principal(user), parameters.get('params') or {}, parameters.get('object_id')
+        )
+        if response.status_code != 200:
+            _fail(report, _error_detail(response))
+            return False
+        _store(report, response)
+    except Http404:
+        _fail(report, 'Data tidak ditemukan')
+        return False
+    except APIException as exc:
+        _fail(report, str(exc.detail))
+        return False
+    except Exception as exc:
+        logger.exception('Export job %s failed', report.id)
+        _fail(report, f'Gagal membuat export: {exc}')
+        return False
+    return True
+
+
+def _store(report, response):
+    filename = _filename(response) or f'{report.export_kind}-{report.id}'
+    with tempfile.TemporaryFile() as spool:
+        chunks = response.streaming_content if response.streaming else [response.content]
+        for chunk in chunks:
+            spool.write(chunk)
+        if hasattr(response, 'close'):
+            response.close()
+        size = spool.tell()
+        spool.seek(0)
+        report.output_file.save(filename, File(spool, name=filename), save=False)
+
+    report.file_size = size
+    report.mime_type = (response.get('Content-Type') or '').split(';')[0] or None
+    report.status = 'completed'
+    report.error_message = ''
+    report.completed_at = timezone.now()
+    report.save(update_fields=[
+        'output_file', 'file_size', 'mime_type', 'status',
+        'error_message', 'completed_at', 'updated_at',
+    ])
+
+
+def _fail(report, message):
+    report.status = 'failed'
+    report.error_message = message
+    report.completed_at = timezone.now()
+    report.save(update_fields=['status', 'error_message', 'completed_at', 'updated_at'])
+
+
+def _filename(response):
+    match = re.search(r'filename="?([^";]+)"?', response.get('Content-Disposition', ''))
+    return match.group(1) if match else None
+
+
+def _error_detail(response):
+    data = getattr(response, 'data', None)
+    if isinstance(data, dict):
+        for key in ('detail', 'error'):
+            if data.get(key):
+                return str(data[key])
+        return str(data)
+    return f'HTTP {response.status_code}'
+
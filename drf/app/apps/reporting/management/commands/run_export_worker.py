@@ -0,0 +1,98 @@
+import os
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from apps.reporting.exports import (
+    claim_exports, heartbeat_exports, purge_expired_exports, render_export, requeue_stale_exports
+)
+
+
+MAINTENANCE_INTERVAL_SECONDS = 60
+
+
+def _run_job(report_id):
+    # Each pool thread has its own DB connection; don't leave it open between jobs
+    try:
+        return render_export(report_id)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Render queued export jobs (GeneratedReport rows with an export_kind)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=getattr(settings, 'EXPORT_WORKER_CONCURRENCY', 4),
+            help='Number of exports rendered in parallel',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=getattr(settings, 'EXPORT_WORKER_POLL_SECONDS', 2.0),
+            help='Seconds to wait between polls when the queue is empty',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Render the jobs that are pending now, then exit',
+        )
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options['concurrency'])
+        poll_interval = max(0.1, options['poll_interval'])
+        worker_id = f'{socket.gethostname()}:{os.getpid()}'
+
+        self.stdout.write(f'Export worker {worker_id} started (concurrency={concurrency})')
+        completed = failed = 0
+        last_maintenance = None
+        # future -> report id of the jobs this worker is rendering
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='export') as pool:
+            try:
+                while True:
+                    close_old_connections()
+                    if last_maintenance is None or time.monotonic() - last_maintenance > MAINTENANCE_INTERVAL_SECONDS:
+                        # Our own long renders must not look stale to any worker
+                        heartbeat_exports(list(running.values()), worker_id)
+                        requeued = requeue_stale_exports()
+                        purged = purge_expired_exports()
+                        last_maintenance = time.monotonic()
+                        if requeued or purged:
+                            self.stdout.write(f'Requeued {requeued} stale jobs, purged {purged} expired exports')
+
+                    for report_id in claim_exports(concurrency - len(running), worker_id):
+                        running[pool.submit(_run_job, report_id)] = report_id
+
+                    if not running:
+                        if options['once']:
+                            break
+                        time.sleep(poll_interval)
+                        continue
+
+                    done, _ = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        del running[future]
+                        try:
+                            ok = future.result()
+                        except Exception as e:
+                            ok = False
+                            self.stdout.write(self.style.ERROR(f'Error: {str(e)}'))
+                        if ok:
+                            completed += 1
+                        else:
+                            failed += 1
+            except KeyboardInterrupt:
+                self.stdout.write(self.style.WARNING('Stopping; waiting for running exports to finish'))
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Export worker stopped: {completed} completed, {failed} failed')
+        )
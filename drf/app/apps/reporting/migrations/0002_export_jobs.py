@@ -0,0 +1,44 @@
+# Generated by Django 5.0.2 on 2026-10-17 04:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reporting', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generatedreport',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Attempts'),
+        ),
+        migrations.AddField(
+            model_name='generatedreport',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Completed At'),
+        ),
+        migrations.AddField(
+            model_name='generatedreport',
+            name='export_kind',
+            field=models.CharField(blank=True, max_length=50, verbose_name='Export Kind'),
+        ),
+        migrations.AddField(
+            model_name='generatedreport',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Started At'),
+        ),
+        migrations.AddField(
+            model_name='generatedreport',
+            name='worker_id',
+            field=models.CharField(blank=True, max_length=100, verbose_name='Worker'),
+        ),
+        migrations.AddIndex(
+            model_name='generatedreport',
+            index=models.Index(fields=['status', 'export_kind', 'created_at'], name='report_export_queue_idx'),
+        ),
+    ]
@@ -156,10 +156,40 @@ class GeneratedReport(TimeStampedModel):
         verbose_name="Expires At"
     )
     
+    # Asynchronous export jobs (apps.reporting.exports)
+    export_kind = models.CharField(
+        max_length=50,
+        blank=True,
+        verbose_name="Export Kind"
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name="Attempts"
+    )
+    worker_id = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name="Worker"
+    )
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Started At"
+    )
+    completed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Completed At"
+    )
+    
     class Meta:
         ordering = ['-created_at']
         verbose_name = "Generated Report"
         verbose_name_plural = "Generated Reports"
+        indexes = [
+            # Worker polling: oldest pending export first
+            models.Index(fields=['status', 'export_kind', 'created_at'], name='report_export_queue_idx'),
+        ]
     
     def __str__(self) -> str:
         return f"{self.name} - {self.get_status_display()}"
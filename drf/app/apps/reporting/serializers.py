@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from .models import ReportTemplate, GeneratedReport, ReportSchedule, ReportAccessLog
+from .exports import EXPORT_KINDS, EXPORT_KIND_CHOICES
 from apps.employees.serializers import EmployeeSerializer, DivisionSerializer
 
 User = get_user_model()
@@ -97,6 +98,31 @@ class GeneratedReportCreateSerializer(serializers.Serializer):
     expires_in_days = serializers.IntegerField(min_value=1, max_value=365, required=False)
 
 
+# Export Job Serializers
+class ExportJobSerializer(serializers.ModelSerializer):
+    """Status of an asynchronous export job"""
+    class Meta:
+        model = GeneratedReport
+        fields = [
+            "id", "name", "export_kind", "report_type", "status", "parameters",
+            "file_size", "mime_type", "error_message", "attempts",
+            "created_at", "started_at", "completed_at", "expires_at"
+        ]
+        read_only_fields = fields
+
+
+class ExportJobCreateSerializer(serializers.Serializer):
+    """Serializer for submitting an export job"""
+    kind = serializers.ChoiceField(choices=EXPORT_KIND_CHOICES)
+    object_id = serializers.IntegerField(required=False, min_value=1)
+    params = serializers.DictField(child=serializers.CharField(allow_blank=True), default=dict)
+
+    def validate(self, attrs):
+        if EXPORT_KINDS[attrs['kind']].detail and not attrs.get('object_id'):
+            raise serializers.ValidationError({'object_id': 'object_id wajib diisi untuk jenis export ini'})
+        return attrs
+
+
 # Report Schedule Serializers
 class ReportScheduleSerializer(serializers.ModelSerializer):
     """Base report schedule serializer"""
@@ -3,10 +3,13 @@ from django.contrib.auth import get_user_model
 from django.db.models import Q, Sum, Avg, Count
 from datetime import date, datetime, timedelta
 from .models import ReportTemplate, GeneratedReport, ReportSchedule
+from apps.attendance.absence import AbsenceEngine
 from apps.attendance.models import Attendance
+from apps.attendance.rollups import monthly_totals
 from apps.overtime.models import OvertimeRequest, MonthlySummaryRequest
 from apps.employees.models import Employee, Division
-from apps.settings.models import WorkSettings
+from apps.settings.calendars import get_work_calendar
+from apps.settings.snapshot import get_work_settings
 
 User = get_user_model()
 
@@ -15,7 +18,7 @@ class ReportGenerationService:
     """Service class for generating various types of reports"""
     
     def __init__(self):
-        self.work_settings = WorkSettings.objects.first()
+        self.work_settings = get_work_settings()
     
     def generate_attendance_report(self, parameters, user):
         """Generate attendance report based on parameters"""
@@ -192,6 +195,9 @@ class ReportGenerationService:
                 else:
                     end_date = date(today.year, today.month + 1, 1) - timedelta(days=1)
             
+            # Schedule for the whole period, shared by every employee row
+            work_calendar = get_work_calendar(start_date, end_date)
+            
             # Get employees
             employees_queryset = Employee.objects.all()
             if division_id:
@@ -213,11 +219,21 @@ class ReportGenerationService:
                 'summary': {
                     'total_employees': employees.count(),
                     'total_divisions': employees.values('division').distinct().count(),
-                    'period_days': (end_date - start_date).days + 1
+                    'period_days': (end_date - start_date).days + 1,
+                    'working_days': work_calendar.working_days_between(start_date, end_date),
+                    'required_work_minutes': work_calendar.total_required_minutes(start_date, end_date)
                 },
                 'divisions': []
             }
             
+            # Attendance totals for every employee at once, read from the monthly rollup
+            attendance_totals = monthly_totals(
+                employees.values_list('id', flat=True), start_date, end_date
+            )
+            absences = AbsenceEngine(start_date, end_date, work_calendar=work_calendar).for_employees(
+                employees.values_list('id', flat=True)
+            )
+            
             # Group by division
             for division in employees.values('division__name').distinct():
                 division_name = division['division__name']
@@ -231,12 +247,6 @@ class ReportGenerationService:
                 
                 # Get data for each employee
                 for employee in division_employees:
-                    # Get attendance data
-                    attendances = Attendance.objects.filter(
-                        employee=employee,
-                        date_local__range=[start_date, end_date]
-                    )
-                    
                     # Get overtime data
                     overtime_requests = OvertimeRequest.objects.filter(
                         employee=employee,
@@ -248,7 +258,9 @@ class ReportGenerationService:
                         'nip': employee.nip,
                         'name': employee.fullname,
                         'position': employee.position.name if employee.position else None,
-                        'attendance_summary': self._calculate_employee_attendance_summary(attendances),
+                        'attendance_summary': self._employee_attendance_summary_from_totals(
+                            attendance_totals[employee.id], absences[employee.id]
+                        ),
                         'overtime_summary': self._calculate_employee_overtime_summary(overtime_requests)
                     }
                     
@@ -320,31 +332,27 @@ class ReportGenerationService:
             'total_amount': round(total_amount, 2)
         }
     
-    def _calculate_employee_attendance_summary(self, attendances):
-        """Calculate attendance summary for a specific employee"""
-        if not attendances:
+    def _employee_attendance_summary_from_totals(self, totals, absence=None):
+        """
+        Employee attendance summary built from rollup totals (see apps.attendance.rollups)
+        and, when given, the calendar-based AbsenceReport for the period.
+        """
+        if not totals['record_days'] and not (absence and absence.expected_days):
             return {}
         
-        total_days = len(attendances)
-        work_days = sum(1 for a in attendances if not a.is_holiday)
-        holidays = sum(1 for a in attendances if a.is_holiday)
-        check_ins = sum(1 for a in attendances if a.check_in_at_utc)
-        check_outs = sum(1 for a in attendances if a.check_out_at_utc)
-        late_days = sum(1 for a in attendances if a.minutes_late > 0)
-        
-        total_work_minutes = sum(a.total_work_minutes or 0 for a in attendances)
-        total_overtime_minutes = sum(a.overtime_minutes or 0 for a in attendances)
-        
-        return {
-            'total_days': total_days,
-            'work_days': work_days,
-            'holidays': holidays,
-            'check_ins': check_ins,
-            'check_outs': check_outs,
-            'late_days': late_days,
-            'total_work_minutes': total_work_minutes,
-            'total_overtime_minutes': total_overtime_minutes
+        summary = {
+            'total_days': totals['record_days'],
+            'work_days': totals['record_days'] - totals['holiday_days'],
+            'holidays': totals['holiday_days'],
+            'check_ins': totals['present_days'],
+            'check_outs': totals['check_out_days'],
+            'late_days': totals['late_days'],
+            'total_work_minutes': totals['total_work_minutes'],
+            'total_overtime_minutes': totals['total_overtime_minutes']
         }
+        if absence is not None:
+            summary.update(absence.as_dict())
+        return summary
     
     def _calculate_employee_overtime_summary(self, overtime_requests):
         """Calculate overtime summary for a specific employee"""
@@ -0,0 +1,105 @@
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.employees.models import Employee
+from apps.settings.models import WorkSettings
+from apps.settings.snapshot import mark_caches_stale
+from .exports import (
+    claim_exports, heartbeat_exports, render_export, requeue_stale_exports, submit_export
+)
+from .models import GeneratedReport
+
+
+class RenderExportTests(TestCase):
+    """The worker renders jobs by calling the report functions as the job's user"""
+
+    def setUp(self):
+        mark_caches_stale()
+        WorkSettings.objects.create()
+        self.user = User.objects.create_user('pegawai1', password='pw')
+        Employee.objects.create(user=self.user, nip='198001012000011001')
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def render(self, job):
+        result = render_export(job.id)
+        job.refresh_from_db()
+        return result
+
+    def test_attendance_pdf(self):
+        job = submit_export(self.user, 'attendance_pdf', {'month': '2026-03'})
+        self.assertTrue(self.render(job), job.error_message)
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual(job.mime_type, 'application/pdf')
+        self.assertTrue(job.output_file.read().startswith(b'%PDF'))
+
+    def test_validation_error_fails_job(self):
+        job = submit_export(self.user, 'attendance_pdf', {'month': '2026-13'})
+        self.assertFalse(self.render(job))
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.error_message, 'format_bulan_tidak_valid_gunakan_yyyy_mm')
+
+    def test_team_report_requires_supervisor(self):
+        job = submit_export(self.user, 'team_attendance_pdf')
+        self.assertFalse(self.render(job))
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('supervisor', job.error_message)
+
+    def test_object_outside_users_scope(self):
+        job = submit_export(self.user, 'overtime_docx', object_id=999)
+        self.assertFalse(self.render(job))
+        self.assertEqual(job.error_message, 'Data tidak ditemukan')
+
+    def test_inactive_user(self):
+        job = submit_export(self.user, 'attendance_pdf')
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertFalse(self.render(job))
+        self.assertEqual(job.status, 'failed')
+
+
+class ExportJobQueueTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('pegawai1', password='pw')
+        Employee.objects.create(user=self.user, nip='198001012000011001')
+        self.job = submit_export(self.user, 'attendance_pdf')
+
+    def claim_long_ago(self):
+        self.assertEqual(claim_exports(1, 'worker-1'), [self.job.id])
+        long_ago = timezone.now() - timedelta(hours=1)
+        GeneratedReport.objects.filter(pk=self.job.pk).update(started_at=long_ago, updated_at=long_ago)
+
+    def test_running_job_with_heartbeat_is_not_requeued(self):
+        self.claim_long_ago()
+        self.assertEqual(heartbeat_exports([self.job.id], 'worker-1'), 1)
+        self.assertEqual(requeue_stale_exports(), 0)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'processing')
+
+    def test_job_without_heartbeat_is_requeued(self):
+        self.claim_long_ago()
+        # Another worker's heartbeat does not keep the job alive
+        self.assertEqual(heartbeat_exports([self.job.id], 'worker-2'), 0)
+        self.assertEqual(requeue_stale_exports(), 1)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'pending')
+
+    def test_export_jobs_are_not_listed_as_reports(self):
+        legacy = GeneratedReport.objects.create(name='Laporan', report_type='attendance', requested_by=self.user)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        for url in ('/api/v2/reporting/reports/', '/api/v2/reporting/employee/reports/'):
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            results = response.data['results'] if isinstance(response.data, dict) else response.data
+            self.assertEqual([report['id'] for report in results], [legacy.id])
+        self.assertEqual(client.get(f'/api/v2/reporting/reports/{self.job.id}/').status_code, 404)
@@ -8,12 +8,14 @@ router.register(r'templates', views.ReportTemplateViewSet, basename='template')
 router.register(r'reports', views.GeneratedReportViewSet, basename='report')
 router.register(r'schedules', views.ReportScheduleViewSet, basename='schedule')
 router.register(r'generate', views.ReportGenerationViewSet, basename='generation')
+router.register(r'exports', views.ExportJobViewSet, basename='export')
 
 # Admin-specific router
 admin_router = DefaultRouter()
 admin_router.register(r'templates', views.AdminReportTemplateViewSet, basename='admin-template')
 admin_router.register(r'reports', views.AdminGeneratedReportViewSet, basename='admin-report')
 admin_router.register(r'schedules', views.AdminReportScheduleViewSet, basename='admin-schedule')
+admin_router.register(r'exports', views.ExportJobViewSet, basename='admin-export')
 
 # Supervisor-specific router (inherits from main router)
 supervisor_router = DefaultRouter()
@@ -21,6 +23,7 @@ supervisor_router.register(r'templates', views.ReportTemplateViewSet, basename='
 supervisor_router.register(r'reports', views.GeneratedReportViewSet, basename='supervisor-report')
 supervisor_router.register(r'schedules', views.ReportScheduleViewSet, basename='supervisor-schedule')
 supervisor_router.register(r'generate', views.ReportGenerationViewSet, basename='supervisor-generation')
+supervisor_router.register(r'exports', views.ExportJobViewSet, basename='supervisor-export')
 
 # Employee-specific router (inherits from main router)
 employee_router = DefaultRouter()
@@ -28,6 +31,7 @@ employee_router.register(r'templates', views.ReportTemplateViewSet, basename='em
 employee_router.register(r'reports', views.GeneratedReportViewSet, basename='employee-report')
 employee_router.register(r'schedules', views.ReportScheduleViewSet, basename='employee-schedule')
 employee_router.register(r'generate', views.ReportGenerationViewSet, basename='employee-generation')
+employee_router.register(r'exports', views.ExportJobViewSet, basename='employee-export')
 
 urlpatterns = [
     # Main endpoints
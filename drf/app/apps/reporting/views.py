@@ -1,8 +1,8 @@
-from rest_framework import viewsets, permissions, status
+from rest_framework import mixins, viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.utils import timezone
-from django.http import HttpResponse
+from django.http import FileResponse, HttpResponse
 from django.shortcuts import get_object_or_404
 from .models import ReportTemplate, GeneratedReport, ReportSchedule, ReportAccessLog
 from .serializers import (
@@ -11,9 +11,12 @@ from .serializers import (
     ReportScheduleSerializer, ReportScheduleAdminSerializer, ReportScheduleCreateUpdateSerializer,
     ReportAccessLogSerializer,
     AttendanceReportRequestSerializer, OvertimeReportRequestSerializer, SummaryReportRequestSerializer,
-    ReportDownloadSerializer, ReportStatisticsSerializer
+    ReportDownloadSerializer, ReportStatisticsSerializer,
+    ExportJobSerializer, ExportJobCreateSerializer
 )
+from .exports import export_job_response, submit_export
 from .services import ReportGenerationService
+from api.pagination import KeysetPagination
 from apps.core.permissions import IsAdmin, IsSupervisor, IsEmployee
 from datetime import datetime, timedelta
 
@@ -26,13 +29,13 @@ class ReportTemplateViewSet(viewsets.ModelViewSet):
     
     def get_serializer_class(self):
         """Return appropriate serializer based on user role"""
-        if self.request.user.is_superuser or self.request.user.groups.filter(name='admin').exists():
+        if self.request.principal.is_admin:
             return ReportTemplateAdminSerializer
         return ReportTemplateSerializer
     
     def get_queryset(self):
         """Filter templates based on user role"""
-        if self.request.user.is_superuser or self.request.user.groups.filter(name='admin').exists():
+        if self.request.principal.is_admin:
             return ReportTemplate.objects.all()
         else:
             # Regular users can only see active templates
@@ -70,24 +73,26 @@ class GeneratedReportViewSet(viewsets.ModelViewSet):
     
     def get_serializer_class(self):
         """Return appropriate serializer based on user role"""
-        if self.request.user.is_superuser or self.request.user.groups.filter(name='admin').exists():
+        if self.request.principal.is_admin:
             return GeneratedReportAdminSerializer
         return GeneratedReportSerializer
     
     def get_queryset(self):
         """Filter reports based on user role"""
-        if self.request.user.is_superuser or self.request.user.groups.filter(name='admin').exists():
-            return GeneratedReport.objects.all()
-        elif self.request.user.groups.filter(name='supervisor').exists():
+        # Export jobs are only reachable through ExportJobViewSet
+        reports = GeneratedReport.objects.filter(export_kind='')
+        if self.request.principal.is_admin:
+            return reports
+        elif self.request.principal.is_supervisor:
             # Supervisors can see reports of employees in their division
-            if hasattr(self.request.user, 'employee_profile') and self.request.user.employee_profile.division:
-                return GeneratedReport.objects.filter(
-                    requested_by__employee_profile__division=self.request.user.employee_profile.division
+            if self.request.principal.division:
+                return reports.filter(
+                    requested_by__employee_profile__division=self.request.principal.division
                 )
             return GeneratedReport.objects.none()
         else:
             # Regular employees can only see their own reports
-            return GeneratedReport.objects.filter(requested_by=self.request.user)
+            return reports.filter(requested_by=self.request.user)
     
     def perform_create(self, serializer):
         """Set requester when creating report"""
@@ -158,11 +163,71 @@ class GeneratedReportViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def my_reports(self, request):
         """Get current user's reports"""
-        queryset = GeneratedReport.objects.filter(requested_by=request.user)
+        queryset = GeneratedReport.objects.filter(requested_by=request.user, export_kind='')
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
 
+# Export Job Views
+class ExportJobViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Asynchronous exports: POST submits a job (202 + job id), GET polls its
+    status and ``download`` returns the file once the worker completed it.
+    """
+    serializer_class = ExportJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
+
+    def get_queryset(self):
+        """Jobs are rendered with the requester's access, so only they can see them"""
+        queryset = GeneratedReport.objects.exclude(export_kind='')
+        if self.request.principal.is_admin:
+            return queryset
+        return queryset.filter(requested_by=self.request.user)
+
+    def create(self, request):
+        """Submit an export job"""
+        serializer = ExportJobCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        job = submit_export(request.user, data['kind'], data['params'], data.get('object_id'))
+        return export_job_response(request, job)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """Download the rendered file of a completed job"""
+        job = self.get_object()
+
+        if job.status in ('pending', 'processing'):
+            response = Response(ExportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+            response['Retry-After'] = '5'
+            return response
+        if job.status == 'failed':
+            return Response(
+                {"error": job.error_message or "Export gagal"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if job.is_expired or not job.output_file:
+            return Response({"error": "Export sudah kedaluwarsa"}, status=status.HTTP_410_GONE)
+
+        ReportAccessLog.objects.create(
+            report=job,
+            user=request.user,
+            action='downloaded',
+            ip_address=request.META.get('REMOTE_ADDR'),
+            user_agent=request.META.get('HTTP_USER_AGENT', ''),
+            session_id=request.session.session_key or ''
+        )
+
+        return FileResponse(
+            job.output_file.open('rb'),
+            as_attachment=True,
+            filename=job.output_file.name.rsplit('/', 1)[-1],
+            content_type=job.mime_type or 'application/octet-stream',
+        )
+
+
 # Report Schedule Views
 class ReportScheduleViewSet(viewsets.ModelViewSet):
     """Report schedule management ViewSet with role-based access"""
@@ -171,13 +236,13 @@ class ReportScheduleViewSet(viewsets.ModelViewSet):
     
     def get_serializer_class(self):
         """Return appropriate serializer based on user role"""
-        if self.request.user.is_superuser or self.request.user.groups.filter(name='admin').exists():
+        if self.request.principal.is_admin:
             return ReportScheduleAdminSerializer
         return ReportScheduleSerializer
     
     def get_queryset(self):
         """Filter schedules based on user role"""
-        if self.request.user.is_superuser or self.request.user.groups.filter(name='admin').exists():
+        if self.request.principal.is_admin:
             return ReportSchedule.objects.all()
         else:
             # Regular users can only see their own schedules
@@ -344,8 +409,7 @@ class ReportGenerationViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['get'])
     def statistics(self, request):
         """Get reporting system statistics"""
-        if not (request.user.is_superuser or 
-                request.user.groups.filter(name='admin').exists()):
+        if not request.principal.is_admin:
             return Response(
                 {"error": "Only admins can view statistics"}, 
                 status=status.HTTP_403_FORBIDDEN
@@ -409,7 +473,7 @@ class AdminGeneratedReportViewSet(GeneratedReportViewSet):
     permission_classes = [IsAdmin]
     
     def get_queryset(self):
-        return GeneratedReport.objects.all()
+        return GeneratedReport.objects.filter(export_kind='')
 
 
 class AdminReportScheduleViewSet(ReportScheduleViewSet):
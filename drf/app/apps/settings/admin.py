@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import WorkSettings, Holiday
+from .models import WorkSettings, Holiday, Office
 
 
 @admin.register(WorkSettings)
@@ -64,3 +64,13 @@ class HolidayAdmin(admin.ModelAdmin):
     
     def get_queryset(self, request):
         return super().get_queryset(request).order_by('date')
+
+
+@admin.register(Office)
+class OfficeAdmin(admin.ModelAdmin):
+    """Admin interface for office geofences"""
+    list_display = ['name', 'latitude', 'longitude', 'radius_meters', 'is_active']
+    list_filter = ['is_active']
+    search_fields = ['name']
+    ordering = ['name']
+    readonly_fields = ['created_at', 'updated_at']
@@ -5,3 +5,6 @@ class SettingsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.settings'
     verbose_name = 'Work Settings'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,258 @@
+"""
+In-memory calendar indexes built from the settings tables.
+
+``HolidayCalendar`` keeps holiday dates as sorted ``array`` buckets of date
+ordinals, one bucket per year, loaded lazily. Lookups are a bisect instead
+of an ``EXISTS`` query, so bulk paths (reports, rollups, imports) can
+classify thousands of dates without per-row queries.
+
+``WorkCalendar`` combines it with the WorkSettings snapshot into one
+precomputed record per day (workday/holiday flags, schedule, required
+minutes) for month- and year-level reports.
+"""
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from calendar import monthrange
+from dataclasses import dataclass
+from datetime import date, time as dt_time
+from functools import lru_cache
+
+from django.db.models import Count, Max
+
+from .models import Holiday, WorkSettings
+from .snapshot import VersionedCache, WorkSettingsSnapshot, get_work_settings
+
+
+class HolidayCalendar:
+    """Holiday lookups answered from per-year sorted arrays of date ordinals"""
+
+    def __init__(self):
+        self._years = {}
+        self._lock = threading.Lock()
+
+    def _load_years(self, years):
+        """Load every year in ``years`` not loaded yet with a single query"""
+        missing = sorted(y for y in set(years) if y not in self._years)
+        if not missing:
+            return
+        buckets = {year: [] for year in missing}
+        dates = Holiday.objects.filter(
+            date__gte=date(missing[0], 1, 1),
+            date__lte=date(missing[-1], 12, 31),
+        ).values_list('date', flat=True)
+        for holiday_date in dates:
+            if holiday_date.year in buckets:
+                buckets[holiday_date.year].append(holiday_date.toordinal())
+        with self._lock:
+            for year, ordinals in buckets.items():
+                self._years.setdefault(year, array('l', sorted(ordinals)))
+
+    def _bucket(self, year):
+        bucket = self._years.get(year)
+        if bucket is None:
+            self._load_years([year])
+            bucket = self._years[year]
+        return bucket
+
+    def is_holiday(self, day):
+        """Return True if ``day`` is a holiday"""
+        bucket = self._bucket(day.year)
+        ordinal = day.toordinal()
+        index = bisect_left(bucket, ordinal)
+        return index < len(bucket) and bucket[index] == ordinal
+
+    def holidays_in(self, start, end):
+        """Return the sorted list of holiday dates between ``start`` and ``end`` (inclusive)"""
+        if end < start:
+            return []
+        self._load_years(range(start.year, end.year + 1))
+        start_ordinal = start.toordinal()
+        end_ordinal = end.toordinal()
+        result = []
+        for year in range(start.year, end.year + 1):
+            bucket = self._years[year]
+            lo = bisect_left(bucket, start_ordinal)
+            hi = bisect_right(bucket, end_ordinal)
+            result.extend(date.fromordinal(o) for o in bucket[lo:hi])
+        return result
+
+    def holiday_set(self, start, end):
+        """Return the holidays between ``start`` and ``end`` as a set for fast membership tests"""
+        return set(self.holidays_in(start, end))
+
+
+def _holiday_version():
+    # Row count catches deletes, latest updated_at catches creates and edits
+    stats = Holiday.objects.aggregate(total=Count('id'), last_updated=Max('updated_at'))
+    return stats['total'], stats['last_updated']
+
+
+_holiday_cache = VersionedCache(_holiday_version, lambda version: HolidayCalendar())
+
+
+def get_holiday_calendar():
+    """Return the process-wide HolidayCalendar, rebuilt when Holiday rows change"""
+    return _holiday_cache.get()
+
+
+def holiday_calendar_version():
+    """Fingerprint of the Holiday rows behind the current calendar (for cache keys)"""
+    _holiday_cache.get()
+    return _holiday_cache.version
+
+
+def invalidate_holiday_calendar():
+    """Drop the cached calendar in this process (called on Holiday save/delete)"""
+    _holiday_cache.clear()
+
+
+@dataclass(frozen=True)
+class DayRecord:
+    """Precomputed schedule for one calendar date"""
+    date: date
+    is_workday: bool
+    is_holiday: bool
+    start_time: dt_time
+    end_time: dt_time
+    required_minutes: int
+    grace_minutes: int
+
+    @property
+    def is_working_day(self):
+        """A scheduled workday that is not a holiday"""
+        return self.is_workday and not self.is_holiday
+
+
+class WorkCalendar:
+    """
+    Day records for a contiguous date range, built once from the WorkSettings
+    snapshot and the holiday calendar.
+
+    Per-date required minutes and a prefix sum of working days are kept in
+    flat arrays, so range questions ("required minutes for each date",
+    "working days between A and B") are slices instead of per-row lookups.
+    """
+
+    def __init__(self, start, end, work_settings=None, holiday_calendar=None):
+        if end < start:
+            raise ValueError("end must not be before start")
+        if work_settings is None:
+            work_settings = get_work_settings() or WorkSettingsSnapshot.from_instance(WorkSettings())
+        if holiday_calendar is None:
+            holiday_calendar = get_holiday_calendar()
+
+        self.start = start
+        self.end = end
+        self.work_settings = work_settings
+        self._origin = start.toordinal()
+
+        holidays = holiday_calendar.holiday_set(start, end)
+        workdays = set(work_settings.workdays or ())
+        self.days = []
+        self._required_minutes = array('l')
+        # _working_prefix[i] = number of working days in the first i dates
+        self._working_prefix = array('l', [0])
+        for offset in range(end.toordinal() - self._origin + 1):
+            day = date.fromordinal(self._origin + offset)
+            hours = work_settings.get_work_hours_for_date(day)
+            record = DayRecord(
+                date=day,
+                # An empty workdays list means every day is a workday (see core.utils.is_workday)
+                is_workday=not workdays or day.weekday() in workdays,
+                is_holiday=day in holidays,
+                start_time=hours['start_time'],
+                end_time=hours['end_time'],
+                required_minutes=int(hours['required_minutes'] or 0),
+                grace_minutes=int(hours['grace_minutes'] or 0),
+            )
+            self.days.append(record)
+            self._required_minutes.append(record.required_minutes)
+            self._working_prefix.append(self._working_prefix[-1] + (1 if record.is_working_day else 0))
+
+    @classmethod
+    def for_month(cls, year, month, **kwargs):
+        start = date(year, month, 1)
+        end = date(year, month, monthrange(year, month)[1])
+        return cls(start, end, **kwargs)
+
+    @classmethod
+    def for_year(cls, year, **kwargs):
+        return cls(date(year, 1, 1), date(year, 12, 31), **kwargs)
+
+    def __contains__(self, day):
+        return self.start <= day <= self.end
+
+    def __iter__(self):
+        return iter(self.days)
+
+    def __len__(self):
+        return len(self.days)
+
+    def _slice(self, start, end):
+        """Clamp ``start``/``end`` to the calendar and return array offsets"""
+        start = max(start, self.start)
+        end = min(end, self.end)
+        if end < start:
+            return 0, 0
+        return start.toordinal() - self._origin, end.toordinal() - self._origin + 1
+
+    def day(self, day):
+        """Return the DayRecord for ``day``"""
+        if day not in self:
+            raise KeyError(day)
+        return self.days[day.toordinal() - self._origin]
+
+    def days_between(self, start, end):
+        lo, hi = self._slice(start, end)
+        return self.days[lo:hi]
+
+    def required_minutes_between(self, start, end, working_only=False):
+        """
+        Required minutes for each date between ``start`` and ``end``.
+
+        With ``working_only`` the minutes of non-working days (weekends,
+        holidays) are reported as 0, which is what summaries and absence
+        detection expect.
+        """
+        lo, hi = self._slice(start, end)
+        minutes = self._required_minutes[lo:hi]
+        if working_only:
+            return array('l', (m if d.is_working_day else 0 for m, d in zip(minutes, self.days[lo:hi])))
+        return minutes
+
+    def total_required_minutes(self, start, end):
+        """Sum of required minutes over the working days between ``start`` and ``end``"""
+        return sum(self.required_minutes_between(start, end, working_only=True))
+
+    def working_days_between(self, start, end):
+        """Number of working days between ``start`` and ``end`` (inclusive)"""
+        lo, hi = self._slice(start, end)
+        return self._working_prefix[hi] - self._working_prefix[lo]
+
+    def working_dates(self, start=None, end=None):
+        """Dates of the working days in the range, in order"""
+        lo, hi = self._slice(start or self.start, end or self.end)
+        return [d.date for d in self.days[lo:hi] if d.is_working_day]
+
+
+@lru_cache(maxsize=32)
+def _month_calendar(work_settings, holiday_calendar, year, month):
+    # Keyed on the (immutable) snapshot and calendar objects, so a settings
+    # or holiday change naturally misses the cache
+    return WorkCalendar.for_month(year, month, work_settings=work_settings, holiday_calendar=holiday_calendar)
+
+
+def get_work_calendar(start, end=None):
+    """
+    Return a WorkCalendar covering ``start``..``end`` (``end`` defaults to ``start``).
+
+    Single-month ranges reuse a cached month calendar; longer ranges are
+    built on demand.
+    """
+    end = end or start
+    work_settings = get_work_settings() or WorkSettingsSnapshot.from_instance(WorkSettings())
+    holiday_calendar = get_holiday_calendar()
+    if (start.year, start.month) == (end.year, end.month):
+        return _month_calendar(work_settings, holiday_calendar, start.year, start.month)
+    return WorkCalendar(start, end, work_settings=work_settings, holiday_calendar=holiday_calendar)
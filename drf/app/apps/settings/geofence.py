@@ -0,0 +1,204 @@
+"""
+Grid index over office geofences.
+
+Each active ``Office`` is registered in every cell of a fixed lat/lng grid
+that its circle overlaps, so a check-in coordinate maps to a handful of
+candidate offices with one dict lookup. Only those candidates get an
+exact haversine check, which keeps check-in latency flat as sites are
+added. The legacy single office on WorkSettings is treated as one more
+site.
+
+Check-in (``locate_office``) and the bulk re-check (``match_offices_bulk``)
+apply the same rule through the same code: among the sites whose circle
+contains the point, the nearest wins; on a tie, the earlier site (indexed
+offices before the legacy office).
+"""
+import math
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from django.db.models import Count, Max
+
+from .models import Office
+from .snapshot import VersionedCache, get_work_settings
+
+
+EARTH_RADIUS_METERS = 6371000
+
+# ~1.1 km at the equator; offices with a larger radius span several cells
+GRID_CELL_DEGREES = 0.01
+METERS_PER_DEGREE_LAT = 111320.0
+
+
+@dataclass(frozen=True)
+class OfficeSite:
+    """Plain, float-based copy of an office geofence"""
+    id: Optional[int]
+    name: str
+    latitude: float
+    longitude: float
+    radius_meters: int
+
+
+@dataclass(frozen=True)
+class GeofenceMatch:
+    """Result of a geofence lookup"""
+    within_geofence: bool
+    office: Optional[OfficeSite] = None
+    distance_meters: Optional[float] = None
+
+    @property
+    def office_id(self):
+        return self.office.id if self.office else None
+
+
+def _cell(lat, lng):
+    return (math.floor(lat / GRID_CELL_DEGREES), math.floor(lng / GRID_CELL_DEGREES))
+
+
+class OfficeIndex:
+    """Maps grid cells to the offices whose geofence overlaps them"""
+
+    def __init__(self, sites):
+        self.sites = list(sites)
+        self._cells = {}
+        for site in self.sites:
+            lat_span = site.radius_meters / METERS_PER_DEGREE_LAT
+            # Longitude degrees shrink towards the poles; clamp to avoid a blow-up near them
+            cos_lat = max(math.cos(math.radians(site.latitude)), 0.01)
+            lng_span = site.radius_meters / (METERS_PER_DEGREE_LAT * cos_lat)
+            min_row, min_col = _cell(site.latitude - lat_span, site.longitude - lng_span)
+            max_row, max_col = _cell(site.latitude + lat_span, site.longitude + lng_span)
+            for row in range(min_row, max_row + 1):
+                for col in range(min_col, max_col + 1):
+                    self._cells.setdefault((row, col), []).append(site)
+
+    def candidates(self, lat, lng):
+        return self._cells.get(_cell(lat, lng), ())
+
+
+def _office_version():
+    stats = Office.objects.aggregate(total=Count('id'), last_updated=Max('updated_at'))
+    return stats['total'], stats['last_updated']
+
+
+def _build_office_index(version):
+    sites = [
+        OfficeSite(
+            id=office['id'],
+            name=office['name'],
+            latitude=float(office['latitude']),
+            longitude=float(office['longitude']),
+            radius_meters=office['radius_meters'],
+        )
+        for office in Office.objects.filter(is_active=True).values(
+            'id', 'name', 'latitude', 'longitude', 'radius_meters'
+        )
+    ]
+    return OfficeIndex(sites)
+
+
+_office_index_cache = VersionedCache(_office_version, _build_office_index)
+
+
+def get_office_index():
+    """Return the process-wide OfficeIndex, rebuilt when Office rows change"""
+    return _office_index_cache.get()
+
+
+def invalidate_office_index():
+    """Drop the cached index in this process (called on Office save/delete)"""
+    _office_index_cache.clear()
+
+
+def get_office_sites(work_settings=None):
+    """All active office sites, with the legacy WorkSettings office appended when configured"""
+    sites = list(get_office_index().sites)
+    legacy = _legacy_office_site(work_settings if work_settings is not None else get_work_settings())
+    if legacy:
+        sites.append(legacy)
+    return sites
+
+
+def haversine_matrix(lats, lngs, site_lats, site_lngs):
+    """
+    Vectorized haversine: distances in meters between every point and every
+    site, as an array of shape (len(lats), len(site_lats)).
+    """
+    lat1 = np.radians(np.asarray(lats, dtype=np.float64))[:, None]
+    lng1 = np.radians(np.asarray(lngs, dtype=np.float64))[:, None]
+    lat2 = np.radians(np.asarray(site_lats, dtype=np.float64))[None, :]
+    lng2 = np.radians(np.asarray(site_lngs, dtype=np.float64))[None, :]
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def match_offices_bulk(lats, lngs, sites):
+    """
+    ``locate_office`` for many points at once (same rule, same code).
+
+    ``sites`` should come from ``get_office_sites``. Returns
+    ``(within, site_index)`` arrays: ``site_index`` is the position in
+    ``sites`` of the nearest containing office, or -1 when none matched.
+    """
+    within, site_index, _ = _match(lats, lngs, sites)
+    return within, site_index
+
+
+def _match(lats, lngs, sites):
+    """``(within, site_index, distance)`` of the nearest containing site per point"""
+    count = len(lats)
+    if not sites or not count:
+        return np.zeros(count, dtype=bool), np.full(count, -1, dtype=np.int64), np.full(count, np.inf)
+    distances = haversine_matrix(
+        lats, lngs,
+        [site.latitude for site in sites],
+        [site.longitude for site in sites],
+    )
+    radii = np.asarray([site.radius_meters for site in sites], dtype=np.float64)
+    distances = np.where(distances <= radii[None, :], distances, np.inf)
+    # argmin returns the first minimum, so ties go to the earlier site
+    nearest = distances.argmin(axis=1)
+    nearest_distance = distances[np.arange(count), nearest]
+    within = np.isfinite(nearest_distance)
+    return within, np.where(within, nearest, -1), nearest_distance
+
+
+def _legacy_office_site(work_settings):
+    if not work_settings or not (work_settings.office_latitude and work_settings.office_longitude):
+        return None
+    return OfficeSite(
+        id=None,
+        name="Main Office",
+        latitude=float(work_settings.office_latitude),
+        longitude=float(work_settings.office_longitude),
+        radius_meters=work_settings.office_radius_meters,
+    )
+
+
+def locate_office(lat, lng, work_settings=None):
+    """
+    Resolve a coordinate to the nearest office geofence containing it.
+
+    Returns a GeofenceMatch; ``office.id`` is None when the legacy
+    WorkSettings office matched.
+    """
+    if lat is None or lng is None:
+        return GeofenceMatch(within_geofence=False)
+    lat, lng = float(lat), float(lng)
+
+    # Only the grid cell's candidates (plus the legacy office) can contain the point
+    sites = list(get_office_index().candidates(lat, lng))
+    legacy = _legacy_office_site(work_settings if work_settings is not None else get_work_settings())
+    if legacy:
+        sites.append(legacy)
+
+    within, site_index, distances = _match(np.array([lat]), np.array([lng]), sites)
+    if not within[0]:
+        return GeofenceMatch(within_geofence=False)
+    return GeofenceMatch(
+        within_geofence=True,
+        office=sites[site_index[0]],
+        distance_meters=float(distances[0]),
+    )
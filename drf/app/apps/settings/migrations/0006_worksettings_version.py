@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-17 04:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('settings', '0005_remove_worksettings_overtime_payment_threshold_hours_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='worksettings',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False, help_text='Incremented on every save; used to invalidate cached settings snapshots', verbose_name='Version'),
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from datetime import time
 from apps.core.models import TimeStampedModel
 
@@ -77,6 +77,14 @@ class WorkSettings(TimeStampedModel):
         help_text="Latest allowed check-out time"
     )
 
+    # Bumped on every save so each process can cheaply detect stale snapshots
+    version = models.PositiveIntegerField(
+        default=1,
+        editable=False,
+        verbose_name="Version",
+        help_text="Incremented on every save; used to invalidate cached settings snapshots"
+    )
+
     class Meta:
         verbose_name = "Work Settings"
         verbose_name_plural = "Work Settings"
@@ -84,6 +92,24 @@ class WorkSettings(TimeStampedModel):
     def __str__(self) -> str:
         return "WorkSettings"
     
+    def save(self, *args, **kwargs):
+        """Bump the version so cached snapshots in every worker get refreshed"""
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'version' not in update_fields:
+            kwargs['update_fields'] = list(update_fields) + ['version']
+        with transaction.atomic():
+            if self.pk:
+                # Bump from the locked row, not the in-memory copy, so concurrent
+                # saves never write the same version for different settings
+                current = (
+                    WorkSettings.objects.select_for_update()
+                    .filter(pk=self.pk)
+                    .values_list('version', flat=True)
+                    .first()
+                )
+                self.version = (current or 0) + 1
+            super().save(*args, **kwargs)
+    
     def get_work_hours_for_date(self, date):
         """Get work hours for a specific date"""
         if date.weekday() == 4:  # Friday
@@ -122,4 +148,22 @@ class Holiday(TimeStampedModel):
     @classmethod
     def is_holiday_date(cls, date):
         """Check if a specific date is a holiday"""
-        return cls.objects.filter(date=date).exists()
+        from .calendars import get_holiday_calendar
+        return get_holiday_calendar().is_holiday(date)
+
+
+class Office(TimeStampedModel):
+    """Office site with its own check-in geofence"""
+    name = models.CharField(max_length=100, unique=True)
+    latitude = models.DecimalField(max_digits=10, decimal_places=7)
+    longitude = models.DecimalField(max_digits=10, decimal_places=7)
+    radius_meters = models.PositiveIntegerField(default=100)
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        ordering = ["name"]
+        verbose_name = "Office"
+        verbose_name_plural = "Offices"
+
+    def __str__(self) -> str:
+        return self.name
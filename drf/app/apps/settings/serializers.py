@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import WorkSettings, Holiday
+from .models import WorkSettings, Holiday, Office
 
 
 class HolidaySerializer(serializers.ModelSerializer):
@@ -105,3 +105,14 @@ class WorkSettingsCreateUpdateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Overtime holiday rate cannot be negative")
         
         return data
+
+
+class OfficeSerializer(serializers.ModelSerializer):
+    """Office geofence serializer"""
+    class Meta:
+        model = Office
+        fields = [
+            "id", "name", "latitude", "longitude", "radius_meters", "is_active",
+            "created_at", "updated_at"
+        ]
+        read_only_fields = ["id", "created_at", "updated_at"]
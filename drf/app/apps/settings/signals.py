@@ -0,0 +1,31 @@
+from django.core.signals import request_started
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import WorkSettings, Holiday, Office
+from .calendars import invalidate_holiday_calendar
+from .geofence import invalidate_office_index
+from .snapshot import invalidate_work_settings, mark_caches_stale
+
+
+@receiver(post_save, sender=WorkSettings)
+@receiver(post_delete, sender=WorkSettings)
+def refresh_work_settings_snapshot(sender, **kwargs):
+    """Drop this process' snapshot; other workers notice the bumped version"""
+    invalidate_work_settings()
+
+
+@receiver(post_save, sender=Holiday)
+@receiver(post_delete, sender=Holiday)
+def refresh_holiday_calendar(sender, **kwargs):
+    """Drop this process' holiday index; other workers notice the changed fingerprint"""
+    invalidate_holiday_calendar()
+
+
+@receiver(post_save, sender=Office)
+@receiver(post_delete, sender=Office)
+def refresh_office_index(sender, **kwargs):
+    """Drop this process' geofence index; other workers notice the changed fingerprint"""
+    invalidate_office_index()
+
+
+request_started.connect(mark_caches_stale, dispatch_uid='settings.mark_caches_stale')
@@ -0,0 +1,147 @@
+"""
+Process-wide, immutable snapshot of the WorkSettings singleton.
+
+Services, models and serializers used to call ``WorkSettings.objects.first()``
+for every row they touched. ``get_work_settings()`` returns one frozen
+snapshot per process instead, and revalidates it against the row's
+``version`` counter at most once per request (or every
+``SNAPSHOT_MAX_AGE_SECONDS`` outside the request cycle, e.g. in management
+commands), so every gunicorn worker picks up admin changes on its next request.
+"""
+import threading
+import time
+from dataclasses import dataclass, fields
+from datetime import time as dt_time
+from decimal import Decimal
+from typing import Optional, Tuple
+
+from .models import WorkSettings
+
+
+SNAPSHOT_MAX_AGE_SECONDS = 30
+
+
+class VersionedCache:
+    """
+    Per-process cached value guarded by a cheap version query.
+
+    ``version_fn`` returns a small fingerprint of the source rows and
+    ``build_fn(version)`` builds the cached value. The fingerprint is
+    re-read at most once per request per thread; the value is rebuilt
+    only when the fingerprint changes.
+    """
+    _instances = []
+
+    def __init__(self, version_fn, build_fn):
+        self.version_fn = version_fn
+        self.build_fn = build_fn
+        self.lock = threading.Lock()
+        self.value = None
+        self.version = None
+        self.loaded = False
+        self.local = threading.local()
+        VersionedCache._instances.append(self)
+
+    def mark_stale(self):
+        """Force the next read in this thread to revalidate the version"""
+        self.local.validated_at = None
+
+    def clear(self):
+        with self.lock:
+            self.value = None
+            self.version = None
+            self.loaded = False
+        self.mark_stale()
+
+    def is_validated(self):
+        validated_at = getattr(self.local, 'validated_at', None)
+        if validated_at is None:
+            return False
+        return (time.monotonic() - validated_at) < SNAPSHOT_MAX_AGE_SECONDS
+
+    def get(self):
+        if self.loaded and self.is_validated():
+            return self.value
+
+        current_version = self.version_fn()
+        with self.lock:
+            if not self.loaded or self.version != current_version:
+                self.value = self.build_fn(current_version)
+                self.version = current_version
+                self.loaded = True
+            value = self.value
+        self.local.validated_at = time.monotonic()
+        return value
+
+    @classmethod
+    def mark_all_stale(cls):
+        for cache in cls._instances:
+            cache.mark_stale()
+
+
+@dataclass(frozen=True)
+class WorkSettingsSnapshot:
+    """Read-only copy of WorkSettings; exposes the same attributes and helpers"""
+    id: int
+    version: int
+    timezone: str
+    start_time: dt_time
+    end_time: dt_time
+    required_minutes: int
+    grace_minutes: int
+    workdays: Tuple[int, ...]
+    friday_start_time: dt_time
+    friday_end_time: dt_time
+    friday_required_minutes: int
+    friday_grace_minutes: int
+    office_latitude: Optional[Decimal]
+    office_longitude: Optional[Decimal]
+    office_radius_meters: int
+    overtime_rate_workday: Decimal
+    overtime_rate_holiday: Decimal
+    overtime_threshold_minutes: int
+    overtime_payment_threshold_minutes: int
+    earliest_check_in_enabled: bool
+    earliest_check_in_time: dt_time
+    latest_check_out_enabled: bool
+    latest_check_out_time: dt_time
+
+    # The model helpers only read plain attributes, so they work on the snapshot as-is
+    get_work_hours_for_date = WorkSettings.get_work_hours_for_date
+    is_workday = WorkSettings.is_workday
+
+    @classmethod
+    def from_instance(cls, instance):
+        """Build a snapshot from a WorkSettings model instance"""
+        values = {f.name: getattr(instance, f.name) for f in fields(cls)}
+        values['workdays'] = tuple(instance.workdays or ())
+        return cls(**values)
+
+
+def _work_settings_version():
+    return WorkSettings.objects.order_by('pk').values_list('version', flat=True).first()
+
+
+def _build_work_settings(version):
+    if version is None:
+        return None
+    instance = WorkSettings.objects.order_by('pk').first()
+    return WorkSettingsSnapshot.from_instance(instance) if instance else None
+
+
+_work_settings_cache = VersionedCache(_work_settings_version, _build_work_settings)
+
+
+def get_work_settings():
+    """Return the current WorkSettingsSnapshot, or None when settings are not configured"""
+    return _work_settings_cache.get()
+
+
+def invalidate_work_settings():
+    """Drop the cached snapshot in this process (called on WorkSettings save/delete)"""
+    _work_settings_cache.clear()
+
+
+def mark_caches_stale(**kwargs):
+    """request_started receiver: revalidate every cached version once per request"""
+    VersionedCache.mark_all_stale()
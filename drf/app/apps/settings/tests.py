@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+
+import numpy as np
+from django.test import TestCase
+
+from .geofence import get_office_sites, invalidate_office_index, locate_office, match_offices_bulk
+from .models import Office, WorkSettings
+
+
+class GeofenceMatchingTests(TestCase):
+    """Check-in and the bulk re-check must pick the same office"""
+
+    def setUp(self):
+        invalidate_office_index()
+        # Two overlapping geofences; the legacy office sits between them
+        self.far = Office.objects.create(name='Far', latitude='25.2000000', longitude='55.2700000', radius_meters=500)
+        self.near = Office.objects.create(name='Near', latitude='25.2030000', longitude='55.2700000', radius_meters=500)
+        self.work_settings = SimpleNamespace(
+            office_latitude='25.2024000', office_longitude='55.2700000', office_radius_meters=500,
+        )
+
+    def tearDown(self):
+        invalidate_office_index()
+
+    def _bulk(self, lat, lng):
+        sites = get_office_sites(self.work_settings)
+        within, index = match_offices_bulk(np.array([lat]), np.array([lng]), sites)
+        return sites[index[0]].id if within[0] else 'outside'
+
+    def test_nearest_indexed_office_wins(self):
+        match = locate_office(25.2029, 55.27, self.work_settings)
+        self.assertEqual(match.office_id, self.near.id)
+        self.assertEqual(self._bulk(25.2029, 55.27), self.near.id)
+
+    def test_nearer_legacy_office_wins_over_indexed_match(self):
+        match = locate_office(25.2023, 55.27, self.work_settings)
+        self.assertTrue(match.within_geofence)
+        self.assertIsNone(match.office_id)
+        self.assertIsNone(self._bulk(25.2023, 55.27))
+
+    def test_outside_every_geofence(self):
+        self.assertFalse(locate_office(25.3, 55.27, self.work_settings).within_geofence)
+        self.assertEqual(self._bulk(25.3, 55.27), 'outside')
+
+    def test_both_paths_agree_on_a_grid_of_points(self):
+        sites = get_office_sites(self.work_settings)
+        lats = np.linspace(25.194, 25.21, 41)
+        within, index = match_offices_bulk(lats, np.full(len(lats), 55.2702), sites)
+        for lat, inside, i in zip(lats, within, index):
+            match = locate_office(lat, 55.2702, self.work_settings)
+            self.assertEqual(match.within_geofence, bool(inside))
+            if inside:
+                self.assertEqual(match.office_id, sites[i].id)
+
+
+class WorkSettingsVersionTests(TestCase):
+    """Every save gets a new version, even from a stale in-memory copy"""
+
+    def test_stale_copy_bumps_past_the_stored_version(self):
+        settings = WorkSettings.objects.create()
+        stale = WorkSettings.objects.get(pk=settings.pk)
+
+        settings.grace_minutes = 5
+        settings.save()
+        stale.grace_minutes = 10
+        stale.save(update_fields=['grace_minutes'])
+
+        self.assertEqual(stale.version, settings.version + 1)
+        self.assertEqual(WorkSettings.objects.get(pk=settings.pk).version, stale.version)
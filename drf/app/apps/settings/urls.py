@@ -6,6 +6,7 @@ from . import views
 router = DefaultRouter()
 router.register(r'work', views.WorkSettingsViewSet, basename='work-settings')
 router.register(r'holidays', views.HolidayViewSet, basename='holiday')
+router.register(r'offices', views.OfficeViewSet, basename='office')
 
 # Admin-specific router
 admin_router = DefaultRouter()
@@ -5,26 +5,29 @@ from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
 from datetime import date
-from .models import WorkSettings, Holiday
+from .models import WorkSettings, Holiday, Office
+from .calendars import get_holiday_calendar
 from .serializers import (
     WorkSettingsSerializer, WorkSettingsAdminSerializer, WorkSettingsSupervisorSerializer,
     WorkSettingsEmployeeSerializer, WorkSettingsCreateUpdateSerializer,
-    HolidaySerializer, HolidayAdminSerializer, HolidayPublicSerializer
+    HolidaySerializer, HolidayAdminSerializer, HolidayPublicSerializer, OfficeSerializer
 )
 from apps.core.permissions import IsAdmin, IsSupervisor, IsEmployee, IsAdminOrReadOnly
+from api.conditional import ConditionalGetMixin
 
 
-class WorkSettingsViewSet(viewsets.GenericViewSet):
+class WorkSettingsViewSet(ConditionalGetMixin, viewsets.GenericViewSet):
     """Work settings ViewSet (singleton pattern)"""
     permission_classes = [permissions.IsAuthenticated]
+    reference_data = True
     
     def get_serializer_class(self):
         """Return appropriate serializer based on user role"""
-        if self.request.user.is_superuser or self.request.user.groups.filter(name='admin').exists():
+        if self.request.principal.is_admin:
             if self.action in ['create', 'update', 'partial_update']:
                 return WorkSettingsCreateUpdateSerializer
             return WorkSettingsAdminSerializer
-        elif self.request.user.groups.filter(name='supervisor').exists():
+        elif self.request.principal.is_supervisor:
             return WorkSettingsSupervisorSerializer
         else:
             return WorkSettingsEmployeeSerializer
@@ -42,8 +45,7 @@ class WorkSettingsViewSet(viewsets.GenericViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        serializer = self.get_serializer(settings)
-        return Response(serializer.data)
+        return self._conditional_settings_response(request, settings)
     
     def retrieve(self, request, pk=None):
         """Get work settings by ID (always returns single instance)"""
@@ -103,12 +105,20 @@ class WorkSettingsViewSet(viewsets.GenericViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        serializer = self.get_serializer(settings)
-        return Response(serializer.data)
+        return self._conditional_settings_response(request, settings)
+    
+    def _conditional_settings_response(self, request, settings):
+        etag, last_modified = self.object_validators(settings)
+        return self.conditional_response(
+            request, etag, last_modified,
+            lambda: Response(self.get_serializer(settings).data),
+            use_last_modified=True,
+        )
 
 
-class HolidayViewSet(viewsets.ModelViewSet):
+class HolidayViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """Holiday management ViewSet"""
+    reference_data = True
     queryset = Holiday.objects.all()
     serializer_class = HolidaySerializer
     permission_classes = [IsAdminOrReadOnly]
@@ -120,7 +130,7 @@ class HolidayViewSet(viewsets.ModelViewSet):
     
     def get_serializer_class(self):
         """Return appropriate serializer based on user role"""
-        if self.request.user.is_superuser or self.request.user.groups.filter(name='admin').exists():
+        if self.request.principal.is_admin:
             return HolidayAdminSerializer
         else:
             return HolidayPublicSerializer
@@ -130,7 +140,7 @@ class HolidayViewSet(viewsets.ModelViewSet):
         queryset = Holiday.objects.all()
         
         # Apply role-based filtering
-        if self.request.user.is_superuser or self.request.user.groups.filter(name='admin').exists():
+        if self.request.principal.is_admin:
             queryset = queryset
         else:
             # Other users can see all holidays (read-only)
@@ -169,7 +179,8 @@ class HolidayViewSet(viewsets.ModelViewSet):
         try:
             from datetime import datetime
             date = datetime.strptime(date_str, '%Y-%m-%d').date()
-            is_holiday = Holiday.is_holiday_date(date)
+            # Answer the common "not a holiday" case from the in-memory calendar
+            is_holiday = get_holiday_calendar().is_holiday(date)
             
             if is_holiday:
                 holiday = Holiday.objects.get(date=date)
@@ -196,6 +207,19 @@ class HolidayViewSet(viewsets.ModelViewSet):
             )
 
 
+class OfficeViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    """Office geofence management ViewSet (admin write, everyone read)"""
+    reference_data = True
+    queryset = Office.objects.all()
+    serializer_class = OfficeSerializer
+    permission_classes = [IsAdminOrReadOnly]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filterset_fields = ['is_active']
+    search_fields = ['name']
+    ordering_fields = ['name', 'radius_meters']
+    ordering = ['name']
+
+
 # Role-specific ViewSets for backward compatibility
 class AdminWorkSettingsViewSet(WorkSettingsViewSet):
     """Admin-specific work settings ViewSet"""
@@ -223,15 +247,17 @@ class SupervisorWorkSettingsViewSet(WorkSettingsViewSet):
         return WorkSettingsSupervisorSerializer
 
 
-class SupervisorHolidayViewSet(viewsets.ReadOnlyModelViewSet):
+class SupervisorHolidayViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """Supervisor-specific holiday ViewSet (read-only)"""
+    reference_data = True
     queryset = Holiday.objects.all()
     serializer_class = HolidayPublicSerializer
     permission_classes = [IsSupervisor]
 
 
-class EmployeeHolidayViewSet(viewsets.ReadOnlyModelViewSet):
+class EmployeeHolidayViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     """Employee-specific holiday ViewSet (read-only)"""
+    reference_data = True
     queryset = Holiday.objects.all()
     serializer_class = HolidayPublicSerializer
     permission_classes = [IsEmployee]
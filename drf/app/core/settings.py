@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -57,6 +59,7 @@ INSTALLED_APPS = [
     'apps.reporting',
     'apps.settings',
     'apps.notifications',
+    'apps.approvals',
 ]
 
 MIDDLEWARE = [
@@ -66,6 +69,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.core.principal.PrincipalMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -110,6 +114,7 @@ DATABASES = {
 # CORS
 CORS_ALLOWED_ORIGINS = os.getenv('CORS_ALLOWED_ORIGINS', 'http://localhost:3000').split(',')
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
 
 # CSRF settings
 CSRF_TRUSTED_ORIGINS = os.getenv('CSRF_TRUSTED_ORIGINS', 'http://localhost:3000').split(',')
@@ -193,6 +198,29 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Caches: "shared" is visible to every process of every container (backend,
+# export_worker, attendance_worker) because it lives in the database; per-user
+# state such as apps.attendance.my_day must not live in one process or one
+# container. The table is created by apps.core migration 0004 (createcachetable).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': os.getenv('DJANGO_SHARED_CACHE_TABLE', 'core_shared_cache'),
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+}
+MY_DAY_CACHE_ALIAS = 'shared'
+MY_DAY_CACHE_SECONDS = int(os.getenv('MY_DAY_CACHE_SECONDS', 10 * 60))
+
+# Cache-Control max-age for reference data (holidays, divisions, ...; api.conditional)
+REFERENCE_DATA_MAX_AGE = int(os.getenv('REFERENCE_DATA_MAX_AGE', 60))
+
+# Hours in a month used to derive the hourly wage from gaji_pokok (apps.overtime.payroll)
+OVERTIME_MONTHLY_WORK_HOURS = int(os.getenv('OVERTIME_MONTHLY_WORK_HOURS', 22 * 8))
+
 # Notification settings
 NOTIFICATION_SETTINGS = {
     'DEFAULT_EXPIRY_DAYS': 30,
@@ -202,4 +230,25 @@ NOTIFICATION_SETTINGS = {
     'ENABLE_PUSH_NOTIFICATIONS': False,  # Future feature
 }
 
-APPEND_SLASH=False
\ No newline at end of file
+APPEND_SLASH=False
+
+# Idempotency-Key support (apps.core.idempotency)
+IDEMPOTENCY_KEY_TTL_SECONDS = int(os.getenv('IDEMPOTENCY_KEY_TTL_SECONDS', 24 * 60 * 60))
+# An unfinished reservation older than this is assumed abandoned and may be taken over
+IDEMPOTENCY_PROCESSING_TIMEOUT_SECONDS = int(os.getenv('IDEMPOTENCY_PROCESSING_TIMEOUT_SECONDS', 60))
+
+# Oldest punch (seconds before it arrives) a non-admin, non-kiosk client may
+# submit through the punch batch endpoint; covers short offline periods
+PUNCH_BATCH_MAX_AGE_SECONDS = int(os.getenv('PUNCH_BATCH_MAX_AGE_SECONDS', 15 * 60))
+
+# Asynchronous export jobs (apps.reporting.exports, manage.py run_export_worker)
+EXPORT_WORKER_CONCURRENCY = int(os.getenv('EXPORT_WORKER_CONCURRENCY', 4))
+EXPORT_WORKER_POLL_SECONDS = float(os.getenv('EXPORT_WORKER_POLL_SECONDS', 2))
+EXPORT_JOB_TTL_HOURS = int(os.getenv('EXPORT_JOB_TTL_HOURS', 24))
+EXPORT_JOB_STALE_SECONDS = int(os.getenv('EXPORT_JOB_STALE_SECONDS', 15 * 60))
+EXPORT_JOB_MAX_ATTEMPTS = int(os.getenv('EXPORT_JOB_MAX_ATTEMPTS', 3))
+
+# Converted PDFs cached on disk by DOCX content hash (apps.overtime.pdf_export)
+DOCX_CONVERTER_URL = os.getenv('DOCX_CONVERTER_URL', 'http://docx_converter:5000/convert')
+PDF_CACHE_DIR = os.getenv('PDF_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'absensi-pdf-cache'))
+PDF_CACHE_MAX_BYTES = int(os.getenv('PDF_CACHE_MAX_BYTES', 256 * 1024 * 1024))
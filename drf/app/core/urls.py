@@ -32,6 +32,8 @@ urlpatterns = [
     path('api/v2/settings/', include('apps.settings.urls')),
     path('api/v2/users/', include('apps.users.urls')),
     path('api/v2/notifications/', include('apps.notifications.urls')),
+    path('api/v2/reporting/', include('apps.reporting.urls')),
+    path('api/v2/approvals/', include('apps.approvals.urls')),
     # Schema and docs
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     path('api/docs/', SpectacularRedocView.as_view(url_name='schema'), name='swagger-ui'),